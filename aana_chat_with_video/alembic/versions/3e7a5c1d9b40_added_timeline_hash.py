@@ -0,0 +1,30 @@
+"""added timeline hash.
+
+Revision ID: 3e7a5c1d9b40
+Revises: 9dbd2aa2dcb8
+Create Date: 2026-10-18 23:52:37.104216
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7a5c1d9b40'
+down_revision: str | None = '9dbd2aa2dcb8'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade database to this revision from previous."""
+    # existing timelines get an empty hash until they are saved again
+    with op.batch_alter_table('extended_video_timeline', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('timeline_hash', sa.String(), server_default='', nullable=False, comment='Hash of the content of the timeline'))
+
+
+def downgrade() -> None:
+    """Downgrade database from this revision to previous."""
+    with op.batch_alter_table('extended_video_timeline', schema=None) as batch_op:
+        batch_op.drop_column('timeline_hash')
@@ -0,0 +1,40 @@
+"""added queued video status.
+
+Revision ID: 4f7d2b9e6c15
+Revises: 8c4e1f0b7a32
+Create Date: 2026-10-18 21:05:17.639208
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4f7d2b9e6c15'
+down_revision: str | None = '8c4e1f0b7a32'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+old_status = sa.Enum('CREATED', 'RUNNING', 'COMPLETED', 'FAILED', name='videoprocessingstatus')
+new_status = sa.Enum('QUEUED', 'CREATED', 'RUNNING', 'COMPLETED', 'FAILED', name='videoprocessingstatus')
+
+
+def upgrade() -> None:
+    """Upgrade database to this revision from previous."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # values can't be added to an enum type inside a transaction
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE videoprocessingstatus ADD VALUE IF NOT EXISTS 'QUEUED'")
+    else:
+        with op.batch_alter_table('extended_video', schema=None) as batch_op:
+            batch_op.alter_column('status', existing_type=old_status, type_=new_status, existing_nullable=False, existing_comment='Processing status')
+
+
+def downgrade() -> None:
+    """Downgrade database from this revision to previous."""
+    op.execute("UPDATE extended_video SET status = 'CREATED' WHERE status = 'QUEUED'")
+    # postgres can't drop a value from an enum type, the unused value is kept
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('extended_video', schema=None) as batch_op:
+            batch_op.alter_column('status', existing_type=new_status, type_=old_status, existing_nullable=False, existing_comment='Processing status')
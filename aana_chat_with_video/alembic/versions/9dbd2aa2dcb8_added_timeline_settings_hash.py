@@ -0,0 +1,38 @@
+"""added timeline settings hash.
+
+Revision ID: 9dbd2aa2dcb8
+Revises: 4f7d2b9e6c15
+Create Date: 2026-10-18 22:41:09.518364
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9dbd2aa2dcb8'
+down_revision: str | None = '4f7d2b9e6c15'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade database to this revision from previous."""
+    # concurrent saves could leave duplicate timelines, keep the latest one
+    op.execute(
+        'DELETE FROM extended_video_timeline WHERE id NOT IN ('
+        'SELECT MAX(id) FROM extended_video_timeline '
+        'GROUP BY media_id, asr_model, captioning_model, chunk_size, chunking)'
+    )
+    # existing timelines get an empty fingerprint, so they are rebuilt on the next request
+    with op.batch_alter_table('extended_video_timeline', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('settings_hash', sa.String(), server_default='', nullable=False, comment='Fingerprint of the settings the timeline was built with'))
+        batch_op.create_unique_constraint(batch_op.f('uq_extended_video_timeline_media_id'), ['media_id', 'asr_model', 'captioning_model', 'chunk_size', 'chunking', 'settings_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade database from this revision to previous."""
+    with op.batch_alter_table('extended_video_timeline', schema=None) as batch_op:
+        batch_op.drop_constraint(batch_op.f('uq_extended_video_timeline_media_id'), type_='unique')
+        batch_op.drop_column('settings_hash')
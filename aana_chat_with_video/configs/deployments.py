@@ -48,6 +48,8 @@ deployments: list[dict] = [
             user_config=HFBlip2Config(
                 model="Salesforce/blip2-opt-2.7b",
                 dtype=Dtype.FLOAT16,
+                # raise to settings.captioning_batching.max_batch_size when batching
+                # frames across requests, if the GPU share has the memory for it
                 batch_size=2,
                 num_processing_threads=2,
             ).model_dump(mode="json"),
@@ -67,7 +69,9 @@ deployments: list[dict] = [
                 default_sampling_params=SamplingParams(
                     temperature=0.0, top_p=1.0, top_k=-1, max_tokens=1024
                 ),
-                engine_args={"trust_remote_code": True},
+                # reuse the KV cache of the shared prompt prefix (preamble and timeline)
+                # across questions about the same video
+                engine_args={"trust_remote_code": True, "enable_prefix_caching": True},
             ).model_dump(mode="json"),
         ),
     },
@@ -1,8 +1,13 @@
 from aana_chat_with_video.endpoints.delete_video import DeleteVideoEndpoint
+from aana_chat_with_video.endpoints.get_timeline_cache_stats import (
+    GetTimelineCacheStatsEndpoint,
+)
 from aana_chat_with_video.endpoints.get_video_status import GetVideoStatusEndpoint
 from aana_chat_with_video.endpoints.index_video import IndexVideoEndpoint
+from aana_chat_with_video.endpoints.index_video_batch import IndexVideoBatchEndpoint
 from aana_chat_with_video.endpoints.load_video_metadata import LoadVideoMetadataEndpoint
 from aana_chat_with_video.endpoints.video_chat import VideoChatEndpoint
+from aana_chat_with_video.endpoints.video_chat_session import VideoChatSessionEndpoint
 
 endpoints: list[dict] = [
     {
@@ -11,6 +16,12 @@ endpoints: list[dict] = [
         "summary": "Index a video and return the captions and transcriptions (streaming)",
         "endpoint_cls": IndexVideoEndpoint,
     },
+    {
+        "name": "index_video_batch",
+        "path": "/video/index_batch",
+        "summary": "Queue videos for indexing in the background",
+        "endpoint_cls": IndexVideoBatchEndpoint,
+    },
     {
         "name": "video_metadata",
         "path": "/video/metadata",
@@ -23,6 +34,12 @@ endpoints: list[dict] = [
         "summary": "Chat with video (streaming)",
         "endpoint_cls": VideoChatEndpoint,
     },
+    {
+        "name": "video_chat_session_stream",
+        "path": "/video/chat_session_stream",
+        "summary": "Multi-turn chat with video (streaming)",
+        "endpoint_cls": VideoChatSessionEndpoint,
+    },
     {
         "name": "video_status",
         "path": "/video/status",
@@ -35,4 +52,10 @@ endpoints: list[dict] = [
         "summary": "Delete video",
         "endpoint_cls": DeleteVideoEndpoint,
     },
+    {
+        "name": "timeline_cache_stats",
+        "path": "/timeline_cache/stats",
+        "summary": "Get the timeline cache statistics",
+        "endpoint_cls": GetTimelineCacheStatsEndpoint,
+    },
 ]
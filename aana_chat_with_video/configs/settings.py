@@ -1,4 +1,152 @@
+from pydantic import BaseModel
+
 from aana.configs.settings import Settings as AanaSettings
+from aana_chat_with_video.core.models.prompt import PromptLayout
+from aana_chat_with_video.core.models.timeline import TimelineChunking, TimelineFormat
+
+
+class FrameSamplingSettings(BaseModel):
+    """A pydantic model for adaptive frame sampling settings.
+
+    Attributes:
+        enabled (bool): Flag indicating if near-duplicate frames are dropped before captioning.
+        threshold (float): Minimum mean absolute difference (in [0, 1]) between a frame
+            and the last kept frame for the frame to be captioned.
+        max_interval (float): Maximum time in seconds between two captioned frames.
+        thumbnail_size (int): Size of the thumbnails used to compare frames.
+    """
+
+    enabled: bool = False
+    threshold: float = 0.03
+    max_interval: float = 10.0
+    thumbnail_size: int = 32
+
+
+class TimelineSettings(BaseModel):
+    """A pydantic model for the combined timeline settings.
+
+    Attributes:
+        chunking (TimelineChunking): The way the timeline is split into chunks.
+        chunk_size (float): The chunk size of the combined timeline in seconds (fixed chunking).
+        min_chunk_size (float): The minimum chunk size in seconds (adaptive chunking).
+        max_chunk_size (float): The maximum chunk size in seconds (adaptive chunking).
+        max_chunk_characters (int): The number of characters of transcript and captions after
+            which a chunk is closed once it spans `min_chunk_size` (adaptive chunking).
+        collapse_repeated_captions (bool): Flag indicating if runs of (near-)identical
+            consecutive captions are merged into one entry with a time span.
+        caption_similarity_threshold (float): Minimum similarity ratio (in [0, 1]) between
+            two normalized captions to be merged. 1.0 merges exact matches only.
+        format (TimelineFormat): The serialization format of the timeline in LLM prompts.
+            The compact formats (compact_json, lines, template) use fewer prompt tokens.
+    """
+
+    chunking: TimelineChunking = TimelineChunking.FIXED
+    chunk_size: float = 10.0
+    min_chunk_size: float = 5.0
+    max_chunk_size: float = 30.0
+    max_chunk_characters: int = 1000
+    collapse_repeated_captions: bool = False
+    caption_similarity_threshold: float = 1.0
+    format: TimelineFormat = TimelineFormat.JSON
+
+
+class TimelineCacheSettings(BaseModel):
+    """A pydantic model for the rendered timeline cache settings.
+
+    Attributes:
+        enabled (bool): Flag indicating if rendered timelines are cached for chat requests.
+        max_entries (int): Maximum number of cached timelines.
+        max_size (int): Maximum total size of cached timelines in characters.
+            The retrieval indexes of the timelines are cached separately with the
+            same limits.
+    """
+
+    enabled: bool = True
+    max_entries: int = 256
+    max_size: int = 64 * 1024 * 1024
+
+
+class RetrievalSettings(BaseModel):
+    """A pydantic model for relevance-based timeline retrieval settings.
+
+    Attributes:
+        enabled (bool): Flag indicating if only the timeline chunks relevant to the question
+            are sent to the LLM instead of the whole timeline.
+        top_k (int): Maximum number of timeline chunks to send.
+        token_budget (int): Maximum number of (estimated) tokens of the sent chunks.
+        chars_per_token (float): Average number of characters per token used for estimation.
+            Note that the selected chunks depend on the question, so with retrieval enabled
+            only the system prompt is shared between the prompts of different questions.
+            The retrieval indexes of the timelines are cached with the timeline cache
+            settings.
+    """
+
+    enabled: bool = False
+    top_k: int = 30
+    token_budget: int = 8000
+    chars_per_token: float = 4.0
+
+
+class ChatSessionSettings(BaseModel):
+    """A pydantic model for multi-turn chat session settings.
+
+    Attributes:
+        ttl (float): Time in seconds after the last request after which a session expires.
+        max_sessions (int): Maximum number of sessions kept in memory.
+        max_tokens (int): Maximum number of (estimated) tokens of a conversation. The oldest
+            follow-up turns are removed to stay within the limit. Follow-up questions are
+            rejected if the first exchange alone exceeds it. Keep it below the maximum
+            model length minus the maximum number of generated tokens.
+        chars_per_token (float): Average number of characters per token used for estimation.
+    """
+
+    ttl: float = 30 * 60
+    max_sessions: int = 1024
+    max_tokens: int = 40000
+    chars_per_token: float = 4.0
+
+
+class MetadataProbeSettings(BaseModel):
+    """A pydantic model for the settings of fetching the metadata of video URLs.
+
+    Attributes:
+        timeout (float): Maximum time in seconds to wait for the remote host. If it is
+            exceeded, the video length is only checked after the download.
+        cache_ttl (float): Time in seconds the metadata of a URL is cached for.
+        max_cache_entries (int): Maximum number of cached URLs.
+        max_workers (int): Maximum number of metadata requests running at the same time.
+    """
+
+    timeout: float = 10.0
+    cache_ttl: float = 60 * 60
+    max_cache_entries: int = 1024
+    max_workers: int = 4
+
+
+class CaptioningBatchingSettings(BaseModel):
+    """A pydantic model for the settings of batching frames across indexing requests.
+
+    Batching is disabled by default. The captioning deployment runs BLIP-2 on a quarter
+    of a GPU with a batch size of 2, and a larger batch size needs more GPU memory for
+    the activations of the batch on top of the model weights. Before enabling batching,
+    raise `batch_size` of the captioning deployment to `max_batch_size` and check that
+    the deployment still fits into its GPU share. Otherwise the deployment splits the
+    batches into batches of 2 frames and batching across requests gains little.
+
+    The frames of several requests share a batch, so if captioning a batch fails,
+    all the requests with frames in the batch fail.
+
+    Attributes:
+        enabled (bool): Flag indicating if the frames of concurrent indexing requests
+            are sent to the captioning deployment together.
+        max_batch_size (int): Maximum number of frames sent at once. Keep it at the
+            batch size of the captioning deployment.
+        max_wait_time (float): Maximum time in seconds a frame waits for a batch to fill.
+    """
+
+    enabled: bool = False
+    max_batch_size: int = 16
+    max_wait_time: float = 0.05
 
 
 class Settings(AanaSettings):
@@ -7,6 +155,21 @@ class Settings(AanaSettings):
     asr_model_name: str = "whisper_medium"
     captioning_model_name: str = "hf_blip2_opt_2_7b"
     max_video_len: int = 60 * 20  # 20 minutes
+    concurrent_indexing: bool = True  # run ASR and captioning in parallel
+    resume_indexing: bool = True  # resume failed indexing from the saved transcript and captions
+    resume_running_after: float = 60 * 60  # seconds after which a running indexing is assumed dead and resumed
+    content_cache: bool = False  # copy the transcript and captions of identical videos indexed before
+    frame_prefetch_depth: int = 2  # number of frame batches decoded ahead of captioning
+    audio_chunk_duration: float = 5 * 60  # seconds of audio extracted and transcribed at a time
+    audio_prefetch_depth: int = 1  # number of audio chunks extracted ahead of ASR
+    frame_sampling: FrameSamplingSettings = FrameSamplingSettings()
+    timeline: TimelineSettings = TimelineSettings()
+    timeline_cache: TimelineCacheSettings = TimelineCacheSettings()
+    retrieval: RetrievalSettings = RetrievalSettings()
+    chat_session: ChatSessionSettings = ChatSessionSettings()
+    metadata_probe: MetadataProbeSettings = MetadataProbeSettings()
+    captioning_batching: CaptioningBatchingSettings = CaptioningBatchingSettings()
+    prompt_layout: PromptLayout = PromptLayout.TIMELINE_FIRST  # question last for prefix caching
 
 
 settings = Settings()
@@ -0,0 +1,16 @@
+from typing import Annotated
+
+from pydantic import Field
+
+ChatSessionId = Annotated[
+    str,
+    Field(
+        description=(
+            "The ID of the chat session. Leave empty to start a new session "
+            "and use the returned ID for follow-up questions."
+        )
+    ),
+]
+"""
+Chat session ID.
+"""
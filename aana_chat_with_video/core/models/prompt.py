@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class PromptLayout(str, Enum):
+    """Enum for the layout of the chat prompt.
+
+    Attributes:
+        QUESTION_FIRST: the question is asked before the timeline
+        TIMELINE_FIRST: the title and the timeline come first and the question last, so
+            the prompts of all questions about a video share a byte-identical prefix
+            that the LLM engine can reuse (automatic prefix caching)
+    """
+
+    QUESTION_FIRST = "question_first"
+    TIMELINE_FIRST = "timeline_first"
@@ -0,0 +1,31 @@
+from enum import Enum
+
+
+class TimelineFormat(str, Enum):
+    """Enum for the serialization format of the timeline in LLM prompts.
+
+    Attributes:
+        JSON: indented JSON (the most verbose format)
+        COMPACT_JSON: JSON without indentation and whitespace
+        LINES: one line per chunk, e.g. "[0-10] A: transcript V: caption"
+        TEMPLATE: the `timeline` prompt template in `core/prompts`
+    """
+
+    JSON = "json"
+    COMPACT_JSON = "compact_json"
+    LINES = "lines"
+    TEMPLATE = "template"
+
+
+class TimelineChunking(str, Enum):
+    """Enum for the way the combined timeline is split into chunks.
+
+    Attributes:
+        FIXED: chunks of a fixed size; a segment belongs to the chunk it starts in and
+            every chunk up to the last one is included, even if it is empty
+        ADAPTIVE: chunks of a variable size depending on the amount of text; a segment
+            belongs to the chunk it overlaps the most and empty chunks are omitted
+    """
+
+    FIXED = "fixed"
+    ADAPTIVE = "adaptive"
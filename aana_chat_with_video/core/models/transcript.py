@@ -0,0 +1,53 @@
+from typing import NamedTuple
+
+from aana.core.models.asr import AsrSegments
+
+
+class TranscriptSegments(NamedTuple):
+    """ASR segments stored as parallel lists of their texts and time intervals.
+
+    A lightweight alternative to a list of `AsrSegment` for code that only needs the text
+    and the time interval of the segments, e.g. the timeline builders. It skips the
+    pydantic validation of each segment and its words.
+
+    Attributes:
+        texts (list[str]): the texts of the segments
+        starts (list[float]): the start times of the segments in seconds
+        ends (list[float]): the end times of the segments in seconds
+    """
+
+    texts: list[str]
+    starts: list[float]
+    ends: list[float]
+
+    @classmethod
+    def from_asr_segments(cls, segments: AsrSegments) -> "TranscriptSegments":
+        """Create transcript segments from ASR segments.
+
+        Args:
+            segments (AsrSegments): the ASR segments
+
+        Returns:
+            TranscriptSegments: the transcript segments
+        """
+        return cls(
+            texts=[segment.text for segment in segments],
+            starts=[segment.time_interval.start for segment in segments],
+            ends=[segment.time_interval.end for segment in segments],
+        )
+
+    @classmethod
+    def from_dicts(cls, segments: list[dict]) -> "TranscriptSegments":
+        """Create transcript segments from serialized ASR segments, e.g. as stored in the database.
+
+        Args:
+            segments (list[dict]): the ASR segments as dictionaries
+
+        Returns:
+            TranscriptSegments: the transcript segments
+        """
+        return cls(
+            texts=[segment["text"] for segment in segments],
+            starts=[segment["time_interval"]["start"] for segment in segments],
+            ends=[segment["time_interval"]["end"] for segment in segments],
+        )
@@ -0,0 +1,22 @@
+from typing import Any, NamedTuple
+
+from aana.core.models.video import VideoMetadata
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+
+
+class VideoChatContext(NamedTuple):
+    """The data about a video needed to answer a question about it.
+
+    Attributes:
+        status (VideoProcessingStatus): the processing status of the video
+        metadata (VideoMetadata): the metadata of the video
+        version (Any): the version of the video (the content hash of the stored
+            timeline) or None if the timeline hasn't been stored yet
+        timeline (list[dict] | None): the stored combined timeline or None if it
+            wasn't requested or hasn't been stored yet
+    """
+
+    status: VideoProcessingStatus
+    metadata: VideoMetadata
+    version: Any
+    timeline: list[dict] | None
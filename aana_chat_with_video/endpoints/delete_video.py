@@ -2,10 +2,15 @@ from typing import TypedDict
 
 from aana.api.api_generation import Endpoint
 from aana.core.models.media import MediaId
-from aana.storage.session import get_session
 from aana_chat_with_video.storage.repository.extended_video import (
     ExtendedVideoRepository,
 )
+from aana_chat_with_video.storage.session import AsyncRepository
+from aana_chat_with_video.utils.chat_session import chat_session_store
+from aana_chat_with_video.utils.timeline_cache import (
+    timeline_cache,
+    timeline_index_cache,
+)
 
 
 class DeleteVideoOutput(TypedDict):
@@ -19,6 +24,8 @@ class DeleteVideoEndpoint(Endpoint):
 
     async def run(self, media_id: MediaId) -> DeleteVideoOutput:
         """Delete video."""
-        with get_session() as session:
-            ExtendedVideoRepository(session).delete(media_id)
+        await AsyncRepository(ExtendedVideoRepository).delete(media_id)
+        timeline_cache.invalidate(media_id)
+        timeline_index_cache.invalidate(media_id)
+        chat_session_store.invalidate(media_id)
         return DeleteVideoOutput(media_id=media_id)
@@ -0,0 +1,25 @@
+from typing import TypedDict
+
+from aana.api.api_generation import Endpoint
+from aana_chat_with_video.utils.timeline_cache import timeline_cache
+
+
+class TimelineCacheStatsOutput(TypedDict):
+    """The output of the timeline cache stats endpoint."""
+
+    hits: int
+    misses: int
+    entries: int
+    size: int
+
+
+class GetTimelineCacheStatsEndpoint(Endpoint):
+    """Get the statistics of the timeline cache.
+
+    The cache is local to the replica, so the statistics are the ones of the replica
+    that handles the request.
+    """
+
+    async def run(self) -> TimelineCacheStatsOutput:
+        """Get the hits, misses, entries and size of the timeline cache."""
+        return TimelineCacheStatsOutput(**timeline_cache.stats())
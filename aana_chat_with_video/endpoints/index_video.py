@@ -1,8 +1,10 @@
 from collections.abc import AsyncGenerator
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Annotated, TypedDict
 import asyncio
 from aana.storage.session import get_session
 from pydantic import Field
+from sqlalchemy.orm import Session
 
 from aana.api.api_generation import Endpoint
 from aana.core.models.asr import (
@@ -17,12 +19,11 @@ from aana.core.models.whisper import BatchedWhisperParams
 from aana.core.models.image_chat import ImageChatDialog
 
 from aana.deployments.aana_deployment_handle import AanaDeploymentHandle
-from aana.exceptions.db import MediaIdAlreadyExistsException
+from aana.exceptions.db import MediaIdAlreadyExistsException, NotFoundException
 from aana.exceptions.io import VideoTooLongException
 from aana.integrations.external.decord import generate_frames, get_video_duration
-from aana.integrations.external.yt_dlp import download_video, get_video_metadata
+from aana.integrations.external.yt_dlp import download_video
 from aana.processors.remote import run_remote
-from aana.processors.video import extract_audio
 from aana_chat_with_video.configs.settings import settings
 from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
 from aana_chat_with_video.storage.repository.extended_video import (
@@ -31,12 +32,33 @@ from aana_chat_with_video.storage.repository.extended_video import (
 from aana_chat_with_video.storage.repository.extended_video_caption import (
     ExtendedVideoCaptionRepository,
 )
+from aana_chat_with_video.storage.repository.extended_video_timeline import (
+    ExtendedVideoTimelineRepository,
+)
 from aana_chat_with_video.storage.repository.extended_video_transcript import (
     ExtendedVideoTranscriptRepository,
 )
+from aana_chat_with_video.storage.session import AsyncRepository, run_in_session
+from aana_chat_with_video.utils.asr import AsrResultBuilder
+from aana_chat_with_video.utils.asyncio import (
+    merge_async_generators,
+    prefetch_async_generator,
+)
+from aana_chat_with_video.utils.audio import shift_segments, stream_audio
+from aana_chat_with_video.utils.batching import BatchedCaptioningHandle
+from aana_chat_with_video.utils.content_hash import get_content_hash, hash_file
+from aana_chat_with_video.utils.frame_sampling import FrameSampler
+from aana_chat_with_video.utils.timeline import (
+    combine_timeline,
+    get_timeline_params,
+)
+from aana_chat_with_video.utils.timeline_cache import (
+    timeline_cache,
+    timeline_index_cache,
+)
+from aana_chat_with_video.utils.video_metadata import probe_video_metadata
 
 if TYPE_CHECKING:
-    from aana.core.models.audio import Audio
     from aana.core.models.video import Video
 
 
@@ -56,6 +78,17 @@ class IndexVideoOutput(TypedDict):
 
     transcription_id: Annotated[int, Field(..., description="Transcription Id")]
     caption_ids: Annotated[list[int], Field(..., description="Caption Ids")]
+    saved_characters: Annotated[
+        int,
+        Field(
+            ...,
+            description="Number of characters removed from the timeline by collapsing repeated captions",
+        ),
+    ]
+    skipped_frames: Annotated[
+        int,
+        Field(..., description="Number of near-duplicate frames skipped in the batch"),
+    ]
 
 
 class IndexVideoEndpoint(Endpoint):
@@ -69,24 +102,323 @@ class IndexVideoEndpoint(Endpoint):
         self.captioning_handle = await AanaDeploymentHandle.create(
             "captioning_deployment"
         )
+        if settings.captioning_batching.enabled:
+            self.captioning_handle = BatchedCaptioningHandle(
+                self.captioning_handle,
+                max_batch_size=settings.captioning_batching.max_batch_size,
+                max_wait_time=settings.captioning_batching.max_wait_time,
+            )
 
-    async def run(  # noqa: C901
+    async def transcribe_video(
+        self,
+        video_obj: "Video",
+        whisper_params: BatchedWhisperParams,
+        media_id: MediaId,
+        asr_result: AsrResultBuilder,
+        transcription_ids: list[int],
+    ) -> AsyncGenerator[IndexVideoOutput, None]:
+        """Transcribe the audio of the video and yield the partial outputs.
+
+        The audio is extracted in chunks off the event loop and each chunk is
+        transcribed as soon as it is extracted, so the memory held for the audio
+        is bounded by the chunk size.
+
+        The partial results are also accumulated in `asr_result`.
+        The transcript is saved as soon as the transcription is finished,
+        so it survives a failure during captioning.
+        """
+        # TODO: Update once batched whisper PR is merged
+        # vad_output = await self.vad_handle.asr_preprocess_vad(
+        #     audio=audio, params=vad_params
+        # )
+        # vad_segments = vad_output["segments"]
+
+        async for start_time, audio in stream_audio(
+            video_obj,
+            chunk_duration=settings.audio_chunk_duration,
+            prefetch_depth=settings.audio_prefetch_depth,
+        ):
+            async for whisper_output in self.asr_handle.transcribe_stream(
+                audio=audio, params=whisper_params
+            ):
+                segments = shift_segments(whisper_output["segments"], start_time)
+                asr_result.add(
+                    transcription=whisper_output["transcription"],
+                    segments=segments,
+                    transcription_info=whisper_output["transcription_info"],
+                )
+                yield {
+                    "transcription": whisper_output["transcription"],
+                    "segments": segments,
+                    "transcription_info": whisper_output["transcription_info"],
+                }
+
+        transcription_ids.append(
+            await run_in_session(
+                self.save_transcript, media_id=media_id, **asr_result.build()
+            )
+        )
+
+    def save_transcript(
+        self,
+        session: Session,
+        media_id: MediaId,
+        transcription: AsrTranscription,
+        segments: AsrSegments,
+        transcription_info: AsrTranscriptionInfo,
+    ) -> int:
+        """Save the transcript of the video.
+
+        Returns:
+            int: the transcript ID
+        """
+        transcription_entity = ExtendedVideoTranscriptRepository(session).save(
+            model_name=settings.asr_model_name,
+            media_id=media_id,
+            transcription=transcription,
+            segments=segments,
+            transcription_info=transcription_info,
+        )
+        return transcription_entity.id
+
+    async def caption_video(
+        self,
+        video_obj: "Video",
+        video_params: VideoParams,
+        last_captioned_frame_id: int = -1,
+    ) -> AsyncGenerator[IndexVideoOutput, None]:
+        """Caption the frames of the video and yield the partial outputs.
+
+        The captions of each batch are saved as soon as they are generated and
+        are not kept in memory. Frames up to `last_captioned_frame_id` (captioned
+        before a failure) are not captioned again.
+        If frame sampling is enabled, near-duplicate frames are not captioned
+        and the number of skipped frames is reported in the partial outputs.
+        """
+        frame_sampler = None
+        if settings.frame_sampling.enabled:
+            frame_sampler = FrameSampler(
+                threshold=settings.frame_sampling.threshold,
+                max_interval=settings.frame_sampling.max_interval,
+                thumbnail_size=settings.frame_sampling.thumbnail_size,
+            )
+
+        # decode the next batches while the current one is being captioned
+        async for frames_dict in prefetch_async_generator(
+            run_remote(generate_frames)(video=video_obj, params=video_params),
+            depth=settings.frame_prefetch_depth,
+        ):
+            if len(frames_dict["frames"]) == 0:
+                break
+
+            batch_frames = frames_dict["frames"]
+            batch_timestamps = frames_dict["timestamps"]
+            batch_frame_ids = frames_dict["frame_ids"]
+            skipped_frames = 0
+            if frame_sampler is not None:
+                selected = frame_sampler.select(batch_frames, batch_timestamps)
+                skipped_frames = len(batch_frames) - len(selected)
+                batch_frames = [batch_frames[i] for i in selected]
+                batch_timestamps = [batch_timestamps[i] for i in selected]
+                batch_frame_ids = [batch_frame_ids[i] for i in selected]
+                if len(batch_frames) == 0:
+                    yield {"skipped_frames": skipped_frames}
+                    continue
+
+            if batch_frame_ids[0] <= last_captioned_frame_id:
+                # resuming: the sampler still sees all frames to make the same choices
+                remaining = [
+                    i
+                    for i, frame_id in enumerate(batch_frame_ids)
+                    if frame_id > last_captioned_frame_id
+                ]
+                if len(remaining) == 0:
+                    continue
+                batch_frames = [batch_frames[i] for i in remaining]
+                batch_timestamps = [batch_timestamps[i] for i in remaining]
+                batch_frame_ids = [batch_frame_ids[i] for i in remaining]
+
+            captioning_output = await self.captioning_handle.generate_batch(
+                images=batch_frames
+            )
+            await AsyncRepository(ExtendedVideoCaptionRepository).save_batch(
+                model_name=settings.captioning_model_name,
+                media_id=video_obj.media_id,
+                captions=captioning_output["captions"],
+                timestamps=batch_timestamps,
+                frame_ids=batch_frame_ids,
+            )
+
+            output = {
+                "captions": captioning_output["captions"],
+                "timestamps": batch_timestamps,
+            }
+            if frame_sampler is not None:
+                output["skipped_frames"] = skipped_frames
+            yield output
+
+    def check_video(
+        self, session: Session, video: VideoInput
+    ) -> VideoProcessingStatus | None:
+        """Check that the video can be indexed and claim it.
+
+        Queued videos are indexed the first time and failed videos are resumed.
+        Running videos are only resumed once their status hasn't been updated for
+        `settings.resume_running_after` seconds, the indexing is assumed to have died
+        without marking the video as failed. Created and recently running videos are
+        being indexed by another request and are rejected.
+
+        A queued or resumed video is claimed by changing its status to CREATED only if
+        the status is still the one that was checked, so only one request indexes it.
+
+        Returns:
+            VideoProcessingStatus | None: the status of the video if it is queued or
+                its indexing is resumed, None if the video is new
+
+        Raises:
+            MediaIdAlreadyExistsException: if the video exists and can't be indexed or
+                another request claimed it first
+        """
+        video_repo = ExtendedVideoRepository(session)
+        if not video_repo.check_media_exists(video.media_id):
+            return None
+        entity = video_repo.read(video.media_id)
+        status = entity.status
+        # videos queued by the batch endpoint are indexed the first time
+        if status != VideoProcessingStatus.QUEUED:
+            if not settings.resume_indexing or status not in (
+                VideoProcessingStatus.FAILED,
+                VideoProcessingStatus.RUNNING,
+            ):
+                raise MediaIdAlreadyExistsException(table_name="media", media_id=video)
+            if status == VideoProcessingStatus.RUNNING:
+                updated_at = entity.updated_at
+                # SQLite doesn't store the time zone, the timestamps are in UTC
+                if updated_at.tzinfo is None:
+                    updated_at = updated_at.replace(tzinfo=timezone.utc)
+                running_time = datetime.now(timezone.utc) - updated_at
+                if running_time.total_seconds() <= settings.resume_running_after:
+                    raise MediaIdAlreadyExistsException(
+                        table_name="media", media_id=video
+                    )
+        # claim the video, so other requests see it as in progress
+        if not video_repo.claim(video.media_id, status):
+            raise MediaIdAlreadyExistsException(table_name="media", media_id=video)
+        return status
+
+    def load_checkpoint(
+        self, session: Session, media_id: MediaId
+    ) -> tuple[dict | None, dict]:
+        """Load the transcript and the captions saved before the indexing failed.
+
+        Returns:
+            tuple[dict | None, dict]: the transcript (None if the transcription didn't
+                finish) and the captions
+        """
+        try:
+            stored_transcript = ExtendedVideoTranscriptRepository(
+                session
+            ).get_transcript(model_name=settings.asr_model_name, media_id=media_id)
+        except NotFoundException:
+            stored_transcript = None
+        stored_captions = ExtendedVideoCaptionRepository(session).get_captions(
+            model_name=settings.captioning_model_name, media_id=media_id
+        )
+        return stored_transcript, stored_captions
+
+    def copy_outputs(
+        self, session: Session, source_media_id: MediaId, media_id: MediaId
+    ) -> tuple[dict, dict]:
+        """Copy the transcript and the captions of an identical video indexed before.
+
+        Returns:
+            tuple[dict, dict]: the copied transcript and captions
+        """
+        ExtendedVideoTranscriptRepository(session).copy(
+            model_name=settings.asr_model_name,
+            source_media_id=source_media_id,
+            media_id=media_id,
+        )
+        ExtendedVideoCaptionRepository(session).copy(
+            model_name=settings.captioning_model_name,
+            source_media_id=source_media_id,
+            media_id=media_id,
+        )
+        return self.load_checkpoint(session, media_id)
+
+    def save_timeline(
+        self, session: Session, media_id: MediaId, segments: AsrSegments
+    ) -> dict:
+        """Build the combined timeline of the video from all its captions and save it.
+
+        Returns:
+            dict: a dictionary with the keys:
+                "caption_ids": the caption IDs of the video
+                "saved_characters": the number of characters removed from the timeline
+                    by collapsing repeated captions
+        """
+        captions_output = ExtendedVideoCaptionRepository(session).get_captions(
+            model_name=settings.captioning_model_name, media_id=media_id
+        )
+        timeline_output = combine_timeline(
+            segments=segments,
+            captions=captions_output["captions"],
+            caption_timestamps=captions_output["timestamps"],
+        )
+        ExtendedVideoTimelineRepository(session).save(
+            **get_timeline_params(media_id), timeline=timeline_output["timeline"]
+        )
+        return {
+            "caption_ids": captions_output["caption_ids"],
+            "saved_characters": timeline_output["saved_characters"],
+        }
+
+    async def prepare_video(
         self,
         video: VideoInput,
         video_params: VideoParams,
         whisper_params: BatchedWhisperParams,
-        vad_params: VadParams,
-    ) -> AsyncGenerator[IndexVideoOutput, None]:
-        """Transcribe video in chunks."""
+        status: VideoProcessingStatus | None,
+    ) -> tuple["Video | None", VideoMetadata, MediaId | None]:
+        """Download the video, check its length and save it.
+
+        If the content cache is enabled and an identical video was indexed before,
+        a URL is not downloaded again and the video is copied instead.
+
+        Returns:
+            tuple[Video | None, VideoMetadata, MediaId | None]: the downloaded video
+                (None if it is copied), its metadata and the media ID of the identical
+                video (None if there is none)
+        """
         media_id = video.media_id
-        with get_session() as session:
-            if ExtendedVideoRepository(session).check_media_exists(media_id):
-                raise MediaIdAlreadyExistsException(table_name="media", media_id=video)
-        
+        use_content_cache = settings.content_cache and status in (
+            None,
+            VideoProcessingStatus.QUEUED,
+        )
+
+        content_hash = None
+        source_media_id = None
+        if use_content_cache and video.url is not None:
+            # an already indexed URL is found without downloading the video
+            content_hash = get_content_hash(
+                f"url:{video.url}", video_params, whisper_params
+            )
+            source_media_id = await AsyncRepository(
+                ExtendedVideoRepository
+            ).get_media_id_by_content_hash(content_hash)
+        if source_media_id is not None:
+            video_metadata = await AsyncRepository(ExtendedVideoRepository).copy(
+                source_media_id, media_id
+            )
+            return None, video_metadata, source_media_id
+
         video_duration = None
         if video.url is not None:
-            video_metadata = get_video_metadata(video.url)
-            video_duration = video_metadata.duration
+            video_metadata = await probe_video_metadata(
+                video.url, timeout=settings.metadata_probe.timeout
+            )
+            if video_metadata is not None:
+                video_duration = video_metadata.duration
 
         # precheck for max video length before actually download the video if possible
         if video_duration and video_duration > settings.max_video_len:
@@ -107,100 +439,149 @@ class IndexVideoEndpoint(Endpoint):
                 max_len=settings.max_video_len,
             )
 
-        with get_session() as session:
-            ExtendedVideoRepository(session).save(video=video_obj, duration=video_duration)
+        if use_content_cache and content_hash is None:
+            # files are identified by their content
+            file_hash = await run_remote(hash_file)(path=video_obj.path)
+            content_hash = get_content_hash(
+                f"sha256:{file_hash}", video_params, whisper_params
+            )
+            source_media_id = await AsyncRepository(
+                ExtendedVideoRepository
+            ).get_media_id_by_content_hash(content_hash)
 
-        yield {
-            "media_id": media_id,
-            "metadata": VideoMetadata(
-                title=video_obj.title,
-                description=video_obj.description,
-                duration=video_duration,
-            ),
-        }
+        if status is None:
+            await AsyncRepository(ExtendedVideoRepository).save(
+                video=video_obj, duration=video_duration, content_hash=content_hash
+            )
+        else:
+            await AsyncRepository(ExtendedVideoRepository).update(
+                video=video_obj, duration=video_duration, content_hash=content_hash
+            )
+        video_metadata = VideoMetadata(
+            title=video_obj.title,
+            description=video_obj.description,
+            duration=video_duration,
+        )
+        return video_obj, video_metadata, source_media_id
 
-        try:
-            with get_session() as session:
-                ExtendedVideoRepository(session).update_status(
-                    media_id, VideoProcessingStatus.RUNNING
-                )
-            audio: Audio = extract_audio(video=video_obj)
+    async def run(  # noqa: C901
+        self,
+        video: VideoInput,
+        video_params: VideoParams,
+        whisper_params: BatchedWhisperParams,
+        vad_params: VadParams,
+    ) -> AsyncGenerator[IndexVideoOutput, None]:
+        """Transcribe video in chunks."""
+        media_id = video.media_id
+        status = await run_in_session(self.check_video, video)
+        resume = status not in (None, VideoProcessingStatus.QUEUED)
 
-            # TODO: Update once batched whisper PR is merged
-            # vad_output = await self.vad_handle.asr_preprocess_vad(
-            #     audio=audio, params=vad_params
-            # )
-            # vad_segments = vad_output["segments"]
+        try:
+            video_obj, video_metadata, source_media_id = await self.prepare_video(
+                video=video,
+                video_params=video_params,
+                whisper_params=whisper_params,
+                status=status,
+            )
+        except BaseException:
+            if status is not None:
+                # the video is saved already, so the failure is shown in its status
+                with get_session() as session:
+                    ExtendedVideoRepository(session).update_status(
+                        media_id, VideoProcessingStatus.FAILED
+                    )
+            raise
+        timeline_cache.invalidate(media_id)
+        timeline_index_cache.invalidate(media_id)
 
-            transcription_list = []
-            segments_list = []
-            transcription_info_list = []
-            async for whisper_output in self.asr_handle.transcribe_stream(
-                audio=audio, params=whisper_params
-            ):
-                transcription_list.append(whisper_output["transcription"])
-                segments_list.append(whisper_output["segments"])
-                transcription_info_list.append(whisper_output["transcription_info"])
-                yield {
-                    "transcription": whisper_output["transcription"],
-                    "segments": whisper_output["segments"],
-                    "transcription_info": whisper_output["transcription_info"],
-                }
-            transcription = sum(transcription_list, AsrTranscription())
-            segments = sum(segments_list, AsrSegments())
-            transcription_info = sum(transcription_info_list, AsrTranscriptionInfo())
+        yield {"media_id": media_id, "metadata": video_metadata}
 
-            captions = []
-            timestamps = []
-            frame_ids = []
+        try:
+            await AsyncRepository(ExtendedVideoRepository).update_status(
+                media_id, VideoProcessingStatus.RUNNING
+            )
 
-            async for frames_dict in run_remote(generate_frames)(
-                video=video_obj, params=video_params
-            ):
-                if len(frames_dict["frames"]) == 0:
-                    break
+            asr_result = AsrResultBuilder()
+            transcription_ids = []
 
-                timestamps.extend(frames_dict["timestamps"])
-                frame_ids.extend(frames_dict["frame_ids"])
-                captioning_output = await self.captioning_handle.generate_batch(
-                    images=frames_dict["frames"]
+            stored_transcript = None
+            stored_captions = None
+            last_captioned_frame_id = -1
+            if source_media_id is not None:
+                # an identical video was indexed before, nothing has to be processed
+                stored_transcript, stored_captions = await run_in_session(
+                    self.copy_outputs, source_media_id, media_id
+                )
+            elif resume:
+                stored_transcript, stored_captions = await run_in_session(
+                    self.load_checkpoint, media_id
                 )
-                captions.extend(captioning_output["captions"])
+            if stored_captions is not None and len(stored_captions["captions"]) > 0:
+                last_captioned_frame_id = max(stored_captions["frame_ids"])
 
+            streams = []
+            if stored_transcript is None:
+                streams.append(
+                    self.transcribe_video(
+                        video_obj=video_obj,
+                        whisper_params=whisper_params,
+                        media_id=media_id,
+                        asr_result=asr_result,
+                        transcription_ids=transcription_ids,
+                    )
+                )
+            else:
+                # the transcription was copied or finished before a failure
+                asr_result.add(
+                    transcription=stored_transcript["transcription"],
+                    segments=stored_transcript["segments"],
+                    transcription_info=stored_transcript["transcription_info"],
+                )
+                transcription_ids.append(stored_transcript["transcription_id"])
                 yield {
-                    "captions": captioning_output["captions"],
-                    "timestamps": frames_dict["timestamps"],
+                    "transcription": stored_transcript["transcription"],
+                    "segments": stored_transcript["segments"],
+                    "transcription_info": stored_transcript["transcription_info"],
                 }
-
-            with get_session() as session:
-                transcription_entity = ExtendedVideoTranscriptRepository(session).save(
-                    model_name=settings.asr_model_name,
-                    media_id=video_obj.media_id,
-                    transcription=transcription,
-                    segments=segments,
-                    transcription_info=transcription_info,
+            if last_captioned_frame_id >= 0:
+                yield {
+                    "captions": stored_captions["captions"],
+                    "timestamps": stored_captions["timestamps"],
+                }
+            if source_media_id is None:
+                streams.append(
+                    self.caption_video(
+                        video_obj=video_obj,
+                        video_params=video_params,
+                        last_captioned_frame_id=last_captioned_frame_id,
+                    )
                 )
 
-                caption_entities = ExtendedVideoCaptionRepository(session).save_all(
-                    model_name=settings.captioning_model_name,
-                    media_id=video_obj.media_id,
-                    captions=captions,
-                    timestamps=timestamps,
-                    frame_ids=frame_ids,
-                )
+            if settings.concurrent_indexing:
+                async for output in merge_async_generators(*streams):
+                    yield output
+            else:
+                for stream in streams:
+                    async for output in stream:
+                        yield output
 
-                yield {
-                    "transcription_id": transcription_entity.id,
-                    "caption_ids": [c.id for c in caption_entities],
-                }
+            timeline_output = await run_in_session(
+                self.save_timeline, media_id, asr_result.segments
+            )
+
+            yield {
+                "transcription_id": transcription_ids[0],
+                "caption_ids": timeline_output["caption_ids"],
+                "saved_characters": timeline_output["saved_characters"],
+            }
         except BaseException:
+            # not offloaded, the generator may be closing and must not be suspended
             with get_session() as session:
                 ExtendedVideoRepository(session).update_status(
                     media_id, VideoProcessingStatus.FAILED
                 )
             raise
         else:
-            with get_session() as session:
-                ExtendedVideoRepository(session).update_status(
-                    media_id, VideoProcessingStatus.COMPLETED
-                )
+            await AsyncRepository(ExtendedVideoRepository).update_status(
+                media_id, VideoProcessingStatus.COMPLETED
+            )
@@ -0,0 +1,105 @@
+from typing import Annotated, TypedDict
+
+from pydantic import Field
+from sqlalchemy.orm import Session
+
+from aana.api.api_generation import Endpoint
+from aana.core.models.media import MediaId
+from aana.core.models.vad import VadParams
+from aana.core.models.video import VideoInput, VideoInputList, VideoParams
+from aana.core.models.whisper import BatchedWhisperParams
+from aana.exceptions.db import MediaIdAlreadyExistsException
+from aana.storage.models.task import TaskEntity
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.storage.repository.extended_video import (
+    ExtendedVideoRepository,
+)
+from aana_chat_with_video.storage.session import run_in_session
+
+# the path of IndexVideoEndpoint, the tasks run it like a deferred request
+INDEX_VIDEO_PATH = "/video/index_stream"
+
+
+class IndexVideoBatchOutput(TypedDict):
+    """The output of the batch index video endpoint."""
+
+    media_ids: Annotated[
+        list[MediaId], Field(..., description="Media IDs of the queued videos")
+    ]
+    task_ids: Annotated[
+        list[str], Field(..., description="IDs of the indexing tasks of the videos")
+    ]
+
+
+class IndexVideoBatchEndpoint(Endpoint):
+    """Index videos in the background endpoint."""
+
+    def queue_videos(
+        self,
+        session: Session,
+        videos: list[VideoInput],
+        video_params: VideoParams,
+        whisper_params: BatchedWhisperParams,
+        vad_params: VadParams,
+    ) -> list[str]:
+        """Save the videos as queued and add an indexing task for each of them.
+
+        Returns:
+            list[str]: the task IDs in the order of the videos
+
+        Raises:
+            MediaIdAlreadyExistsException: if a media ID exists or is used twice
+        """
+        video_repo = ExtendedVideoRepository(session)
+        media_ids = set()
+        for video in videos:
+            if video.media_id in media_ids or video_repo.check_media_exists(
+                video.media_id
+            ):
+                raise MediaIdAlreadyExistsException(table_name="media", media_id=video)
+            media_ids.add(video.media_id)
+
+        tasks = [
+            TaskEntity(
+                endpoint=INDEX_VIDEO_PATH,
+                data={
+                    "video": video,
+                    "video_params": video_params,
+                    "whisper_params": whisper_params,
+                    "vad_params": vad_params,
+                },
+            )
+            for video in videos
+        ]
+        video_repo.save_queued(videos, tasks)
+        return [str(task.id) for task in tasks]
+
+    async def run(
+        self,
+        videos: VideoInputList,
+        video_params: VideoParams,
+        whisper_params: BatchedWhisperParams,
+        vad_params: VadParams,
+    ) -> IndexVideoBatchOutput:
+        """Queue videos for indexing.
+
+        Each video is indexed by a task of the task queue, which runs up to
+        `TASK_QUEUE__NUM_WORKERS` videos at a time. The downloads, ASR and captioning
+        of different videos overlap, so the deployments get requests from several
+        videos at once. The progress of a video is shown by `/video/status`:
+        queued, created, running and then completed or failed.
+        """
+        if not settings.task_queue.enabled:
+            raise RuntimeError("Task queue is not enabled.")  # noqa: TRY003
+
+        videos = list(videos)
+        task_ids = await run_in_session(
+            self.queue_videos,
+            videos=videos,
+            video_params=video_params,
+            whisper_params=whisper_params,
+            vad_params=vad_params,
+        )
+        return IndexVideoBatchOutput(
+            media_ids=[video.media_id for video in videos], task_ids=task_ids
+        )
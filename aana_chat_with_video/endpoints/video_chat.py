@@ -1,28 +1,59 @@
-import json
 from collections.abc import AsyncGenerator
-from typing import Annotated, TypedDict
+from typing import Annotated, Any, TypedDict
 
-from aana.storage.session import get_session
 from pydantic import Field
+from sqlalchemy.orm import Session
 
 from aana.api.api_generation import Endpoint
 from aana.core.models.chat import Question
 from aana.core.models.media import MediaId
 from aana.core.models.sampling import SamplingParams
 from aana.deployments.aana_deployment_handle import AanaDeploymentHandle
+from aana.exceptions.db import NotFoundException
 from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.core.models.video_chat import VideoChatContext
 from aana_chat_with_video.exceptions.core import UnfinishedVideoException
 from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.storage.models.extended_video_timeline import (
+    ExtendedVideoTimelineEntity,
+)
 from aana_chat_with_video.storage.repository.extended_video import (
     ExtendedVideoRepository,
 )
-from aana_chat_with_video.storage.repository.extended_video_caption import (
-    ExtendedVideoCaptionRepository,
+from aana_chat_with_video.storage.repository.extended_video_timeline import (
+    ExtendedVideoTimelineRepository,
+)
+from aana_chat_with_video.storage.session import run_in_session
+from aana_chat_with_video.utils.core import generate_dialog
+from aana_chat_with_video.utils.retrieval import TimelineIndex
+from aana_chat_with_video.utils.timeline import (
+    build_timeline,
+    get_timeline_params,
+    render_timeline,
 )
-from aana_chat_with_video.storage.repository.extended_video_transcript import (
-    ExtendedVideoTranscriptRepository,
+from aana_chat_with_video.utils.timeline_cache import (
+    TimelineCacheKey,
+    timeline_cache,
+    timeline_index_cache,
 )
-from aana_chat_with_video.utils.core import generate_combined_timeline, generate_dialog
+
+
+def get_timeline_cache_key(media_id: MediaId) -> TimelineCacheKey:
+    """Get the cache key of the timeline of a video for the current settings.
+
+    Args:
+        media_id (MediaId): the media ID of the video
+
+    Returns:
+        TimelineCacheKey: the cache key
+    """
+    return TimelineCacheKey(
+        media_id=media_id,
+        asr_model_name=settings.asr_model_name,
+        captioning_model_name=settings.captioning_model_name,
+        chunk_size=settings.timeline.chunk_size,
+        chunking=settings.timeline.chunking,
+    )
 
 
 class VideoChatEndpointOutput(TypedDict):
@@ -40,47 +71,180 @@ class VideoChatEndpoint(Endpoint):
         self.llm_handle = await AanaDeploymentHandle.create("llm_deployment")
         
 
-    async def run(
-        self, media_id: MediaId, question: Question, sampling_params: SamplingParams
-    ) -> AsyncGenerator[VideoChatEndpointOutput, None]:
-        """Run the video chat endpoint."""
-        with get_session() as session:
-            transcript_repo = ExtendedVideoTranscriptRepository(session)
-            caption_repo = ExtendedVideoCaptionRepository(session)
-            video_repo = ExtendedVideoRepository(session)
-
-            # check to see if video already processed
-            video_status = video_repo.get_status(media_id)
-            if video_status != VideoProcessingStatus.COMPLETED:
-                raise UnfinishedVideoException(
-                    media_id=media_id,
-                    status=video_status,
-                    message=f"The video data is not available, status: {video_status}",
-                )
+    def load_context(
+        self, session: Session, media_id: MediaId, include_timeline: bool = True
+    ) -> VideoChatContext:
+        """Load the status, metadata, version and timeline of an indexed video.
 
-            video_metadata = video_repo.get_metadata(media_id)
+        The video row and the stored timeline are fetched in a single query. Videos
+        indexed before timelines were persisted don't have one, so it is built and saved.
 
-            transcription_output = transcript_repo.get_transcript(
-                model_name=settings.asr_model_name, media_id=media_id
+        Args:
+            session (Session): the database session
+            media_id (MediaId): the media ID of the video
+            include_timeline (bool): whether to load the timeline. Defaults to True.
+
+        Returns:
+            VideoChatContext: the chat context of the video
+
+        Raises:
+            UnfinishedVideoException: if the video is not indexed yet
+        """
+        context = ExtendedVideoRepository(session).get_chat_context(
+            **get_timeline_params(media_id), include_timeline=include_timeline
+        )
+
+        # check to see if video already processed
+        if context.status != VideoProcessingStatus.COMPLETED:
+            raise UnfinishedVideoException(
+                media_id=media_id,
+                status=context.status,
+                message=f"The video data is not available, status: {context.status}",
+            )
+
+        if include_timeline and context.timeline is None:
+            entity = self.save_timeline(session, media_id)
+            context = context._replace(
+                timeline=entity.timeline, version=entity.timeline_hash
             )
+        return context
+
+    def load_timeline(self, session: Session, media_id: MediaId) -> list[dict]:
+        """Load the precomputed timeline of a video.
+
+        Videos indexed before timelines were persisted don't have one,
+        so it is built from the transcript and captions and saved for the next requests.
 
-            captions_output = caption_repo.get_captions(
-                model_name=settings.captioning_model_name, media_id=media_id
+        Args:
+            session (Session): the database session
+            media_id (MediaId): the media ID of the video
+
+        Returns:
+            list[dict]: the combined timeline
+        """
+        try:
+            return ExtendedVideoTimelineRepository(session).get_timeline(
+                **get_timeline_params(media_id)
             )
+        except NotFoundException:
+            return self.save_timeline(session, media_id).timeline
+
+    def save_timeline(
+        self, session: Session, media_id: MediaId
+    ) -> ExtendedVideoTimelineEntity:
+        """Build the timeline of a video from the transcript and captions and save it.
 
-        timeline_output = generate_combined_timeline(
-            transcription_segments=transcription_output["segments"],
-            captions=captions_output["captions"],
-            caption_timestamps=captions_output["timestamps"],
+        Args:
+            session (Session): the database session
+            media_id (MediaId): the media ID of the video
+
+        Returns:
+            ExtendedVideoTimelineEntity: the saved timeline
+        """
+        timeline = build_timeline(session, media_id)
+        return ExtendedVideoTimelineRepository(session).save(
+            **get_timeline_params(media_id), timeline=timeline
         )
-        timeline_json = json.dumps(
-            timeline_output["timeline"], indent=4, separators=(",", ": ")
+
+    async def get_rendered_timeline(
+        self,
+        media_id: MediaId,
+        version: Any,
+        timeline: list[dict] | None = None,
+    ) -> str:
+        """Get the rendered timeline of a video from the cache or the database.
+
+        Args:
+            media_id (MediaId): the media ID of the video
+            version (Any): the content hash of the stored timeline used to validate
+                cached timelines
+            timeline (list[dict] | None): the timeline if it is already loaded
+
+        Returns:
+            str: the rendered timeline
+        """
+        cache_key = get_timeline_cache_key(media_id)
+        timeline_json = None
+        if settings.timeline_cache.enabled:
+            timeline_json = timeline_cache.get(cache_key, version=version)
+
+        if timeline_json is None:
+            if timeline is None:
+                timeline = await run_in_session(self.load_timeline, media_id)
+            timeline_json = render_timeline(timeline, settings.timeline.format)
+            if settings.timeline_cache.enabled:
+                timeline_cache.put(cache_key, timeline_json, version=version)
+        return timeline_json
+
+    async def get_timeline_index(
+        self,
+        media_id: MediaId,
+        version: Any,
+        timeline: list[dict] | None = None,
+    ) -> TimelineIndex:
+        """Get the retrieval index of a video timeline from the cache or build it.
+
+        Args:
+            media_id (MediaId): the media ID of the video
+            version (Any): the content hash of the stored timeline used to validate
+                cached indexes
+            timeline (list[dict] | None): the timeline if it is already loaded
+
+        Returns:
+            TimelineIndex: the retrieval index of the timeline
+        """
+        cache_key = get_timeline_cache_key(media_id)
+        index = None
+        if settings.timeline_cache.enabled:
+            index = timeline_index_cache.get(cache_key, version=version)
+
+        if index is None:
+            if timeline is None:
+                timeline = await run_in_session(self.load_timeline, media_id)
+            index = TimelineIndex(
+                timeline,
+                chars_per_token=settings.retrieval.chars_per_token,
+                timeline_format=settings.timeline.format,
+            )
+            if settings.timeline_cache.enabled:
+                timeline_index_cache.put(
+                    cache_key, index, version=version, size=index.size
+                )
+        return index
+
+    async def run(
+        self, media_id: MediaId, question: Question, sampling_params: SamplingParams
+    ) -> AsyncGenerator[VideoChatEndpointOutput, None]:
+        """Run the video chat endpoint."""
+        # the timeline is only loaded if it can't come from the cache
+        context = await run_in_session(
+            self.load_context,
+            media_id,
+            include_timeline=not settings.timeline_cache.enabled,
         )
 
+        if settings.retrieval.enabled:
+            # only send the chunks relevant to the question
+            index = await self.get_timeline_index(
+                media_id, version=context.version, timeline=context.timeline
+            )
+            timeline = index.select(
+                question,
+                top_k=settings.retrieval.top_k,
+                token_budget=settings.retrieval.token_budget,
+            )
+            timeline_json = render_timeline(timeline, settings.timeline.format)
+        else:
+            timeline_json = await self.get_rendered_timeline(
+                media_id, version=context.version, timeline=context.timeline
+            )
+
         dialog = generate_dialog(
-            metadata=video_metadata,
+            metadata=context.metadata,
             timeline=timeline_json,
             question=question,
+            timeline_format=settings.timeline.format,
+            prompt_layout=settings.prompt_layout,
         )
         async for item in self.llm_handle.chat_stream(
             dialog=dialog, sampling_params=sampling_params
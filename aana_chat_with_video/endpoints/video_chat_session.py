@@ -0,0 +1,131 @@
+import uuid
+from collections.abc import AsyncGenerator
+from typing import Annotated, TypedDict
+
+from pydantic import Field
+
+from aana.core.models.chat import Question
+from aana.core.models.media import MediaId
+from aana.core.models.sampling import SamplingParams
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.core.models.chat_session import ChatSessionId
+from aana_chat_with_video.core.models.prompt import PromptLayout
+from aana_chat_with_video.endpoints.video_chat import VideoChatEndpoint
+from aana_chat_with_video.exceptions.core import ChatSessionNotFoundException
+from aana_chat_with_video.storage.session import run_in_session
+from aana_chat_with_video.utils.chat_session import chat_session_store
+from aana_chat_with_video.utils.core import generate_dialog
+from aana_chat_with_video.utils.retrieval import estimate_tokens
+
+
+class VideoChatSessionEndpointOutput(TypedDict):
+    """Video chat session endpoint output."""
+
+    session_id: ChatSessionId
+    completion: Annotated[str, Field(description="Generated text.")]
+
+
+class VideoChatSessionEndpoint(VideoChatEndpoint):
+    """Multi-turn video chat endpoint.
+
+    The conversation is kept on the server. The first question of a session is asked
+    with the timeline-first prompt; follow-up questions are appended to the
+    conversation, so the timeline is not rebuilt and the prompt prefix is reused.
+
+    Sessions are kept in the memory of the replica that started them. A follow-up
+    question with a session ID that the replica doesn't know (the session expired,
+    was evicted or was started on another replica) is rejected.
+    """
+
+    async def run(
+        self,
+        media_id: MediaId,
+        question: Question,
+        sampling_params: SamplingParams,
+        session_id: ChatSessionId = "",
+    ) -> AsyncGenerator[VideoChatSessionEndpointOutput, None]:
+        """Run the video chat session endpoint.
+
+        A new session is started if `session_id` is empty, the session belongs to
+        another video or the video was re-indexed since the session started.
+
+        Raises:
+            ChatSessionNotFoundException: if the session doesn't exist on this replica
+        """
+        chat_session = None
+        if session_id:
+            chat_session = chat_session_store.get(session_id)
+            if chat_session is None:
+                raise ChatSessionNotFoundException(session_id=session_id)
+        # the timeline is only loaded if a new session may be needed
+        # and it can't come from the cache
+        context = await run_in_session(
+            self.load_context,
+            media_id,
+            include_timeline=chat_session is None
+            and not settings.timeline_cache.enabled,
+        )
+        if chat_session is not None and (
+            chat_session.media_id != media_id or chat_session.version != context.version
+        ):
+            chat_session = None
+        if chat_session is None:
+            timeline_json = await self.get_rendered_timeline(
+                media_id, version=context.version, timeline=context.timeline
+            )
+
+        if chat_session is None:
+            dialog = generate_dialog(
+                metadata=context.metadata,
+                timeline=timeline_json,
+                question=question,
+                timeline_format=settings.timeline.format,
+                prompt_layout=PromptLayout.TIMELINE_FIRST,
+            )
+            # the session is stored before its ID is returned, follow-up questions
+            # wait for the lock until the first answer is added
+            chat_session = chat_session_store.create(
+                session_id=str(uuid.uuid4()),
+                media_id=media_id,
+                version=context.version,
+                messages=list(dialog.messages),
+            )
+            async with chat_session.lock:
+                answer = ""
+                try:
+                    async for item in self.llm_handle.chat_stream(
+                        dialog=dialog, sampling_params=sampling_params
+                    ):
+                        answer += item["text"]
+                        yield {
+                            "session_id": chat_session.session_id,
+                            "completion": item["text"],
+                        }
+                except BaseException:
+                    chat_session_store.delete(chat_session.session_id)
+                    raise
+                chat_session.add_answer(answer)
+            return
+
+        async with chat_session.lock:
+            # the first question of the session may have failed while waiting
+            if chat_session_store.get(session_id) is None:
+                raise ChatSessionNotFoundException(session_id=session_id)
+            chat_session.trim(
+                max_tokens=settings.chat_session.max_tokens,
+                reserved_tokens=estimate_tokens(
+                    question, settings.chat_session.chars_per_token
+                ),
+                chars_per_token=settings.chat_session.chars_per_token,
+            )
+            answer = ""
+            async for item in self.llm_handle.chat_stream(
+                dialog=chat_session.get_dialog(question),
+                sampling_params=sampling_params,
+            ):
+                answer += item["text"]
+                yield {
+                    "session_id": chat_session.session_id,
+                    "completion": item["text"],
+                }
+            chat_session.add_turn(question, answer)
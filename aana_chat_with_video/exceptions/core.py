@@ -1,4 +1,5 @@
 from aana.core.models.media import MediaId
+from aana.exceptions.core import BaseException as AanaBaseException
 from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
 
 
@@ -29,3 +30,82 @@ class UnfinishedVideoException(BaseException):
     def __reduce__(self):
         """Used for pickling."""
         return (self.__class__, (self.media_id, self.status, self.message))
+
+
+class ChatSessionNotFoundException(AanaBaseException):
+    """Exception raised when a chat session doesn't exist.
+
+    Attributes:
+        session_id (str): The id of the chat session.
+        message (str): The error message.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        message: str = "The chat session has expired or was started on another "
+        "replica, start a new session without a session_id",
+    ):
+        """Constructor.
+
+        Args:
+            session_id (str): The id of the chat session.
+            message (str): The error message.
+        """
+        super().__init__(session_id=session_id, message=message)
+        self.session_id = session_id
+        self.message = message
+
+    def __reduce__(self):
+        """Used for pickling."""
+        return (self.__class__, (self.session_id, self.message))
+
+
+class ChatSessionTooLongException(AanaBaseException):
+    """Exception raised when a chat session doesn't fit the token limit.
+
+    The first exchange of a session is never trimmed, so a follow-up question is
+    rejected if the first exchange and the question alone exceed the limit.
+
+    Attributes:
+        session_id (str): The id of the chat session.
+        num_tokens (int): The estimated number of tokens of the first exchange and
+            the question.
+        max_tokens (int): The maximum number of tokens of a conversation.
+        message (str): The error message.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        num_tokens: int,
+        max_tokens: int,
+        message: str = "The first exchange of the chat session and the question "
+        "exceed the token limit, ask a shorter question or start a new session",
+    ):
+        """Constructor.
+
+        Args:
+            session_id (str): The id of the chat session.
+            num_tokens (int): The estimated number of tokens of the first exchange and
+                the question.
+            max_tokens (int): The maximum number of tokens of a conversation.
+            message (str): The error message.
+        """
+        super().__init__(
+            session_id=session_id,
+            num_tokens=num_tokens,
+            max_tokens=max_tokens,
+            message=message,
+        )
+        self.session_id = session_id
+        self.num_tokens = num_tokens
+        self.max_tokens = max_tokens
+        self.message = message
+
+    def __reduce__(self):
+        """Used for pickling."""
+        return (
+            self.__class__,
+            (self.session_id, self.num_tokens, self.max_tokens, self.message),
+        )
@@ -0,0 +1,74 @@
+"""Backfill precomputed timelines for videos indexed before timelines were persisted.
+
+Usage:
+
+```bash
+python -m aana_chat_with_video.storage.backfill [--overwrite]
+```
+"""
+import argparse
+
+from sqlalchemy.orm import Session
+
+from aana.exceptions.db import NotFoundException
+from aana.storage.session import get_session
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.storage.op import run_alembic_migrations
+from aana_chat_with_video.storage.repository.extended_video import (
+    ExtendedVideoRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_timeline import (
+    ExtendedVideoTimelineRepository,
+)
+from aana_chat_with_video.utils.timeline import build_timeline, get_timeline_params
+
+
+def backfill_timelines(session: Session, overwrite: bool = False) -> int:
+    """Build and save the timelines of all indexed videos.
+
+    Args:
+        session (Session): the database session
+        overwrite (bool): whether to rebuild timelines that already exist
+
+    Returns:
+        int: the number of saved timelines
+    """
+    timeline_repo = ExtendedVideoTimelineRepository(session)
+    media_ids = ExtendedVideoRepository(session).get_media_ids(
+        VideoProcessingStatus.COMPLETED
+    )
+    num_saved = 0
+    for media_id in media_ids:
+        timeline_params = get_timeline_params(media_id)
+        if not overwrite:
+            try:
+                timeline_repo.get_timeline(**timeline_params)
+                continue
+            except NotFoundException:
+                pass
+        timeline_repo.save(
+            **timeline_params, timeline=build_timeline(session, media_id)
+        )
+        num_saved += 1
+    return num_saved
+
+
+def main():
+    """Run the timeline backfill."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Rebuild timelines that already exist.",
+    )
+    args = parser.parse_args()
+
+    run_alembic_migrations(settings)
+    with get_session() as session:
+        num_saved = backfill_timelines(session, overwrite=args.overwrite)
+    print(f"Saved {num_saved} timelines.")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,9 @@ from aana_chat_with_video.storage.models.extended_video import ExtendedVideoEnti
 from aana_chat_with_video.storage.models.extended_video_caption import (
     ExtendedVideoCaptionEntity,
 )
+from aana_chat_with_video.storage.models.extended_video_timeline import (
+    ExtendedVideoTimelineEntity,
+)
 from aana_chat_with_video.storage.models.extended_video_transcript import (
     ExtendedVideoTranscriptEntity,
 )
@@ -8,6 +8,9 @@ from aana.storage.models.video import VideoEntity
 from aana_chat_with_video.storage.models.extended_video_caption import (
     ExtendedVideoCaptionEntity,
 )
+from aana_chat_with_video.storage.models.extended_video_timeline import (
+    ExtendedVideoTimelineEntity,
+)
 from aana_chat_with_video.storage.models.extended_video_transcript import (
     ExtendedVideoTranscriptEntity,
 )
@@ -16,6 +19,7 @@ from aana_chat_with_video.storage.models.extended_video_transcript import (
 class VideoProcessingStatus(str, Enum):
     """Enum for video status."""
 
+    QUEUED = "queued"
     CREATED = "created"
     RUNNING = "running"
     COMPLETED = "completed"
@@ -34,6 +38,9 @@ class ExtendedVideoEntity(VideoEntity):
         default=VideoProcessingStatus.CREATED,
         comment="Processing status",
     )
+    content_hash: Mapped[str | None] = mapped_column(
+        index=True, comment="Hash of the video source and the indexing parameters"
+    )
 
     captions: Mapped[list[ExtendedVideoCaptionEntity]] = relationship(
         "ExtendedVideoCaptionEntity",
@@ -47,6 +54,12 @@ class ExtendedVideoEntity(VideoEntity):
         cascade="all, delete",
         uselist=True,
     )
+    timelines: Mapped[list[ExtendedVideoTimelineEntity]] = relationship(
+        "ExtendedVideoTimelineEntity",
+        back_populates="video",
+        cascade="all, delete",
+        uselist=True,
+    )
 
     __mapper_args__ = {  # noqa: RUF012
         "polymorphic_identity": "extended_video",
@@ -2,7 +2,7 @@ from __future__ import annotations  # Let classes use themselves in type annotat
 
 import typing
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from aana.core.models.media import MediaId  # noqa: TCH001
@@ -32,6 +32,10 @@ class ExtendedVideoCaptionEntity(CaptionEntity):
     __mapper_args__ = {  # noqa: RUF012
         "polymorphic_identity": "extended_video_caption",
     }
+    # covers the lookup of the caption IDs of a video
+    __table_args__ = (
+        Index("ix_extended_video_caption_media_id_id", "media_id", "id"),
+    )
 
     @classmethod
     def from_caption_output(
@@ -0,0 +1,74 @@
+from __future__ import annotations  # Let classes use themselves in type annotations
+
+from sqlalchemy import JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from aana.core.models.media import MediaId  # noqa: TCH001
+from aana.storage.models.base import BaseEntity, TimeStampEntity
+
+
+class ExtendedVideoTimelineEntity(BaseEntity, TimeStampEntity):
+    """ORM model for the precomputed combined timeline of a video.
+
+    Attributes:
+        id (int): Unique identifier for the timeline.
+        media_id (MediaId): Foreign key to the extended video table.
+        asr_model (str): Name of the model used to generate the transcript.
+        captioning_model (str): Name of the model used to generate the captions.
+        chunk_size (float): Chunk size of the timeline in seconds.
+        chunking (str): The way the timeline is split into chunks (fixed or adaptive).
+        settings_hash (str): Fingerprint of the other settings the timeline was built with.
+        timeline (list): The combined timeline.
+        timeline_hash (str): Hash of the content of the timeline.
+    """
+
+    __tablename__ = "extended_video_timeline"
+    __table_args__ = (
+        UniqueConstraint(
+            "media_id",
+            "asr_model",
+            "captioning_model",
+            "chunk_size",
+            "chunking",
+            "settings_hash",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
+    media_id: Mapped[MediaId] = mapped_column(
+        ForeignKey("extended_video.id"),
+        nullable=False,
+        index=True,
+        comment="Foreign key to video table",
+    )
+    asr_model: Mapped[str] = mapped_column(
+        nullable=False, comment="Name of model used to generate the transcript"
+    )
+    captioning_model: Mapped[str] = mapped_column(
+        nullable=False, comment="Name of model used to generate the captions"
+    )
+    chunk_size: Mapped[float] = mapped_column(
+        nullable=False, comment="Chunk size of the timeline in seconds"
+    )
+    chunking: Mapped[str] = mapped_column(
+        nullable=False,
+        server_default="fixed",
+        comment="The way the timeline is split into chunks",
+    )
+    settings_hash: Mapped[str] = mapped_column(
+        nullable=False,
+        server_default="",
+        comment="Fingerprint of the settings the timeline was built with",
+    )
+    timeline: Mapped[list] = mapped_column(
+        JSON, nullable=False, comment="Combined timeline"
+    )
+    timeline_hash: Mapped[str] = mapped_column(
+        nullable=False,
+        server_default="",
+        comment="Hash of the content of the timeline",
+    )
+
+    video = relationship(
+        "ExtendedVideoEntity", back_populates="timelines", uselist=False
+    )
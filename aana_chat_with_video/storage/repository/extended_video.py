@@ -1,12 +1,20 @@
+from sqlalchemy import and_, select, update
 from sqlalchemy.orm import Session
 
 from aana.core.models.media import MediaId
-from aana.core.models.video import Video, VideoMetadata
+from aana.core.models.video import Video, VideoInput, VideoMetadata
+from aana.exceptions.db import NotFoundException
+from aana.storage.models.task import TaskEntity
 from aana.storage.repository.video import VideoRepository
+from aana_chat_with_video.core.models.timeline import TimelineChunking
+from aana_chat_with_video.core.models.video_chat import VideoChatContext
 from aana_chat_with_video.storage.models.extended_video import (
     ExtendedVideoEntity,
     VideoProcessingStatus,
 )
+from aana_chat_with_video.storage.models.extended_video_timeline import (
+    ExtendedVideoTimelineEntity,
+)
 
 
 class ExtendedVideoRepository(VideoRepository[ExtendedVideoEntity]):
@@ -16,12 +24,18 @@ class ExtendedVideoRepository(VideoRepository[ExtendedVideoEntity]):
         """Constructor."""
         super().__init__(session, ExtendedVideoEntity)
 
-    def save(self, video: Video, duration: float | None = None) -> dict:
+    def save(
+        self,
+        video: Video,
+        duration: float | None = None,
+        content_hash: str | None = None,
+    ) -> dict:
         """Saves a video to datastore.
 
         Args:
             video (Video): The video object.
             duration (float): the duration of the video object
+            content_hash (str | None): the hash of the video source and the indexing parameters
 
         Returns:
             dict: The dictionary with video and media IDs.
@@ -33,10 +47,121 @@ class ExtendedVideoRepository(VideoRepository[ExtendedVideoEntity]):
             title=video.title,
             description=video.description,
             duration=duration,
+            content_hash=content_hash,
         )
         self.create(video_entity)
         return video_entity
 
+    def save_queued(self, videos: list[VideoInput], tasks: list[TaskEntity]):
+        """Save videos that are queued for indexing together with their indexing tasks.
+
+        Only the media ID and the URL or path are known before the video is
+        downloaded. The rest is filled in with `update` when the indexing starts.
+
+        The videos and the tasks are saved in one transaction, so a video is never
+        left queued without a task that indexes it.
+
+        Args:
+            videos (list[VideoInput]): The video inputs.
+            tasks (list[TaskEntity]): The tasks that index the videos.
+        """
+        entities = [
+            ExtendedVideoEntity(
+                id=video.media_id,
+                path=video.path,
+                url=video.url,
+                status=VideoProcessingStatus.QUEUED,
+            )
+            for video in videos
+        ]
+        try:
+            self.session.add_all([*entities, *tasks])
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def update(
+        self,
+        video: Video,
+        duration: float | None = None,
+        content_hash: str | None = None,
+    ):
+        """Update a saved video from the downloaded video object.
+
+        Args:
+            video (Video): The video object.
+            duration (float): the duration of the video object
+            content_hash (str | None): the hash of the video source and the indexing
+                parameters, kept unchanged if None
+
+        Raises:
+            NotFoundException: If the video is not found.
+        """
+        entity: ExtendedVideoEntity = self.read(video.media_id)
+        entity.path = str(video.path)
+        entity.url = video.url
+        entity.title = video.title
+        entity.description = video.description
+        entity.duration = duration
+        if content_hash is not None:
+            entity.content_hash = content_hash
+        self.session.commit()
+
+    def copy(self, source_media_id: MediaId, media_id: MediaId) -> VideoMetadata:
+        """Copy a video to another media ID.
+
+        The copy shares the file, the URL, the metadata and the content hash of the
+        source video. It is saved with the status CREATED unless it exists already
+        (e.g. it is queued), then it is updated and keeps its status.
+
+        Args:
+            source_media_id (MediaId): The media ID of the video to copy.
+            media_id (MediaId): The media ID of the copy.
+
+        Returns:
+            VideoMetadata: The metadata of the video.
+
+        Raises:
+            NotFoundException: If the source video is not found.
+        """
+        source: ExtendedVideoEntity = self.read(source_media_id)
+        video_entity: ExtendedVideoEntity | None = self.read(media_id, check=False)
+        if video_entity is None:
+            video_entity = ExtendedVideoEntity(id=media_id)
+            self.session.add(video_entity)
+        video_entity.path = source.path
+        video_entity.url = source.url
+        video_entity.title = source.title
+        video_entity.description = source.description
+        video_entity.duration = source.duration
+        video_entity.content_hash = source.content_hash
+        self.session.commit()
+        return VideoMetadata(
+            title=video_entity.title,
+            description=video_entity.description,
+            duration=video_entity.duration,
+        )
+
+    def get_media_id_by_content_hash(self, content_hash: str) -> MediaId | None:
+        """Get the media ID of the latest completed video with the given content hash.
+
+        Args:
+            content_hash (str): The hash of the video source and the indexing parameters.
+
+        Returns:
+            MediaId | None: The media ID or None if no such video is found.
+        """
+        return self.session.execute(
+            select(self.model_class.id)
+            .where(
+                self.model_class.content_hash == content_hash,
+                self.model_class.status == VideoProcessingStatus.COMPLETED,
+            )
+            .order_by(self.model_class.created_at.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+
     def get_status(self, media_id: MediaId) -> VideoProcessingStatus:
         """Get the status of a video.
 
@@ -60,6 +185,28 @@ class ExtendedVideoRepository(VideoRepository[ExtendedVideoEntity]):
         entity.status = status
         self.session.commit()
 
+    def claim(self, media_id: MediaId, status: VideoProcessingStatus) -> bool:
+        """Claim a video for indexing by setting its status to CREATED.
+
+        The status is only changed if the video still has the expected status, so only
+        one of several concurrent requests claims the video.
+
+        Args:
+            media_id (MediaId): The media ID.
+            status (VideoProcessingStatus): The expected status of the video.
+
+        Returns:
+            bool: True if the video was claimed, False if its status changed.
+        """
+        result = self.session.execute(
+            update(self.model_class)
+            .where(self.model_class.id == media_id, self.model_class.status == status)
+            .values(status=VideoProcessingStatus.CREATED)
+            .execution_options(synchronize_session=False)
+        )
+        self.session.commit()
+        return result.rowcount == 1
+
     def get_metadata(self, media_id: MediaId) -> VideoMetadata:
         """Get the metadata of a video.
 
@@ -75,3 +222,86 @@ class ExtendedVideoRepository(VideoRepository[ExtendedVideoEntity]):
             description=entity.description,
             duration=entity.duration,
         )
+
+    def get_media_ids(self, status: VideoProcessingStatus) -> list[MediaId]:
+        """Get the media IDs of all videos with the given status.
+
+        Args:
+            status (VideoProcessingStatus): The status of the videos.
+
+        Returns:
+            list[MediaId]: The media IDs.
+        """
+        rows = (
+            self.session.query(self.model_class.id)
+            .filter_by(status=status)
+            .order_by(self.model_class.id)
+            .all()
+        )
+        return [media_id for (media_id,) in rows]
+
+    def get_chat_context(
+        self,
+        media_id: MediaId,
+        asr_model_name: str,
+        captioning_model_name: str,
+        chunk_size: float,
+        chunking: TimelineChunking = TimelineChunking.FIXED,
+        settings_hash: str = "",
+        include_timeline: bool = True,
+    ) -> VideoChatContext:
+        """Get the status, metadata, version and timeline of a video in a single query.
+
+        The timeline is outer-joined to the video row, so a video without a stored
+        timeline is returned with `timeline` and `version` set to None. The version is
+        the content hash of the stored timeline and is loaded even without the timeline.
+
+        Args:
+            media_id (MediaId): The media ID.
+            asr_model_name (str): The name of the model used to generate the transcript.
+            captioning_model_name (str): The name of the model used to generate the captions.
+            chunk_size (float): The chunk size of the timeline in seconds.
+            chunking (TimelineChunking): The way the timeline is split into chunks.
+            settings_hash (str): The fingerprint of the other timeline settings.
+            include_timeline (bool): Whether to load the timeline. Defaults to True.
+
+        Returns:
+            VideoChatContext: The chat context of the video.
+
+        Raises:
+            NotFoundException: If the video is not found.
+        """
+        video = self.model_class
+        statement = select(
+            video.status,
+            video.title,
+            video.description,
+            video.duration,
+        ).where(video.id == media_id)
+        timeline = ExtendedVideoTimelineEntity
+        statement = statement.add_columns(timeline.timeline_hash).outerjoin(
+            timeline,
+            and_(
+                timeline.media_id == video.id,
+                timeline.asr_model == asr_model_name,
+                timeline.captioning_model == captioning_model_name,
+                timeline.chunk_size == chunk_size,
+                timeline.chunking == chunking,
+                timeline.settings_hash == settings_hash,
+            ),
+        )
+        if include_timeline:
+            statement = statement.add_columns(timeline.timeline)
+        row = self.session.execute(statement).first()
+        if row is None:
+            raise NotFoundException(self.table_name, media_id)
+        return VideoChatContext(
+            status=row.status,
+            metadata=VideoMetadata(
+                title=row.title,
+                description=row.description,
+                duration=row.duration,
+            ),
+            version=row.timeline_hash,
+            timeline=row.timeline if include_timeline else None,
+        )
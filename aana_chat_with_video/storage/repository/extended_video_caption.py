@@ -1,7 +1,9 @@
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from aana.core.models.captions import Caption, CaptionsList
 from aana.core.models.media import MediaId
+from aana.storage.models.caption import CaptionEntity
 from aana.storage.repository.base import BaseRepository
 from aana_chat_with_video.storage.models.extended_video_caption import (
     ExtendedVideoCaptionEntity,
@@ -77,27 +79,124 @@ class ExtendedVideoCaptionRepository(BaseRepository[ExtendedVideoCaptionEntity])
         results = self.create_multiple(entities)
         return results
 
+    def save_batch(
+        self,
+        model_name: str,
+        media_id: MediaId,
+        captions: CaptionsList,
+        timestamps: list[float],
+        frame_ids: list[int],
+    ) -> list[int]:
+        """Save a batch of captions with a bulk insert.
+
+        Unlike `save_all`, no ORM objects are created: the rows are written with
+        Core INSERTs, one executemany into the `caption` table that returns the
+        generated IDs and one into the `extended_video_caption` table.
+
+        Args:
+            model_name (str): The name of the model used to generate the captions.
+            media_id (MediaId): the media ID of the video.
+            captions (CaptionsList): The captions.
+            timestamps (list[float]): The timestamps.
+            frame_ids (list[int]): The frame IDs.
+
+        Returns:
+            list[int]: The IDs of the saved captions in the order of the input.
+        """
+        if len(captions) == 0:
+            return []
+        caption_table = CaptionEntity.__table__
+        extended_caption_table = self.model_class.__table__
+        caption_type = self.model_class.__mapper__.polymorphic_identity
+
+        caption_ids = (
+            self.session.execute(
+                insert(caption_table).returning(
+                    caption_table.c.id, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        "model": model_name,
+                        "frame_id": frame_id,
+                        "caption": str(caption),
+                        "timestamp": timestamp,
+                        "caption_type": caption_type,
+                    }
+                    for caption, timestamp, frame_id in zip(
+                        captions, timestamps, frame_ids, strict=True
+                    )
+                ],
+            )
+            .scalars()
+            .all()
+        )
+        self.session.execute(
+            insert(extended_caption_table),
+            [{"id": caption_id, "media_id": media_id} for caption_id in caption_ids],
+        )
+        self.session.commit()
+        return list(caption_ids)
+
+    def copy(
+        self, model_name: str, source_media_id: MediaId, media_id: MediaId
+    ) -> list[int]:
+        """Save a copy of the captions of a video for another video.
+
+        Args:
+            model_name (str): The name of the model used to generate the captions.
+            source_media_id (MediaId): The media ID of the video to copy the captions from.
+            media_id (MediaId): The media ID of the video to copy the captions to.
+
+        Returns:
+            list[int]: The IDs of the copied captions ordered by frame ID.
+        """
+        captions = self.get_captions(model_name=model_name, media_id=source_media_id)
+        return self.save_batch(
+            model_name=model_name,
+            media_id=media_id,
+            captions=captions["captions"],
+            timestamps=captions["timestamps"],
+            frame_ids=captions["frame_ids"],
+        )
+
     def get_captions(self, model_name: str, media_id: MediaId) -> dict:
         """Get the captions for a video.
 
+        Only the needed columns are selected, so no ORM entities are loaded.
+
         Args:
             model_name (str): The model name.
             media_id (MediaId): The media ID.
 
         Returns:
-            dict: The dictionary with the captions, timestamps, and frame IDs.
+            dict: The dictionary with the captions, timestamps, frame IDs and caption IDs.
         """
-        entities: list[ExtendedVideoCaptionEntity] = (
-            self.session.query(self.model_class)
-            .filter_by(media_id=media_id, model=model_name)
-            .order_by(self.model_class.frame_id)
-            .all()
-        )
-        captions = [c.caption for c in entities]
-        timestamps = [c.timestamp for c in entities]
-        frame_ids = [c.frame_id for c in entities]
+        caption_table = CaptionEntity.__table__
+        extended_caption_table = self.model_class.__table__
+        rows = self.session.execute(
+            select(
+                caption_table.c.caption,
+                caption_table.c.timestamp,
+                caption_table.c.frame_id,
+                caption_table.c.id,
+            )
+            .join(
+                extended_caption_table,
+                caption_table.c.id == extended_caption_table.c.id,
+            )
+            .where(
+                extended_caption_table.c.media_id == media_id,
+                caption_table.c.model == model_name,
+            )
+            .order_by(caption_table.c.frame_id)
+        ).all()
+        captions = [row.caption for row in rows]
+        timestamps = [row.timestamp for row in rows]
+        frame_ids = [row.frame_id for row in rows]
+        caption_ids = [row.id for row in rows]
         return {
             "captions": captions,
             "timestamps": timestamps,
             "frame_ids": frame_ids,
+            "caption_ids": caption_ids,
         }
@@ -0,0 +1,121 @@
+import hashlib
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from aana.core.models.media import MediaId
+from aana.exceptions.db import NotFoundException
+from aana.storage.repository.base import BaseRepository
+from aana_chat_with_video.core.models.timeline import TimelineChunking
+from aana_chat_with_video.storage.models.extended_video_timeline import (
+    ExtendedVideoTimelineEntity,
+)
+
+
+class ExtendedVideoTimelineRepository(BaseRepository[ExtendedVideoTimelineEntity]):
+    """Repository for precomputed video timelines."""
+
+    def __init__(self, session: Session):
+        """Constructor."""
+        super().__init__(session, ExtendedVideoTimelineEntity)
+
+    def save(
+        self,
+        media_id: MediaId,
+        asr_model_name: str,
+        captioning_model_name: str,
+        chunk_size: float,
+        timeline: list[dict],
+        chunking: TimelineChunking = TimelineChunking.FIXED,
+        settings_hash: str = "",
+    ) -> ExtendedVideoTimelineEntity:
+        """Save a timeline, replacing the existing one with the same parameters.
+
+        The timeline is upserted, so concurrent saves of the same timeline
+        don't fail or leave duplicate rows. The hash of its content is stored with it
+        to tell when a cached copy of the timeline is stale.
+
+        Args:
+            media_id (MediaId): The media ID.
+            asr_model_name (str): The name of the model used to generate the transcript.
+            captioning_model_name (str): The name of the model used to generate the captions.
+            chunk_size (float): The chunk size of the timeline in seconds.
+            timeline (list[dict]): The combined timeline.
+            chunking (TimelineChunking): The way the timeline is split into chunks.
+            settings_hash (str): The fingerprint of the other timeline settings.
+
+        Returns:
+            ExtendedVideoTimelineEntity: The timeline entity.
+        """
+        key = {
+            "media_id": media_id,
+            "asr_model": asr_model_name,
+            "captioning_model": captioning_model_name,
+            "chunk_size": chunk_size,
+            "chunking": chunking,
+            "settings_hash": settings_hash,
+        }
+        if self.session.get_bind().dialect.name == "postgresql":
+            insert = postgresql.insert
+        else:
+            insert = sqlite.insert
+        timeline_hash = hashlib.sha256(
+            json.dumps(timeline, sort_keys=True).encode()
+        ).hexdigest()
+        statement = insert(self.model_class).values(
+            **key, timeline=timeline, timeline_hash=timeline_hash
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                "timeline": statement.excluded.timeline,
+                "timeline_hash": statement.excluded.timeline_hash,
+                "updated_at": func.now(),
+            },
+        )
+        self.session.execute(statement)
+        self.session.commit()
+        return self.session.scalars(select(self.model_class).filter_by(**key)).one()
+
+    def get_timeline(
+        self,
+        media_id: MediaId,
+        asr_model_name: str,
+        captioning_model_name: str,
+        chunk_size: float,
+        chunking: TimelineChunking = TimelineChunking.FIXED,
+        settings_hash: str = "",
+    ) -> list[dict]:
+        """Get the timeline of a video.
+
+        Args:
+            media_id (MediaId): The media ID.
+            asr_model_name (str): The name of the model used to generate the transcript.
+            captioning_model_name (str): The name of the model used to generate the captions.
+            chunk_size (float): The chunk size of the timeline in seconds.
+            chunking (TimelineChunking): The way the timeline is split into chunks.
+            settings_hash (str): The fingerprint of the other timeline settings.
+
+        Returns:
+            list[dict]: The combined timeline.
+
+        Raises:
+            NotFoundException: If the timeline is not found.
+        """
+        timeline = (
+            self.session.query(self.model_class.timeline)
+            .filter_by(
+                media_id=media_id,
+                asr_model=asr_model_name,
+                captioning_model=captioning_model_name,
+                chunk_size=chunk_size,
+                chunking=chunking,
+                settings_hash=settings_hash,
+            )
+            .scalar()
+        )
+        if timeline is None:
+            raise NotFoundException(self.table_name, media_id)
+        return timeline
@@ -1,3 +1,4 @@
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from aana.core.models.asr import (
@@ -8,7 +9,9 @@ from aana.core.models.asr import (
 )
 from aana.core.models.media import MediaId
 from aana.exceptions.db import NotFoundException
+from aana.storage.models.transcript import TranscriptEntity
 from aana.storage.repository.transcript import TranscriptRepository
+from aana_chat_with_video.core.models.transcript import TranscriptSegments
 from aana_chat_with_video.storage.models.extended_video_transcript import (
     ExtendedVideoTranscriptEntity,
 )
@@ -54,6 +57,62 @@ class ExtendedVideoTranscriptRepository(
         self.session.commit()
         return transcript_entity
 
+    def copy(
+        self, model_name: str, source_media_id: MediaId, media_id: MediaId
+    ) -> int:
+        """Save a copy of the transcript of a video for another video.
+
+        The rows are copied with Core statements, so the segments are not validated.
+
+        Args:
+            model_name (str): The name of the model used to generate the transcript.
+            source_media_id (MediaId): The media ID of the video to copy the transcript from.
+            media_id (MediaId): The media ID of the video to copy the transcript to.
+
+        Returns:
+            int: The ID of the copied transcript.
+
+        Raises:
+            NotFoundException: If the source video has no transcript.
+        """
+        transcript_table = TranscriptEntity.__table__
+        extended_transcript_table = self.model_class.__table__
+        row = self.session.execute(
+            select(
+                transcript_table.c.transcript,
+                transcript_table.c.segments,
+                transcript_table.c.language,
+                transcript_table.c.language_confidence,
+            )
+            .join(
+                extended_transcript_table,
+                transcript_table.c.id == extended_transcript_table.c.id,
+            )
+            .where(
+                extended_transcript_table.c.media_id == source_media_id,
+                transcript_table.c.model == model_name,
+            )
+            .limit(1)
+        ).first()
+        if row is None:
+            raise NotFoundException(self.table_name, source_media_id)
+        transcript_id = self.session.execute(
+            insert(transcript_table)
+            .values(
+                model=model_name,
+                transcript_type=self.model_class.__mapper__.polymorphic_identity,
+                **row._asdict(),
+            )
+            .returning(transcript_table.c.id)
+        ).scalar_one()
+        self.session.execute(
+            insert(extended_transcript_table).values(
+                id=transcript_id, media_id=media_id
+            )
+        )
+        self.session.commit()
+        return transcript_id
+
     def get_transcript(self, model_name: str, media_id: MediaId) -> dict:
         """Get the transcript for a video.
 
@@ -62,7 +121,7 @@ class ExtendedVideoTranscriptRepository(
             media_id (MediaId): The media ID.
 
         Returns:
-            dict: The dictionary with the transcript, segments, and info.
+            dict: The dictionary with the transcript, segments, info and transcript ID.
         """
         entity = (
             self.session.query(self.model_class)
@@ -81,4 +140,38 @@ class ExtendedVideoTranscriptRepository(
             "transcription": transcription,
             "segments": segments,
             "transcription_info": info,
+            "transcription_id": entity.id,
         }
+
+    def get_transcript_segments(
+        self, model_name: str, media_id: MediaId
+    ) -> TranscriptSegments:
+        """Get the segments of the transcript for a video without validating them.
+
+        Only the segments column is selected and the segments are not converted
+        to `AsrSegment`, which is much faster for long transcripts.
+
+        Args:
+            model_name (str): The name of the model used to generate the transcript.
+            media_id (MediaId): The media ID.
+
+        Returns:
+            TranscriptSegments: The texts and time intervals of the segments.
+        """
+        transcript_table = TranscriptEntity.__table__
+        extended_transcript_table = self.model_class.__table__
+        segments = self.session.execute(
+            select(transcript_table.c.segments)
+            .join(
+                extended_transcript_table,
+                transcript_table.c.id == extended_transcript_table.c.id,
+            )
+            .where(
+                extended_transcript_table.c.media_id == media_id,
+                transcript_table.c.model == model_name,
+            )
+            .limit(1)
+        ).scalar_one_or_none()
+        if segments is None:
+            raise NotFoundException(self.table_name, media_id)
+        return TranscriptSegments.from_dicts(segments)
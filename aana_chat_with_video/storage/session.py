@@ -0,0 +1,98 @@
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Concatenate, Generic, ParamSpec, TypeVar
+
+from sqlalchemy.orm import Session
+
+from aana.storage.repository.base import BaseRepository
+from aana.storage.session import get_session
+from aana_chat_with_video.configs.settings import settings
+
+__all__ = ["AsyncRepository", "run_in_session"]
+
+P = ParamSpec("P")
+T = TypeVar("T")
+R = TypeVar("R", bound=BaseRepository)
+
+# one thread per connection of the pool, more threads would only wait for a connection
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.db_config.pool_size + settings.db_config.max_overflow,
+    thread_name_prefix="db",
+)
+
+
+async def run_in_session(
+    func: Callable[Concatenate[Session, P], T], *args: P.args, **kwargs: P.kwargs
+) -> T:
+    """Run a function with a new database session in the database thread pool.
+
+    SQLAlchemy sessions are synchronous, so a query run directly in an endpoint blocks
+    the event loop and stalls all other requests of the replica, e.g. streaming chat
+    responses. The function runs in a worker thread instead and the event loop stays
+    free while it waits for the database.
+
+    The session is closed when the function returns, so the function should return
+    plain values and not ORM entities.
+
+    Args:
+        func (Callable): the function to run, called with the session and the arguments
+        *args: the positional arguments of the function
+        **kwargs: the keyword arguments of the function
+
+    Returns:
+        T: the result of the function
+    """
+
+    def run() -> T:
+        with get_session() as session:
+            return func(session, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, run)
+
+
+class AsyncRepository(Generic[R]):
+    """Async interface to a repository.
+
+    Each method call runs in the database thread pool with a new session
+    (see `run_in_session`):
+
+    ```python
+    status = await AsyncRepository(ExtendedVideoRepository).get_status(media_id)
+    ```
+
+    Methods that return ORM entities should not be used, because the entities
+    are detached from the closed session.
+
+    Attributes:
+        repository_class (type[R]): the class of the repository
+    """
+
+    def __init__(self, repository_class: type[R]):
+        """Constructor.
+
+        Args:
+            repository_class (type[R]): the class of the repository
+        """
+        self.repository_class = repository_class
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        """Get an async version of a repository method.
+
+        Args:
+            name (str): the name of the method
+
+        Returns:
+            Callable[..., Awaitable[Any]]: the async method
+        """
+        method = getattr(self.repository_class, name)
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await run_in_session(
+                lambda session: method(self.repository_class(session), *args, **kwargs)
+            )
+
+        return call
@@ -1,20 +1,32 @@
 # ruff: noqa: S101
 import os
 import tempfile
+from importlib import resources
 
 import pytest
 from sqlalchemy.orm import Session
 
 from aana.configs.db import DbSettings, SQLiteConfig
 from aana.configs.settings import settings as aana_settings
+from aana.core.models.video import Video
 from aana.exceptions.runtime import EmptyMigrationsException
 from aana.storage.op import DbType, run_alembic_migrations
 from aana.tests.conftest import app_factory, call_endpoint  # noqa: F401
 from aana.utils.json import jsonify
 from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.endpoints import index_video
+from aana_chat_with_video.endpoints.index_video import IndexVideoEndpoint
+from aana_chat_with_video.storage import session as db_session_module
 from aana_chat_with_video.storage.op import (
     run_alembic_migrations as run_app_alembic_migrations,
 )
+from aana_chat_with_video.tests.utils import (
+    StubAsrHandle,
+    StubCaptioningHandle,
+    run_local,
+    stub_generate_frames,
+    stub_stream_audio,
+)
 
 
 @pytest.fixture(scope="function")
@@ -53,3 +65,31 @@ def app_setup(app_factory):
     yield app
     tmp_database_path.unlink()
     app.shutdown()
+
+
+@pytest.fixture(scope="function")
+def stub_endpoint(db_session, mocker):
+    """Creates an index endpoint with stubbed deployments and IO."""
+    engine = db_session.get_bind()
+    path = resources.path("aana.tests.files.videos", "squirrel.mp4")
+
+    mocker.patch.object(index_video, "get_session", lambda: Session(engine))
+    mocker.patch.object(db_session_module, "get_session", lambda: Session(engine))
+    mocker.patch.object(index_video, "run_remote", run_local)
+    mocker.patch.object(
+        index_video,
+        "download_video",
+        lambda video_input: Video(
+            path=path, media_id=video_input.media_id, title="Squirrel"
+        ),
+    )
+    mocker.patch.object(index_video, "get_video_duration", lambda video: 40.0)
+    mocker.patch.object(index_video, "stream_audio", stub_stream_audio)
+    mocker.patch.object(index_video, "generate_frames", stub_generate_frames)
+
+    endpoint = IndexVideoEndpoint(
+        name="index_video_stream", path="/video/index_stream", summary=""
+    )
+    endpoint.asr_handle = StubAsrHandle()
+    endpoint.captioning_handle = StubCaptioningHandle()
+    return endpoint
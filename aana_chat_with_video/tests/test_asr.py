@@ -0,0 +1,78 @@
+# ruff: noqa: S101
+import random
+
+import pytest
+
+from aana.core.models.asr import (
+    AsrSegment,
+    AsrSegments,
+    AsrTranscription,
+    AsrTranscriptionInfo,
+)
+from aana.core.models.time import TimeInterval
+from aana_chat_with_video.tests.utils import benchmark, measure
+from aana_chat_with_video.utils.asr import AsrResultBuilder
+
+
+def make_outputs(num_chunks: int, seed: int = 0) -> list[dict]:
+    """Creates partial ASR outputs, some of them empty or in another language."""
+    rng = random.Random(seed)
+    outputs = []
+    for i in range(num_chunks):
+        text = f"chunk {i}" if rng.random() > 0.1 else ""
+        segments = [
+            AsrSegment(text=text, time_interval=TimeInterval(start=i, end=i + 1))
+        ]
+        outputs.append(
+            {
+                "transcription": AsrTranscription(text=text),
+                "segments": segments if text else [],
+                "transcription_info": AsrTranscriptionInfo(
+                    language=rng.choice(["en", "en", "en", "de"]),
+                    language_confidence=rng.random(),
+                ),
+            }
+        )
+    return outputs
+
+
+def sum_outputs(outputs: list[dict]) -> dict:
+    """Combines the partial outputs by summing them."""
+    return {
+        "transcription": sum(
+            (output["transcription"] for output in outputs), AsrTranscription()
+        ),
+        "segments": sum((output["segments"] for output in outputs), AsrSegments()),
+        "transcription_info": sum(
+            (output["transcription_info"] for output in outputs), AsrTranscriptionInfo()
+        ),
+    }
+
+
+def build_outputs(outputs: list[dict]) -> dict:
+    """Combines the partial outputs with the builder."""
+    builder = AsrResultBuilder()
+    for output in outputs:
+        builder.add(**output)
+    return builder.build()
+
+
+@pytest.mark.parametrize("num_chunks", [0, 1, 2, 100])
+def test_asr_result_builder(num_chunks):
+    """Tests that the builder combines the partial outputs like summing them."""
+    outputs = make_outputs(num_chunks, seed=num_chunks)
+    assert build_outputs(outputs) == sum_outputs(outputs)
+
+
+@benchmark
+def test_asr_result_builder_benchmark():
+    """Compares summing and building the output of a transcription with many chunks."""
+    outputs = make_outputs(5000)
+
+    sum_time = measure(lambda: sum_outputs(outputs), repeats=1)
+    build_time = measure(lambda: build_outputs(outputs), repeats=1)
+    print(
+        f"\n{len(outputs)} chunks: sum {sum_time * 1000:.1f} ms, "
+        f"builder {build_time * 1000:.1f} ms"
+    )
+    assert build_time < sum_time / 5
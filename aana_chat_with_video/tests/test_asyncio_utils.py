@@ -0,0 +1,137 @@
+# ruff: noqa: S101
+
+import asyncio
+import time
+from contextlib import aclosing
+
+import pytest
+
+from aana_chat_with_video.utils.asyncio import (
+    iterate_in_thread,
+    merge_async_generators,
+    prefetch_async_generator,
+)
+
+
+async def delayed_range(n: int, delay: float, produced: list[int] | None = None):
+    """Yield numbers from 0 to n-1 with a delay before each one."""
+    for i in range(n):
+        await asyncio.sleep(delay)
+        if produced is not None:
+            produced.append(i)
+        yield i
+
+
+async def failing_generator():
+    """Yield one item and fail."""
+    yield 0
+    raise ValueError("Failed")  # noqa: TRY003
+
+
+@pytest.mark.asyncio
+async def test_merge_async_generators():
+    """Tests that merged generators run concurrently and yield all items."""
+    start = time.perf_counter()
+    items = [
+        item
+        async for item in merge_async_generators(
+            delayed_range(5, 0.05), delayed_range(5, 0.05)
+        )
+    ]
+    elapsed = time.perf_counter() - start
+
+    assert sorted(items) == sorted(list(range(5)) * 2)
+    assert elapsed < 0.45
+
+    with pytest.raises(ValueError):
+        async for _ in merge_async_generators(
+            delayed_range(5, 0.05), failing_generator()
+        ):
+            pass
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("depth", [0, 1, 3])
+async def test_prefetch_async_generator(depth):
+    """Tests that prefetching overlaps production and consumption."""
+    produced = []
+    start = time.perf_counter()
+    items = []
+    async for item in prefetch_async_generator(
+        delayed_range(5, 0.05, produced), depth=depth
+    ):
+        # the producer never runs more than depth + 1 items ahead
+        assert len(produced) - len(items) <= depth + 1
+        await asyncio.sleep(0.05)
+        items.append(item)
+    elapsed = time.perf_counter() - start
+
+    assert items == list(range(5))
+    if depth > 0:
+        assert elapsed < 0.45
+    else:
+        assert elapsed >= 0.5
+
+    with pytest.raises(ValueError):
+        async for _ in prefetch_async_generator(failing_generator(), depth=depth):
+            pass
+
+
+def blocking_range(n: int, delay: float, produced: list[int]):
+    """Yield numbers from 0 to n-1, blocking for a delay before each one."""
+    for i in range(n):
+        time.sleep(delay)
+        produced.append(i)
+        yield i
+
+
+def failing_iterator():
+    """Yield one item and fail."""
+    yield 0
+    raise ValueError("Failed")  # noqa: TRY003
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("depth", [1, 3])
+async def test_iterate_in_thread(depth):
+    """Tests that a blocking iterator is consumed without blocking the event loop."""
+    produced = []
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    items = []
+    async for item in iterate_in_thread(blocking_range(5, 0.05, produced), depth=depth):
+        # the producer never runs more than depth + 1 items ahead
+        assert len(produced) - len(items) <= depth + 1
+        items.append(item)
+    ticker.cancel()
+
+    assert items == list(range(5))
+    # the event loop kept running while the iterator was blocking
+    assert ticks >= 10
+
+    with pytest.raises(ValueError):
+        async for _ in iterate_in_thread(failing_iterator(), depth=depth):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_thread_early_exit():
+    """Tests that the iterator is closed when the consumer stops early."""
+    produced = []
+    iterator = blocking_range(100, 0.01, produced)
+    async with aclosing(iterate_in_thread(iterator)) as items:
+        async for item in items:
+            if item == 2:
+                break
+    # the thread has stopped, so nothing is produced anymore
+    num_produced = len(produced)
+    await asyncio.sleep(0.05)
+    assert len(produced) == num_produced <= 4
+    assert iterator.gi_frame is None
@@ -0,0 +1,175 @@
+# ruff: noqa: S101
+# Streaming audio extraction on a synthetic WAV file.
+
+import asyncio
+import io
+import time
+import tracemalloc
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from aana.core.models.asr import AsrSegment, AsrWord
+from aana.core.models.time import TimeInterval
+from aana.core.models.video import Video
+from aana.integrations.external.av import pyAVWrapper
+from aana_chat_with_video.tests.utils import benchmark
+from aana_chat_with_video.utils import audio
+from aana_chat_with_video.utils.audio import (
+    SAMPLE_RATE,
+    find_split_point,
+    load_audio_chunks,
+    shift_segments,
+    stream_audio,
+)
+
+
+def write_speech_like_wav(path: Path, duration: float, seed: int = 0):
+    """Writes a WAV file with tone bursts separated by short pauses."""
+    rng = np.random.default_rng(seed)
+    samples = []
+    while sum(len(s) for s in samples) < duration * SAMPLE_RATE:
+        num_samples = int(rng.uniform(0.5, 3.0) * SAMPLE_RATE)
+        t = np.arange(num_samples) / SAMPLE_RATE
+        samples.append(0.5 * np.sin(2 * np.pi * rng.uniform(100, 400) * t))
+        samples.append(np.zeros(int(rng.uniform(0.2, 0.6) * SAMPLE_RATE)))
+    audio = np.concatenate(samples)[: int(duration * SAMPLE_RATE)]
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes((audio * 32767).astype(np.int16).tobytes())
+
+
+def test_find_split_point():
+    """Tests that the audio is split in the quietest window."""
+    audio = np.ones(1000, dtype=np.float32)
+    audio[900:950] = 0.0
+    split = find_split_point(audio, search_samples=200, window_samples=20)
+    assert 900 <= split <= 950
+    assert find_split_point(audio[:0], search_samples=200, window_samples=20) == 0
+
+
+def test_load_audio_chunks(tmp_path):
+    """Tests that the chunks add up to the whole audio and end in pauses."""
+    path = tmp_path / "audio.wav"
+    write_speech_like_wav(path, duration=60.0)
+    full_audio = pyAVWrapper.read_file(path)
+
+    chunks = list(load_audio_chunks(path, chunk_duration=10.0))
+    assert len(chunks) >= 6
+    assert all(len(chunk) <= 10.0 * SAMPLE_RATE for chunk in chunks)
+    np.testing.assert_array_equal(np.concatenate(chunks), full_audio)
+    # the chunks are split in pauses and not in the middle of a tone
+    for chunk in chunks[:-1]:
+        assert np.abs(chunk[-10:]).max() < 0.01
+
+
+def test_load_audio_chunks_memory(tmp_path):
+    """Compares the peak memory of loading the whole audio and loading it in chunks."""
+    path = tmp_path / "audio.wav"
+    write_speech_like_wav(path, duration=20 * 60.0)
+
+    def peak_memory(func) -> int:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    full_peak = peak_memory(lambda: pyAVWrapper.read_file(path))
+    chunked_peak = peak_memory(
+        lambda: sum(len(c) for c in load_audio_chunks(path, chunk_duration=60.0))
+    )
+    print(
+        f"\n20 minutes of audio: full {full_peak / 2**20:.1f} MiB, "
+        f"60 s chunks {chunked_peak / 2**20:.1f} MiB"
+    )
+    assert chunked_peak < full_peak / 4
+
+
+@pytest.mark.asyncio
+async def test_stream_audio(tmp_path, mocker):
+    """Tests the chunk boundaries and that only few chunks are decoded ahead."""
+    path = tmp_path / "audio.wav"
+    write_speech_like_wav(path, duration=10 * 60.0)
+    video = Video(path=path, media_id="audio_stream_test")
+
+    num_decoded = 0
+
+    def counting_load_audio_chunks(*args, **kwargs):
+        nonlocal num_decoded
+        for chunk in load_audio_chunks(*args, **kwargs):
+            num_decoded += 1
+            yield chunk
+
+    mocker.patch.object(audio, "load_audio_chunks", counting_load_audio_chunks)
+
+    start_times = []
+    chunk_samples = []
+    async for start_time, chunk in stream_audio(
+        video, chunk_duration=60.0, prefetch_depth=1
+    ):
+        # the consumer holds one chunk and at most one more is decoded
+        assert num_decoded <= len(chunk_samples) + 2
+        # simulate transcription of the chunk
+        await asyncio.sleep(0.01)
+        assert num_decoded <= len(chunk_samples) + 2
+        start_times.append(start_time)
+        with wave.open(io.BytesIO(chunk.content), "rb") as wav_file:
+            chunk_samples.append(wav_file.getnframes())
+
+    assert num_decoded == len(chunk_samples) >= 10
+    assert all(samples <= 60 * SAMPLE_RATE for samples in chunk_samples)
+    # each chunk starts where the previous one ends
+    expected_start_times = np.cumsum([0, *chunk_samples[:-1]]) / SAMPLE_RATE
+    assert start_times == pytest.approx(expected_start_times.tolist())
+    assert sum(chunk_samples) == 10 * 60 * SAMPLE_RATE
+
+
+@benchmark
+@pytest.mark.asyncio
+async def test_stream_audio_benchmark(tmp_path):
+    """Tests that the first chunk is available before the extraction finishes."""
+    path = tmp_path / "audio.wav"
+    write_speech_like_wav(path, duration=10 * 60.0)
+    video = Video(path=path, media_id="audio_stream_test")
+
+    start = time.perf_counter()
+    first_chunk_latency = None
+    async for _ in stream_audio(video, chunk_duration=60.0):
+        if first_chunk_latency is None:
+            first_chunk_latency = time.perf_counter() - start
+        # simulate transcription of the chunk
+        await asyncio.sleep(0.01)
+    total_latency = time.perf_counter() - start
+
+    print(
+        f"\nfirst chunk after {first_chunk_latency * 1000:.1f} ms, "
+        f"all chunks after {total_latency * 1000:.1f} ms"
+    )
+    assert first_chunk_latency < total_latency / 2
+
+
+def test_shift_segments():
+    """Tests shifting the segments of a chunk to the time of the whole audio."""
+    segments = [
+        AsrSegment(
+            text="hello",
+            time_interval=TimeInterval(start=1.0, end=2.0),
+            words=[
+                AsrWord(
+                    word="hello",
+                    time_interval=TimeInterval(start=1.0, end=1.5),
+                    alignment_confidence=0.9,
+                )
+            ],
+        )
+    ]
+    shifted = shift_segments(segments, 60.0)
+    assert shifted[0].time_interval == TimeInterval(start=61.0, end=62.0)
+    assert shifted[0].words[0].time_interval == TimeInterval(start=61.0, end=61.5)
+    assert segments[0].time_interval.start == 1.0
+    assert shift_segments(segments, 0.0) is segments
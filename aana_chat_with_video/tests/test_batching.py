@@ -0,0 +1,208 @@
+# ruff: noqa: S101
+# Captioning the frames of concurrent indexing requests with and without
+# cross-request batching, against a stub of a GPU deployment.
+
+import asyncio
+import time
+
+import pytest
+
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.storage.repository.extended_video_caption import (
+    ExtendedVideoCaptionRepository,
+)
+from aana_chat_with_video.tests.utils import StubCaptioningHandle, benchmark, index
+from aana_chat_with_video.utils.batching import (
+    BatchedCaptioningHandle,
+    DynamicBatcher,
+)
+
+NUM_VIDEOS = 8
+NUM_FRAME_BATCHES = 5
+FRAME_BATCH_SIZE = 2
+MAX_BATCH_SIZE = 16
+BATCH_LATENCY = 0.02  # seconds per batch on the GPU
+FRAME_LATENCY = 0.001  # seconds per frame on the GPU
+
+
+class StubGpuCaptioningHandle:
+    """Stub for the captioning deployment that processes one batch at a time.
+
+    Every batch has a fixed cost on top of the cost per frame, like a GPU.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.gpu = asyncio.Lock()
+        self.batch_sizes = []
+
+    async def generate_batch(self, images):
+        """Caption a batch of images."""
+        async with self.gpu:
+            await asyncio.sleep(BATCH_LATENCY + FRAME_LATENCY * len(images))
+        self.batch_sizes.append(len(images))
+        return {"captions": [f"caption {image}" for image in images]}
+
+
+async def double(items: list[int]) -> list[int]:
+    """Process a batch of numbers."""
+    await asyncio.sleep(0.01)
+    return [2 * item for item in items]
+
+
+async def caption_videos(handle) -> float:
+    """Caption concurrent videos, check the captions and return the latency."""
+
+    async def caption_video(video_id: int) -> list[str]:
+        captions = []
+        for batch in range(NUM_FRAME_BATCHES):
+            frames = [
+                f"{video_id}/{batch}/{frame}" for frame in range(FRAME_BATCH_SIZE)
+            ]
+            output = await handle.generate_batch(images=frames)
+            captions.extend(output["captions"])
+        return captions
+
+    start = time.perf_counter()
+    video_captions = await asyncio.gather(
+        *[caption_video(video_id) for video_id in range(NUM_VIDEOS)]
+    )
+    latency = time.perf_counter() - start
+    for video_id, captions in enumerate(video_captions):
+        assert captions == [
+            f"caption {video_id}/{batch}/{frame}"
+            for batch in range(NUM_FRAME_BATCHES)
+            for frame in range(FRAME_BATCH_SIZE)
+        ]
+    return latency
+
+
+@pytest.mark.asyncio
+async def test_dynamic_batcher():
+    """Tests that concurrent requests are coalesced and get their own results."""
+    batcher = DynamicBatcher(double, max_batch_size=8, max_wait_time=0.05)
+    sizes = [3, 5, 2, 6]
+    requests = [list(range(i * 10, i * 10 + size)) for i, size in enumerate(sizes)]
+    results = await asyncio.gather(*[batcher.process(items) for items in requests])
+
+    assert results == [[2 * item for item in items] for items in requests]
+    assert batcher.num_items == 16
+    assert batcher.num_batches == 2
+
+
+@pytest.mark.asyncio
+async def test_dynamic_batcher_max_wait_time():
+    """Tests that a batch waits for more items until it is full or the wait ends."""
+    batch_sizes = []
+
+    async def record(items: list[int]) -> list[int]:
+        batch_sizes.append(len(items))
+        return await double(items)
+
+    batcher = DynamicBatcher(record, max_batch_size=8, max_wait_time=60)
+    first = asyncio.create_task(batcher.process([1, 2]))
+    await asyncio.sleep(0)
+    assert batcher.num_batches == 0
+    assert await batcher.process(list(range(6))) == [2 * item for item in range(6)]
+    assert await first == [2, 4]
+    assert batch_sizes == [8]
+
+    batcher = DynamicBatcher(record, max_batch_size=8, max_wait_time=0.01)
+    assert await batcher.process([1, 2]) == [2, 4]
+    assert batch_sizes == [8, 2]
+
+
+@pytest.mark.asyncio
+async def test_dynamic_batcher_error():
+    """Tests that an error is raised to all requests of the batch."""
+
+    async def fail(items):
+        raise ValueError("Batch failed")  # noqa: TRY003
+
+    batcher = DynamicBatcher(fail, max_batch_size=4, max_wait_time=0.01)
+    results = await asyncio.gather(
+        batcher.process([1, 2]), batcher.process([3]), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert batcher.num_batches == 1
+
+
+@pytest.mark.asyncio
+async def test_dynamic_batcher_cancelled_request():
+    """Tests that the items of a cancelled request are not processed."""
+    batcher = DynamicBatcher(double, max_batch_size=8, max_wait_time=0.05)
+    cancelled = asyncio.create_task(batcher.process([1, 2, 3]))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    assert await batcher.process([4]) == [8]
+    assert batcher.num_items == 1
+
+
+@pytest.mark.asyncio
+async def test_batched_captioning():
+    """Tests that the frames of concurrent videos are captioned in full batches."""
+    unbatched_handle = StubGpuCaptioningHandle()
+    await caption_videos(unbatched_handle)
+    assert unbatched_handle.batch_sizes == [FRAME_BATCH_SIZE] * (
+        NUM_VIDEOS * NUM_FRAME_BATCHES
+    )
+
+    gpu_handle = StubGpuCaptioningHandle()
+    await caption_videos(
+        BatchedCaptioningHandle(
+            gpu_handle, max_batch_size=MAX_BATCH_SIZE, max_wait_time=0.01
+        )
+    )
+    # the frames of all videos fit in one batch
+    assert gpu_handle.batch_sizes == [NUM_VIDEOS * FRAME_BATCH_SIZE] * NUM_FRAME_BATCHES
+
+
+@benchmark
+@pytest.mark.asyncio
+async def test_batched_captioning_benchmark():
+    """Compares captioning concurrent videos with and without batching."""
+    unbatched_handle = StubGpuCaptioningHandle()
+    unbatched_latency = await caption_videos(unbatched_handle)
+
+    gpu_handle = StubGpuCaptioningHandle()
+    batched_latency = await caption_videos(
+        BatchedCaptioningHandle(
+            gpu_handle, max_batch_size=MAX_BATCH_SIZE, max_wait_time=0.01
+        )
+    )
+
+    def mean(sizes: list[int]) -> float:
+        return sum(sizes) / len(sizes)
+
+    print(
+        f"\nCaptioning {NUM_VIDEOS} videos: unbatched {unbatched_latency:.3f}s "
+        f"(mean batch size {mean(unbatched_handle.batch_sizes):.1f}), "
+        f"batched {batched_latency:.3f}s "
+        f"(mean batch size {mean(gpu_handle.batch_sizes):.1f})"
+    )
+    assert batched_latency < unbatched_latency / 2
+
+
+@pytest.mark.asyncio
+async def test_index_video_batched_captioning(stub_endpoint, db_session):
+    """Tests indexing concurrent videos with the frames captioned together."""
+    captioning_handle = BatchedCaptioningHandle(
+        StubCaptioningHandle(), max_batch_size=MAX_BATCH_SIZE, max_wait_time=0.01
+    )
+    stub_endpoint.captioning_handle = captioning_handle
+    results = await asyncio.gather(*[index(stub_endpoint) for _ in range(4)])
+
+    caption_repo = ExtendedVideoCaptionRepository(db_session)
+    for outputs, _, media_id in results:
+        streamed_captions = [
+            c for o in outputs if "captions" in o for c in o["captions"]
+        ]
+        captions = caption_repo.get_captions(
+            model_name=settings.captioning_model_name, media_id=media_id
+        )
+        assert captions["captions"] == streamed_captions
+        assert captions["captions"] == [
+            f"caption {frame_id}" for frame_id in captions["frame_ids"]
+        ]
+    batcher = captioning_handle.batcher
+    assert batcher.num_batches < batcher.num_items / 2
@@ -0,0 +1,204 @@
+# ruff: noqa: S101
+
+import asyncio
+
+import pytest
+
+from aana.core.models.chat import ChatMessage
+from aana.core.models.sampling import SamplingParams
+from aana.core.models.video import VideoMetadata
+from aana_chat_with_video.core.models.video_chat import VideoChatContext
+from aana_chat_with_video.endpoints import video_chat_session
+from aana_chat_with_video.endpoints.video_chat_session import VideoChatSessionEndpoint
+from aana_chat_with_video.exceptions.core import (
+    ChatSessionNotFoundException,
+    ChatSessionTooLongException,
+)
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.utils.chat_session import ChatSessionStore
+from aana_chat_with_video.utils.retrieval import estimate_tokens
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        """Constructor."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Current time."""
+        return self.now
+
+
+def make_first_exchange() -> list[ChatMessage]:
+    """Creates the pinned first exchange of a session."""
+    return [
+        ChatMessage(content="system prompt", role="system"),
+        ChatMessage(content="timeline " * 100 + "first question", role="user"),
+        ChatMessage(content="first answer", role="assistant"),
+    ]
+
+
+def test_chat_session_store_ttl_and_lru():
+    """Tests session expiration, LRU eviction and invalidation."""
+    clock = FakeClock()
+    store = ChatSessionStore(ttl=60, max_sessions=2, clock=clock)
+
+    store.create("a", media_id="video_a", version=1, messages=make_first_exchange())
+    clock.now = 30
+    store.create("b", media_id="video_b", version=1, messages=make_first_exchange())
+    clock.now = 50
+    # accessing the session refreshes its expiration time
+    assert store.get("a") is not None
+    clock.now = 100
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert len(store) == 1
+
+    store.create("c", media_id="video_a", version=1, messages=make_first_exchange())
+    store.create("d", media_id="video_b", version=1, messages=make_first_exchange())
+    # "a" is the least recently used session
+    assert store.get("a") is None
+    assert len(store) == 2
+
+    store.invalidate("video_a")
+    assert store.get("c") is None
+    assert store.get("d") is not None
+    store.delete("d")
+    assert len(store) == 0
+
+
+def test_chat_session_turns_and_trim():
+    """Tests that follow-up turns are appended and the oldest are trimmed first."""
+    store = ChatSessionStore(ttl=60, max_sessions=10, clock=FakeClock())
+    session = store.create(
+        "a", media_id="video_a", version=1, messages=make_first_exchange()
+    )
+
+    for i in range(5):
+        dialog = session.get_dialog(f"question {i}")
+        assert dialog.messages[:3] == make_first_exchange()
+        assert dialog.messages[-1] == ChatMessage(content=f"question {i}", role="user")
+        session.add_turn(f"question {i}", "answer " * 50)
+    assert len(session.messages) == 3 + 2 * 5
+
+    pinned_tokens = sum(len(m.content) for m in make_first_exchange()) / 4
+    session.trim(max_tokens=int(pinned_tokens) + 200, reserved_tokens=10)
+    assert session.messages[:3] == make_first_exchange()
+    assert len(session.messages) == 3 + 2 * 2
+    # the most recent turns are kept
+    assert session.messages[3].content == "question 3"
+    assert session.messages[5].content == "question 4"
+
+    pinned_tokens = sum(estimate_tokens(m.content) for m in make_first_exchange())
+    session.trim(max_tokens=pinned_tokens)
+    assert session.messages == make_first_exchange()
+
+    # the first exchange is never trimmed, a question that doesn't fit is rejected
+    session.add_turn("question 5", "answer 5")
+    with pytest.raises(ChatSessionTooLongException):
+        session.trim(max_tokens=pinned_tokens + 9, reserved_tokens=10)
+    assert len(session.messages) == 3 + 2
+
+
+class StubLlmHandle:
+    """Stub for the LLM deployment that streams a fixed answer."""
+
+    def __init__(self):
+        """Constructor."""
+        self.dialogs = []
+
+    async def chat_stream(self, dialog, sampling_params):
+        """Stream the answer token by token."""
+        self.dialogs.append(dialog)
+        for token in ["an ", "answer"]:
+            await asyncio.sleep(0.01)
+            yield {"text": token}
+
+
+@pytest.fixture(scope="function")
+def chat_endpoint(mocker):
+    """Creates a chat session endpoint with a stubbed LLM and video."""
+    context = VideoChatContext(
+        status=VideoProcessingStatus.COMPLETED,
+        metadata=VideoMetadata(title="A talk", description=""),
+        version=1,
+        timeline=None,
+    )
+
+    async def run_in_session(func, *args, **kwargs):
+        return context
+
+    async def get_rendered_timeline(media_id, version, timeline=None):
+        return "TIMELINE"
+
+    store = ChatSessionStore(ttl=60, max_sessions=10, clock=FakeClock())
+    mocker.patch.object(video_chat_session, "chat_session_store", store)
+    mocker.patch.object(video_chat_session, "run_in_session", run_in_session)
+    endpoint = VideoChatSessionEndpoint(
+        name="video_chat_session", path="/video/chat_session_stream", summary=""
+    )
+    endpoint.llm_handle = StubLlmHandle()
+    endpoint.get_rendered_timeline = get_rendered_timeline
+    return endpoint
+
+
+async def ask(endpoint, question: str, session_id: str = "") -> list[dict]:
+    """Ask a question about a video and return the outputs."""
+    return [
+        output
+        async for output in endpoint.run(
+            media_id="video_a",
+            question=question,
+            sampling_params=SamplingParams(),
+            session_id=session_id,
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_chat_session_endpoint(chat_endpoint):
+    """Tests that the session exists once its ID is returned."""
+    store = video_chat_session.chat_session_store
+    stream = chat_endpoint.run(
+        media_id="video_a",
+        question="first question",
+        sampling_params=SamplingParams(),
+    )
+    session_id = (await anext(stream))["session_id"]
+    assert store.get(session_id) is not None
+
+    # the follow-up question waits for the first answer
+    follow_up = asyncio.create_task(ask(chat_endpoint, "second question", session_id))
+    await asyncio.sleep(0.05)
+    assert not follow_up.done()
+    async for _ in stream:
+        pass
+    outputs = await follow_up
+    assert {output["session_id"] for output in outputs} == {session_id}
+
+    # the follow-up question comes after the complete first exchange
+    dialog = chat_endpoint.llm_handle.dialogs[-1]
+    assert dialog.messages[-2] == ChatMessage(content="an answer", role="assistant")
+    assert dialog.messages[-1] == ChatMessage(content="second question", role="user")
+
+
+@pytest.mark.asyncio
+async def test_chat_session_endpoint_unknown_session(chat_endpoint):
+    """Tests that follow-up questions with an unknown session ID are rejected."""
+    with pytest.raises(ChatSessionNotFoundException):
+        await ask(chat_endpoint, "a question", session_id="unknown")
+    assert chat_endpoint.llm_handle.dialogs == []
+
+
+@pytest.mark.asyncio
+async def test_chat_session_endpoint_too_long(chat_endpoint, mocker):
+    """Tests that a follow-up question is rejected if the first exchange is too long."""
+    outputs = await ask(chat_endpoint, "first question")
+    session_id = outputs[0]["session_id"]
+
+    mocker.patch.object(video_chat_session.settings.chat_session, "max_tokens", 10)
+    with pytest.raises(ChatSessionTooLongException):
+        await ask(chat_endpoint, "second question", session_id)
+    assert len(chat_endpoint.llm_handle.dialogs) == 1
@@ -0,0 +1,162 @@
+# ruff: noqa: S101
+# Reuse of the outputs of identical videos indexed under another media ID
+# with stubbed deployments.
+
+import uuid
+from importlib import resources
+
+import pytest
+
+from aana.core.models.vad import VadParams
+from aana.core.models.video import Video, VideoInput, VideoParams
+from aana.core.models.whisper import BatchedWhisperParams
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.endpoints import index_video
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.storage.repository.extended_video import (
+    ExtendedVideoRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_caption import (
+    ExtendedVideoCaptionRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_timeline import (
+    ExtendedVideoTimelineRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_transcript import (
+    ExtendedVideoTranscriptRepository,
+)
+from aana_chat_with_video.tests.utils import (
+    FRAME_BATCH_SIZE,
+    NUM_ASR_CHUNKS,
+    NUM_FRAME_BATCHES,
+    CountingAsrHandle,
+    FlakyCaptioningHandle,
+    benchmark,
+    index,
+)
+from aana_chat_with_video.utils.timeline import get_timeline_params
+
+VIDEO_URL = "https://example.com/squirrel.mp4"
+
+
+async def index_url(endpoint, media_id: str, video_params: VideoParams) -> list[dict]:
+    """Index a dummy video from a URL and return the outputs."""
+    return [
+        output
+        async for output in endpoint.run(
+            video=VideoInput(url=VIDEO_URL, media_id=media_id),
+            video_params=video_params,
+            whisper_params=BatchedWhisperParams(),
+            vad_params=VadParams(),
+        )
+    ]
+
+
+@pytest.fixture(scope="function")
+def counting_endpoint(stub_endpoint, mocker):
+    """Enables the content cache and counts the processed chunks and batches."""
+    mocker.patch.object(settings, "content_cache", True)
+    stub_endpoint.asr_handle = CountingAsrHandle()
+    stub_endpoint.captioning_handle = FlakyCaptioningHandle()
+    return stub_endpoint
+
+
+@pytest.mark.asyncio
+async def test_content_cache_file(counting_endpoint, db_session):
+    """Indexing the same file under a new media ID copies the outputs."""
+    outputs, _, media_id = await index(counting_endpoint)
+    assert counting_endpoint.asr_handle.num_chunks == NUM_ASR_CHUNKS
+    assert counting_endpoint.captioning_handle.num_batches == NUM_FRAME_BATCHES
+
+    copied_outputs, _, copied_media_id = await index(counting_endpoint)
+
+    # no chunk is transcribed and no batch is captioned again
+    assert counting_endpoint.asr_handle.num_chunks == NUM_ASR_CHUNKS
+    assert counting_endpoint.captioning_handle.num_batches == NUM_FRAME_BATCHES
+
+    num_captions = NUM_FRAME_BATCHES * FRAME_BATCH_SIZE
+    streamed_captions = [
+        c for o in copied_outputs if "captions" in o for c in o["captions"]
+    ]
+    assert streamed_captions == [f"caption {i}" for i in range(num_captions)]
+    assert set(copied_outputs[-1]["caption_ids"]).isdisjoint(
+        outputs[-1]["caption_ids"]
+    )
+    assert copied_outputs[-1]["transcription_id"] != outputs[-1]["transcription_id"]
+
+    video_repo = ExtendedVideoRepository(db_session)
+    assert video_repo.get_status(copied_media_id) == VideoProcessingStatus.COMPLETED
+    transcript_repo = ExtendedVideoTranscriptRepository(db_session)
+    assert transcript_repo.get_transcript(
+        model_name=settings.asr_model_name, media_id=copied_media_id
+    )["transcription"] == transcript_repo.get_transcript(
+        model_name=settings.asr_model_name, media_id=media_id
+    )["transcription"]
+    timeline_repo = ExtendedVideoTimelineRepository(db_session)
+    assert timeline_repo.get_timeline(
+        **get_timeline_params(copied_media_id)
+    ) == timeline_repo.get_timeline(**get_timeline_params(media_id))
+
+    # the copy is independent of the source video
+    video_repo.delete(media_id)
+    captions = ExtendedVideoCaptionRepository(db_session).get_captions(
+        model_name=settings.captioning_model_name, media_id=copied_media_id
+    )
+    assert len(captions["captions"]) == num_captions
+
+
+@benchmark
+@pytest.mark.asyncio
+async def test_content_cache_benchmark(counting_endpoint):
+    """Compares the latency of processing a file and copying its outputs."""
+    _, latency, _ = await index(counting_endpoint)
+    _, copied_latency, _ = await index(counting_endpoint)
+    print(f"Indexing latency: processed {latency:.3f}s, copied {copied_latency:.3f}s")
+    assert copied_latency < latency
+
+
+@pytest.mark.asyncio
+async def test_content_cache_url(counting_endpoint, db_session, mocker):
+    """Identical URLs are copied without downloading the video again."""
+    path = resources.path("aana.tests.files.videos", "squirrel.mp4")
+    num_downloads = 0
+
+    def download_video(video_input):
+        nonlocal num_downloads
+        num_downloads += 1
+        return Video(
+            path=path,
+            url=video_input.url,
+            media_id=video_input.media_id,
+            title="Squirrel",
+        )
+
+    async def probe_video_metadata(url, timeout):
+        return None
+
+    mocker.patch.object(index_video, "download_video", download_video)
+    mocker.patch.object(index_video, "probe_video_metadata", probe_video_metadata)
+
+    await index_url(counting_endpoint, str(uuid.uuid4()), VideoParams())
+    media_id = str(uuid.uuid4())
+    outputs = await index_url(counting_endpoint, media_id, VideoParams())
+    assert num_downloads == 1
+    assert counting_endpoint.asr_handle.num_chunks == NUM_ASR_CHUNKS
+    assert outputs[0]["metadata"].title == "Squirrel"
+    assert ExtendedVideoRepository(db_session).get_status(
+        media_id
+    ) == VideoProcessingStatus.COMPLETED
+
+    # other parameters produce other captions, so the video is processed again
+    await index_url(counting_endpoint, str(uuid.uuid4()), VideoParams(extract_fps=2.0))
+    assert num_downloads == 2
+    assert counting_endpoint.asr_handle.num_chunks == 2 * NUM_ASR_CHUNKS
+
+
+@pytest.mark.asyncio
+async def test_content_cache_disabled(counting_endpoint, mocker):
+    """Videos are processed again if the content cache is disabled."""
+    mocker.patch.object(settings, "content_cache", False)
+    await index(counting_endpoint)
+    await index(counting_endpoint)
+    assert counting_endpoint.asr_handle.num_chunks == 2 * NUM_ASR_CHUNKS
@@ -0,0 +1,159 @@
+# ruff: noqa: S101
+# Concurrent status and chat requests with the database queries run on the
+# event loop and in the database thread pool.
+
+import asyncio
+import threading
+import time
+import uuid
+from importlib import resources
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from aana.core.models.video import Video
+from aana.exceptions.db import NotFoundException
+from aana_chat_with_video.storage import session as db_session_module
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.storage.repository.extended_video import (
+    ExtendedVideoRepository,
+)
+from aana_chat_with_video.storage.session import AsyncRepository, run_in_session
+from aana_chat_with_video.tests.utils import benchmark
+
+NUM_STATUS_REQUESTS = 40
+NUM_CHAT_REQUESTS = 10
+NUM_TOKENS = 20
+DB_LATENCY = 0.005  # seconds per statement, a round trip to a database server
+TOKEN_LATENCY = 0.01  # seconds per generated token
+
+TIMELINE_PARAMS = {
+    "asr_model_name": "whisper",
+    "captioning_model_name": "blip2",
+    "chunk_size": 10.0,
+}
+
+
+@pytest.fixture(scope="function")
+def media_id(db_session, mocker):
+    """Saves a dummy video and routes the async sessions to the test database."""
+    engine = db_session.get_bind()
+    mocker.patch.object(db_session_module, "get_session", lambda: Session(engine))
+    media_id = str(uuid.uuid4())
+    path = resources.path("aana.tests.files.videos", "squirrel.mp4")
+    ExtendedVideoRepository(db_session).save(
+        Video(path=path, media_id=media_id), duration=10
+    )
+    return media_id
+
+
+@pytest.mark.asyncio
+async def test_async_repository(db_session, media_id):
+    """Tests calling repository methods in the database thread pool."""
+    video_repo = AsyncRepository(ExtendedVideoRepository)
+    assert await video_repo.get_status(media_id) == VideoProcessingStatus.CREATED
+
+    await video_repo.update_status(media_id, VideoProcessingStatus.RUNNING)
+    assert await run_in_session(
+        lambda session, media_id: ExtendedVideoRepository(session).get_status(media_id),
+        media_id,
+    ) == VideoProcessingStatus.RUNNING
+
+    with pytest.raises(NotFoundException):
+        await video_repo.get_status("unknown_media_id")
+
+
+@pytest.mark.asyncio
+async def test_db_concurrency(db_session, media_id):
+    """Tests that the queries of concurrent requests run in the database thread pool."""
+    engine = db_session.get_bind()
+    query_threads = set()
+
+    def record_thread(*args):
+        query_threads.add(threading.current_thread().name)
+
+    video_repo = AsyncRepository(ExtendedVideoRepository)
+    event.listen(engine, "before_cursor_execute", record_thread)
+    try:
+        statuses, contexts = await asyncio.gather(
+            asyncio.gather(
+                *[video_repo.get_status(media_id) for _ in range(NUM_STATUS_REQUESTS)]
+            ),
+            asyncio.gather(
+                *[
+                    video_repo.get_chat_context(media_id, **TIMELINE_PARAMS)
+                    for _ in range(NUM_CHAT_REQUESTS)
+                ]
+            ),
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record_thread)
+
+    assert statuses == [VideoProcessingStatus.CREATED] * NUM_STATUS_REQUESTS
+    metadata = ExtendedVideoRepository(db_session).get_metadata(media_id)
+    assert [context.metadata for context in contexts] == [metadata] * NUM_CHAT_REQUESTS
+    # the threads of db_executor are named db_0, db_1, ...
+    assert len(query_threads) > 0
+    assert all(name.startswith("db_") for name in query_threads)
+
+
+@benchmark
+@pytest.mark.asyncio
+async def test_db_concurrency_benchmark(db_session, media_id):
+    """Compares the tail latency of concurrent requests with blocking and offloaded queries."""
+    engine = db_session.get_bind()
+
+    def add_latency(*args):
+        time.sleep(DB_LATENCY)
+
+    async def blocking_query(method: str, *args, **kwargs):
+        with Session(engine) as session:
+            return getattr(ExtendedVideoRepository(session), method)(*args, **kwargs)
+
+    async def offloaded_query(method: str, *args, **kwargs):
+        return await getattr(AsyncRepository(ExtendedVideoRepository), method)(
+            *args, **kwargs
+        )
+
+    async def run_requests(query) -> tuple[float, float]:
+        status_latencies = []
+        token_gaps = []
+        # all requests arrive at the same time
+        start = time.perf_counter()
+
+        async def status_request():
+            await query("get_status", media_id)
+            status_latencies.append(time.perf_counter() - start)
+
+        async def chat_request():
+            await query("get_chat_context", media_id, **TIMELINE_PARAMS)
+            last_token = time.perf_counter()
+            for _ in range(NUM_TOKENS):
+                await asyncio.sleep(TOKEN_LATENCY)
+                now = time.perf_counter()
+                token_gaps.append(now - last_token)
+                last_token = now
+
+        await asyncio.gather(
+            *[chat_request() for _ in range(NUM_CHAT_REQUESTS)],
+            *[status_request() for _ in range(NUM_STATUS_REQUESTS)],
+        )
+        return np.percentile(status_latencies, 99), max(token_gaps)
+
+    event.listen(engine, "before_cursor_execute", add_latency)
+    try:
+        blocking_p99, blocking_gap = await run_requests(blocking_query)
+        offloaded_p99, offloaded_gap = await run_requests(offloaded_query)
+    finally:
+        event.remove(engine, "before_cursor_execute", add_latency)
+
+    print(
+        f"\nstatus p99: blocking {blocking_p99 * 1000:.1f} ms, "
+        f"offloaded {offloaded_p99 * 1000:.1f} ms\n"
+        f"max gap between chat tokens: blocking {blocking_gap * 1000:.1f} ms, "
+        f"offloaded {offloaded_gap * 1000:.1f} ms"
+    )
+    assert offloaded_p99 < blocking_p99
+    assert offloaded_gap < blocking_gap
@@ -0,0 +1,87 @@
+# ruff: noqa: S101
+import os
+
+import pytest
+
+from aana.core.models.video import VideoMetadata
+from aana_chat_with_video.configs.settings import Settings
+from aana_chat_with_video.core.models.prompt import PromptLayout
+from aana_chat_with_video.core.models.timeline import TimelineFormat
+from aana_chat_with_video.utils.core import generate_dialog
+from aana_chat_with_video.utils.timeline import render_timeline
+
+questions = [
+    "What is the video about?",
+    "Which person is speaking at the beginning? {not a placeholder}",
+    "",
+]
+
+
+def render_dialog(dialog) -> str:
+    """Concatenates the messages of a dialog like a chat template would."""
+    return "".join(
+        f"<|{message.role}|>{message.content}<|end|>" for message in dialog.messages
+    )
+
+
+@pytest.mark.parametrize("timeline_format", list(TimelineFormat))
+def test_timeline_first_prompt_prefix(timeline_format):
+    """Tests that prompts about the same video only differ after the shared prefix."""
+    metadata = VideoMetadata(title="A talk", description="")
+    timeline = render_timeline(
+        [
+            {
+                "start_time": 0.0,
+                "end_time": 10.0,
+                "audio_transcript": "Hello {everyone}",
+                "visual_caption": "a man standing in front of a screen",
+            }
+        ],
+        timeline_format,
+    )
+
+    prompts = []
+    for question in questions:
+        dialog = generate_dialog(
+            metadata=metadata,
+            timeline=timeline,
+            question=question,
+            timeline_format=timeline_format,
+            prompt_layout=PromptLayout.TIMELINE_FIRST,
+        )
+        prompt = render_dialog(dialog)
+        assert prompt.endswith(f"{question}<|end|>")
+        prompts.append(prompt)
+
+    prefix = os.path.commonprefix(prompts)
+    # the question is the only part that differs
+    for question, prompt in zip(questions, prompts, strict=True):
+        assert prompt == f"{prefix}{question}<|end|>"
+    assert timeline in prefix
+    assert metadata.title in prefix
+
+
+def test_question_first_prompt():
+    """Tests that the question-first layout asks the question before the timeline."""
+    metadata = VideoMetadata(title="A talk", description="")
+    dialog = generate_dialog(
+        metadata=metadata,
+        timeline="TIMELINE",
+        question="QUESTION",
+        prompt_layout=PromptLayout.QUESTION_FIRST,
+    )
+    user_prompt = dialog.messages[1].content
+    assert user_prompt.index("QUESTION") < user_prompt.index("TIMELINE")
+
+
+def test_default_prompt_layout():
+    """Tests that the dialog uses the prompt layout of the default settings."""
+    metadata = VideoMetadata(title="A talk", description="")
+    assert generate_dialog(
+        metadata=metadata, timeline="TIMELINE", question="QUESTION"
+    ) == generate_dialog(
+        metadata=metadata,
+        timeline="TIMELINE",
+        question="QUESTION",
+        prompt_layout=Settings.model_fields["prompt_layout"].default,
+    )
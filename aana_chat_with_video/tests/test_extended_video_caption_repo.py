@@ -7,9 +7,13 @@ import pytest
 
 from aana.core.models.captions import Caption
 from aana.exceptions.db import NotFoundException
+from aana_chat_with_video.storage.models.extended_video_caption import (
+    ExtendedVideoCaptionEntity,
+)
 from aana_chat_with_video.storage.repository.extended_video_caption import (
     ExtendedVideoCaptionRepository,
 )
+from aana_chat_with_video.tests.utils import benchmark, measure
 
 
 @pytest.fixture(scope="function")
@@ -89,6 +93,39 @@ def test_save_all_captions(db_session, dummy_caption):
             caption_repo.read(caption_id)
 
 
+def test_save_caption_batch(db_session):
+    """Tests saving captions with a bulk insert."""
+    model_name = "blip2"
+    media_id = "test_media_id_save_batch"
+    captions = [Caption(f"This is a caption {i}") for i in range(5)]
+    timestamps = [i * 0.5 for i in range(5)]
+    frame_ids = list(range(5))
+
+    caption_repo = ExtendedVideoCaptionRepository(db_session)
+    assert caption_repo.save_batch(model_name, media_id, [], [], []) == []
+    caption_ids = caption_repo.save_batch(
+        model_name=model_name,
+        media_id=media_id,
+        captions=captions,
+        timestamps=timestamps,
+        frame_ids=frame_ids,
+    )
+    assert len(caption_ids) == 5
+
+    for caption_id, caption, timestamp, frame_id in zip(
+        caption_ids, captions, timestamps, frame_ids, strict=True
+    ):
+        caption_entity = caption_repo.read(caption_id)
+        assert caption_entity.caption == caption
+        assert caption_entity.timestamp == timestamp
+        assert caption_entity.frame_id == frame_id
+        assert caption_entity.media_id == media_id
+        assert caption_entity.caption_type == "extended_video_caption"
+
+    saved_captions = caption_repo.get_captions(model_name, media_id)
+    assert saved_captions["caption_ids"] == caption_ids
+
+
 def test_get_captions(db_session, dummy_caption):
     """Tests getting all captions."""
     captions, frame_ids, timestamps = [], [], []
@@ -121,3 +158,66 @@ def test_get_captions(db_session, dummy_caption):
         caption_repo.delete(caption_entity.id)
         with pytest.raises(NotFoundException):
             caption_repo.read(caption_entity.id)
+
+
+def save_captions(caption_repo, model_name, media_id, num_captions):
+    """Saves captions for a video with one caption per frame."""
+    caption_repo.save_batch(
+        model_name=model_name,
+        media_id=media_id,
+        captions=[f"This is a caption {i}" for i in range(num_captions)],
+        timestamps=[i / 30 for i in range(num_captions)],
+        frame_ids=list(range(num_captions)),
+    )
+
+
+def get_captions_orm(session, model_name, media_id):
+    """Gets the captions of a video by loading ORM entities."""
+    entities = (
+        session.query(ExtendedVideoCaptionEntity)
+        .filter_by(media_id=media_id, model=model_name)
+        .order_by(ExtendedVideoCaptionEntity.frame_id)
+        .all()
+    )
+    return {
+        "captions": [c.caption for c in entities],
+        "timestamps": [c.timestamp for c in entities],
+        "frame_ids": [c.frame_id for c in entities],
+        "caption_ids": [c.id for c in entities],
+    }
+
+
+def test_get_captions_matches_orm(db_session):
+    """Tests that the column-only caption query returns the same as loading ORM entities."""
+    model_name = "blip2"
+    media_id = "test_media_id_get_captions_orm"
+    caption_repo = ExtendedVideoCaptionRepository(db_session)
+    save_captions(caption_repo, model_name, media_id, num_captions=100)
+
+    assert caption_repo.get_captions(model_name, media_id) == get_captions_orm(
+        db_session, model_name, media_id
+    )
+
+
+@benchmark
+def test_get_captions_benchmark(db_session):
+    """Compares the column-only caption query with loading ORM entities."""
+    model_name = "blip2"
+    media_id = "test_media_id_get_captions_benchmark"
+    num_captions = 5000
+    caption_repo = ExtendedVideoCaptionRepository(db_session)
+    save_captions(caption_repo, model_name, media_id, num_captions)
+
+    orm_time = measure(
+        lambda: get_captions_orm(db_session, model_name, media_id),
+        setup=db_session.expunge_all,
+    )
+    columns_time = measure(
+        lambda: caption_repo.get_captions(model_name, media_id),
+        setup=db_session.expunge_all,
+    )
+    print(
+        f"\nget_captions ({num_captions} captions): "
+        f"ORM {orm_time * 1000:.1f} ms, columns {columns_time * 1000:.1f} ms"
+    )
+    assert columns_time < orm_time
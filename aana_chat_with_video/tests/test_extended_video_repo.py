@@ -4,6 +4,7 @@ import uuid
 from importlib import resources
 
 import pytest
+from sqlalchemy import event
 
 from aana.core.models.video import Video, VideoMetadata
 from aana.exceptions.db import MediaIdAlreadyExistsException, NotFoundException
@@ -11,6 +12,9 @@ from aana_chat_with_video.storage.models.extended_video import VideoProcessingSt
 from aana_chat_with_video.storage.repository.extended_video import (
     ExtendedVideoRepository,
 )
+from aana_chat_with_video.storage.repository.extended_video_timeline import (
+    ExtendedVideoTimelineRepository,
+)
 
 
 @pytest.fixture(scope="function")
@@ -74,3 +78,72 @@ def test_status(db_session, dummy_video):
     with pytest.raises(NotFoundException):
         video_repo.get_status(dummy_video.media_id)
         video_repo.update_status(dummy_video.media_id, VideoProcessingStatus.COMPLETED)
+
+
+def test_get_chat_context(db_session, dummy_video):
+    """Tests getting the chat context of a video in a single query."""
+    timeline_params = {
+        "asr_model_name": "whisper",
+        "captioning_model_name": "blip2",
+        "chunk_size": 10.0,
+    }
+    timeline = [
+        {
+            "start_time": 0.0,
+            "end_time": 10.0,
+            "audio_transcript": "Hello",
+            "visual_caption": "a squirrel",
+        }
+    ]
+    video_repo = ExtendedVideoRepository(db_session)
+    video_repo.save(dummy_video, duration=10)
+
+    context = video_repo.get_chat_context(dummy_video.media_id, **timeline_params)
+    assert context.status == VideoProcessingStatus.CREATED
+    assert context.metadata == video_repo.get_metadata(dummy_video.media_id)
+    assert context.version is None
+    assert context.timeline is None
+
+    timeline_repo = ExtendedVideoTimelineRepository(db_session)
+    timeline_repo.save(
+        media_id=dummy_video.media_id, timeline=timeline, **timeline_params
+    )
+    db_session.expunge_all()
+    statements = []
+    event.listen(
+        db_session.get_bind(),
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    context = video_repo.get_chat_context(dummy_video.media_id, **timeline_params)
+    assert context.timeline == timeline
+    assert context.version is not None
+    assert len(statements) == 1
+    version = context.version
+
+    context = video_repo.get_chat_context(
+        dummy_video.media_id, **timeline_params, include_timeline=False
+    )
+    assert context.timeline is None
+    assert context.version == version
+
+    # a timeline rebuilt right away gets a new version if its content changed
+    timeline_repo.save(
+        media_id=dummy_video.media_id, timeline=timeline, **timeline_params
+    )
+    context = video_repo.get_chat_context(dummy_video.media_id, **timeline_params)
+    assert context.version == version
+    timeline_repo.save(
+        media_id=dummy_video.media_id,
+        timeline=[{**timeline[0], "visual_caption": "a cat"}],
+        **timeline_params,
+    )
+    context = video_repo.get_chat_context(dummy_video.media_id, **timeline_params)
+    assert context.version != version
+    context = video_repo.get_chat_context(
+        dummy_video.media_id, **{**timeline_params, "chunk_size": 5.0}
+    )
+    assert context.timeline is None
+
+    with pytest.raises(NotFoundException):
+        video_repo.get_chat_context("unknown_media_id", **timeline_params)
@@ -0,0 +1,122 @@
+# ruff: noqa: S101
+
+import uuid
+from importlib import resources
+
+import pytest
+
+from aana.core.models.asr import AsrSegment, AsrTranscription, AsrTranscriptionInfo
+from aana.core.models.time import TimeInterval
+from aana.core.models.video import Video
+from aana.exceptions.db import NotFoundException
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.core.models.timeline import TimelineChunking, TimelineFormat
+from aana_chat_with_video.storage.backfill import backfill_timelines
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.storage.repository.extended_video import (
+    ExtendedVideoRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_caption import (
+    ExtendedVideoCaptionRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_timeline import (
+    ExtendedVideoTimelineRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_transcript import (
+    ExtendedVideoTranscriptRepository,
+)
+from aana_chat_with_video.utils.timeline import get_timeline_params
+
+
+@pytest.fixture(scope="function")
+def dummy_timeline():
+    """Creates a dummy timeline for testing."""
+    return [
+        {
+            "start_time": 0.0,
+            "end_time": 10.0,
+            "audio_transcript": "This is a segment",
+            "visual_caption": "This is a caption",
+        }
+    ]
+
+
+def test_save_timeline(db_session, dummy_timeline):
+    """Tests saving and replacing a timeline."""
+    media_id = "test_media_id"
+    timeline_params = {
+        "media_id": media_id,
+        "asr_model_name": "whisper",
+        "captioning_model_name": "blip2",
+        "chunk_size": 10.0,
+    }
+
+    timeline_repo = ExtendedVideoTimelineRepository(db_session)
+    with pytest.raises(NotFoundException):
+        timeline_repo.get_timeline(**timeline_params)
+
+    timeline_repo.save(**timeline_params, timeline=dummy_timeline)
+    assert timeline_repo.get_timeline(**timeline_params) == dummy_timeline
+
+    timeline_repo.save(**timeline_params, timeline=[])
+    assert timeline_repo.get_timeline(**timeline_params) == []
+    assert timeline_repo.session.query(timeline_repo.model_class).count() == 1
+
+    with pytest.raises(NotFoundException):
+        timeline_repo.get_timeline(**{**timeline_params, "chunk_size": 20.0})
+    with pytest.raises(NotFoundException):
+        timeline_repo.get_timeline(
+            **timeline_params, chunking=TimelineChunking.ADAPTIVE
+        )
+    with pytest.raises(NotFoundException):
+        timeline_repo.get_timeline(**timeline_params, settings_hash="other")
+
+
+def test_timeline_settings_hash(monkeypatch):
+    """Tests that the timeline key changes with the settings that change the timeline."""
+    params = get_timeline_params("test_media_id")
+
+    monkeypatch.setattr(settings.timeline, "format", TimelineFormat.LINES)
+    assert get_timeline_params("test_media_id") == params
+
+    monkeypatch.setattr(settings.timeline, "collapse_repeated_captions", True)
+    new_params = get_timeline_params("test_media_id")
+    assert new_params["settings_hash"] != params["settings_hash"]
+
+
+def test_backfill_timelines(db_session):
+    """Tests building timelines for already indexed videos."""
+    media_id = str(uuid.uuid4())
+    path = resources.path("aana.tests.files.videos", "squirrel.mp4")
+    video_repo = ExtendedVideoRepository(db_session)
+    video_repo.save(Video(path=path, media_id=media_id), duration=10)
+    video_repo.update_status(media_id, VideoProcessingStatus.COMPLETED)
+
+    ExtendedVideoTranscriptRepository(db_session).save(
+        model_name=settings.asr_model_name,
+        media_id=media_id,
+        transcription_info=AsrTranscriptionInfo(),
+        transcription=AsrTranscription(text="This is a segment"),
+        segments=[
+            AsrSegment(
+                text="This is a segment", time_interval=TimeInterval(start=0, end=1)
+            )
+        ],
+    )
+    ExtendedVideoCaptionRepository(db_session).save_all(
+        model_name=settings.captioning_model_name,
+        media_id=media_id,
+        captions=["This is a caption"],
+        timestamps=[1.0],
+        frame_ids=[0],
+    )
+
+    assert backfill_timelines(db_session) == 1
+    assert backfill_timelines(db_session) == 0
+    assert backfill_timelines(db_session, overwrite=True) == 1
+
+    timeline = ExtendedVideoTimelineRepository(db_session).get_timeline(
+        **get_timeline_params(media_id)
+    )
+    assert timeline[0]["audio_transcript"] == "This is a segment"
+    assert timeline[0]["visual_caption"] == "This is a caption"
@@ -2,13 +2,21 @@
 
 import pytest
 
-from aana.core.models.asr import AsrSegment, AsrTranscription, AsrTranscriptionInfo
+from aana.core.models.asr import (
+    AsrSegment,
+    AsrTranscription,
+    AsrTranscriptionInfo,
+    AsrWord,
+)
 from aana.core.models.time import TimeInterval
 from aana.exceptions.db import NotFoundException
 from aana.storage.models.transcript import TranscriptEntity
+from aana_chat_with_video.core.models.transcript import TranscriptSegments
 from aana_chat_with_video.storage.repository.extended_video_transcript import (
     ExtendedVideoTranscriptRepository,
 )
+from aana_chat_with_video.tests.utils import benchmark, measure
+from aana_chat_with_video.utils.core import generate_combined_timeline
 
 transcript_entity = TranscriptEntity.from_asr_output(
     model_name="whisper",
@@ -85,3 +93,105 @@ def test_get_transcript(db_session, dummy_transcript):
     assert isinstance(transcript["segments"], list)
     assert all(isinstance(s, AsrSegment) for s in transcript["segments"])
     assert isinstance(transcript["transcription_info"], AsrTranscriptionInfo)
+
+
+def test_get_transcript_segments(db_session, dummy_transcript):
+    """Tests getting the segments of a transcript without validation."""
+    transcript, segments, info = dummy_transcript
+    model_name = "whisper"
+    media_id = "test_media_id_segments"
+
+    transcript_repo = ExtendedVideoTranscriptRepository(db_session)
+    transcript_repo.save(
+        model_name=model_name,
+        media_id=media_id,
+        transcription_info=info,
+        transcription=transcript,
+        segments=segments,
+    )
+
+    transcript_segments = transcript_repo.get_transcript_segments(model_name, media_id)
+    assert transcript_segments == TranscriptSegments(
+        texts=["This is a segment"], starts=[0.0], ends=[1.0]
+    )
+
+    with pytest.raises(NotFoundException):
+        transcript_repo.get_transcript_segments("other_model", media_id)
+
+
+def save_talk(transcript_repo, model_name, media_id, duration):
+    """Saves the transcript of a talk with a 4-second segment of 10 words every 5 seconds."""
+    segments = [
+        AsrSegment(
+            text=" ".join(f"word{j}" for j in range(10)),
+            time_interval=TimeInterval(start=i * 5.0, end=i * 5.0 + 4.0),
+            confidence=0.9,
+            no_speech_confidence=0.1,
+            words=[
+                AsrWord(
+                    word=f"word{j}",
+                    time_interval=TimeInterval(
+                        start=i * 5.0 + j * 0.4, end=i * 5.0 + (j + 1) * 0.4
+                    ),
+                    alignment_confidence=0.9,
+                )
+                for j in range(10)
+            ],
+        )
+        for i in range(int(duration // 5))
+    ]
+    transcript_repo.save(
+        model_name=model_name,
+        media_id=media_id,
+        transcription_info=AsrTranscriptionInfo(language="en", language_confidence=0.9),
+        transcription=AsrTranscription(text=" ".join(s.text for s in segments)),
+        segments=segments,
+    )
+    return segments
+
+
+def build_from_asr_segments(transcript_repo, model_name, media_id):
+    """Builds a timeline from the validated ASR segments of a transcript."""
+    transcript = transcript_repo.get_transcript(model_name, media_id)
+    return generate_combined_timeline(transcript["segments"], [], [])
+
+
+def build_from_transcript_segments(transcript_repo, model_name, media_id):
+    """Builds a timeline from the transcript segments of a transcript."""
+    transcript_segments = transcript_repo.get_transcript_segments(model_name, media_id)
+    return generate_combined_timeline(transcript_segments, [], [])
+
+
+def test_transcript_segments_timeline(db_session):
+    """Tests that a timeline built from transcript segments matches the one from ASR segments."""
+    model_name = "whisper"
+    media_id = "test_media_id_segments_timeline"
+    transcript_repo = ExtendedVideoTranscriptRepository(db_session)
+    save_talk(transcript_repo, model_name, media_id, duration=10 * 60)
+
+    assert build_from_transcript_segments(
+        transcript_repo, model_name, media_id
+    ) == build_from_asr_segments(transcript_repo, model_name, media_id)
+
+
+@benchmark
+def test_get_transcript_segments_benchmark(db_session):
+    """Compares building a timeline from validated ASR segments and from transcript segments."""
+    model_name = "whisper"
+    media_id = "test_media_id_segments_benchmark"
+    transcript_repo = ExtendedVideoTranscriptRepository(db_session)
+    segments = save_talk(transcript_repo, model_name, media_id, duration=2 * 60 * 60)
+
+    asr_segments_time = measure(
+        lambda: build_from_asr_segments(transcript_repo, model_name, media_id),
+        setup=db_session.expunge_all,
+    )
+    transcript_segments_time = measure(
+        lambda: build_from_transcript_segments(transcript_repo, model_name, media_id),
+        setup=db_session.expunge_all,
+    )
+    print(
+        f"\n{len(segments)} segments: AsrSegment {asr_segments_time * 1000:.1f} ms, "
+        f"TranscriptSegments {transcript_segments_time * 1000:.1f} ms"
+    )
+    assert transcript_segments_time < asr_segments_time
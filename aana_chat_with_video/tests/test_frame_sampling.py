@@ -0,0 +1,32 @@
+# ruff: noqa: S101
+
+import numpy as np
+
+from aana.core.models.image import Image
+from aana_chat_with_video.utils.frame_sampling import FrameSampler
+
+
+def make_frames(values: list[int]) -> list[Image]:
+    """Creates solid color frames with the given intensities."""
+    return [
+        Image(numpy=np.full((64, 96, 3), value, dtype=np.uint8), media_id=str(i))
+        for i, value in enumerate(values)
+    ]
+
+
+def test_frame_sampler_drops_duplicates():
+    """Tests that near-duplicate frames are dropped."""
+    sampler = FrameSampler(threshold=0.05, max_interval=100.0)
+    frames = make_frames([0, 1, 2, 200, 201, 0])
+    selected = sampler.select(frames, timestamps=[0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+    assert selected == [0, 3, 5]
+
+
+def test_frame_sampler_keeps_frame_per_interval():
+    """Tests that at least one frame is kept per interval, across batches."""
+    sampler = FrameSampler(threshold=0.05, max_interval=2.0)
+    first = sampler.select(make_frames([0, 0, 0]), timestamps=[0.0, 1.0, 2.0])
+    second = sampler.select(make_frames([0, 0, 0]), timestamps=[3.0, 4.0, 5.0])
+    assert first == [0, 2]
+    assert second == [1]
+    assert sampler.select([], timestamps=[]) == []
@@ -0,0 +1,100 @@
+# ruff: noqa: S101
+# Outputs of the index video endpoint with stubbed deployments.
+
+import numpy as np
+import pytest
+
+from aana.core.models.image import Image
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.endpoints import index_video
+from aana_chat_with_video.storage.repository.extended_video_caption import (
+    ExtendedVideoCaptionRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_timeline import (
+    ExtendedVideoTimelineRepository,
+)
+from aana_chat_with_video.tests.utils import (
+    FRAME_BATCH_SIZE,
+    NUM_FRAME_BATCHES,
+    StubCaptioningHandle,
+    index,
+)
+from aana_chat_with_video.utils.timeline import get_timeline_params
+
+
+class RepeatedCaptioningHandle(StubCaptioningHandle):
+    """Captioning stub that gives every frame the same caption."""
+
+    async def generate_batch(self, images):
+        """Caption a batch of images."""
+        await super().generate_batch(images)
+        return {"captions": ["a squirrel"] * len(images)}
+
+
+# intensities of the frames in each batch: a scene cut in the second batch
+SCENE_BATCHES = [[0, 0, 0, 0], [0, 0, 200, 200], [200, 200, 200, 200]]
+
+
+def generate_scene_frames(video, params):
+    """Generate batches of solid color frames with one frame per second."""
+    frame_id = 0
+    for values in SCENE_BATCHES:
+        frame_ids = list(range(frame_id, frame_id + len(values)))
+        frame_id += len(values)
+        yield {
+            "frames": [
+                Image(numpy=np.full((64, 96, 3), value, dtype=np.uint8))
+                for value in values
+            ],
+            "frame_ids": frame_ids,
+            "timestamps": [float(i) for i in frame_ids],
+            "duration": float(frame_id),
+        }
+
+
+@pytest.mark.asyncio
+async def test_index_video_skipped_frames(stub_endpoint, db_session, mocker):
+    """Tests that near-duplicate frames are reported as skipped and not captioned."""
+    mocker.patch.object(index_video, "generate_frames", generate_scene_frames)
+    mocker.patch.object(settings.frame_sampling, "enabled", True)
+    mocker.patch.object(settings.frame_sampling, "max_interval", 100.0)
+
+    outputs, _, media_id = await index(stub_endpoint)
+
+    # the first frame and the first frame after the scene cut are captioned
+    num_frames = sum(len(values) for values in SCENE_BATCHES)
+    assert sum(o.get("skipped_frames", 0) for o in outputs) == num_frames - 2
+    assert [t for o in outputs if "timestamps" in o for t in o["timestamps"]] == [
+        0.0,
+        6.0,
+    ]
+    captions = ExtendedVideoCaptionRepository(db_session).get_captions(
+        model_name=settings.captioning_model_name, media_id=media_id
+    )
+    assert captions["frame_ids"] == [0, 6]
+    assert captions["timestamps"] == [0.0, 6.0]
+    assert len(outputs[-1]["caption_ids"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_index_video_saved_characters(stub_endpoint, db_session, mocker):
+    """Tests that the characters saved by collapsing repeated captions are reported."""
+    stub_endpoint.captioning_handle = RepeatedCaptioningHandle()
+
+    outputs, _, _ = await index(stub_endpoint)
+    assert outputs[-1]["saved_characters"] == 0
+
+    mocker.patch.object(settings.timeline, "collapse_repeated_captions", True)
+    outputs, _, media_id = await index(stub_endpoint)
+    num_frames = NUM_FRAME_BATCHES * FRAME_BATCH_SIZE
+    collapsed_caption = f"a squirrel (0.0s-{num_frames - 1}.0s)"
+    assert outputs[-1]["saved_characters"] == (
+        len("\n".join(["a squirrel"] * num_frames)) - len(collapsed_caption)
+    )
+
+    timeline = ExtendedVideoTimelineRepository(db_session).get_timeline(
+        **get_timeline_params(media_id)
+    )
+    assert [
+        chunk["visual_caption"] for chunk in timeline if chunk["visual_caption"]
+    ] == [collapsed_caption]
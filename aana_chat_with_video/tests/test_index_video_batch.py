@@ -0,0 +1,219 @@
+# ruff: noqa: S101
+# Batch indexing through the task queue with stubbed deployments. The tasks are
+# run the way the task queue runs them, up to NUM_WORKERS at a time.
+
+import asyncio
+import threading
+import time
+import uuid
+from importlib import resources
+
+import pytest
+from sqlalchemy import event
+
+from aana.core.models.vad import VadParams
+from aana.core.models.video import VideoInput, VideoInputList, VideoParams
+from aana.core.models.whisper import BatchedWhisperParams
+from aana.exceptions.db import MediaIdAlreadyExistsException
+from aana.storage.models.task import TaskEntity
+from aana.storage.repository.task import TaskRepository
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.endpoints import index_video
+from aana_chat_with_video.endpoints.get_video_status import GetVideoStatusEndpoint
+from aana_chat_with_video.endpoints.index_video_batch import (
+    INDEX_VIDEO_PATH,
+    IndexVideoBatchEndpoint,
+)
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.storage.repository.extended_video import (
+    ExtendedVideoRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_caption import (
+    ExtendedVideoCaptionRepository,
+)
+from aana_chat_with_video.tests.utils import (
+    FRAME_BATCH_SIZE,
+    NUM_FRAME_BATCHES,
+    benchmark,
+    index,
+)
+
+NUM_VIDEOS = 4
+NUM_WORKERS = 4
+
+
+@pytest.fixture(scope="function")
+def batch_endpoint(stub_endpoint):
+    """Creates a batch index endpoint."""
+    return IndexVideoBatchEndpoint(
+        name="index_video_batch", path="/video/index_batch", summary=""
+    )
+
+
+async def get_status(media_id: str) -> VideoProcessingStatus:
+    """Get the status of a video from the status endpoint."""
+    status_endpoint = GetVideoStatusEndpoint(
+        name="video_status", path="/video/status", summary=""
+    )
+    return (await status_endpoint.run(media_id))["status"]
+
+
+async def queue(batch_endpoint: IndexVideoBatchEndpoint, media_ids: list[str]) -> dict:
+    """Queue dummy videos for indexing."""
+    path = resources.path("aana.tests.files.videos", "squirrel.mp4")
+    return await batch_endpoint.run(
+        videos=VideoInputList(
+            [VideoInput(path=str(path), media_id=media_id) for media_id in media_ids]
+        ),
+        video_params=VideoParams(),
+        whisper_params=BatchedWhisperParams(),
+        vad_params=VadParams(),
+    )
+
+
+async def run_tasks(stub_endpoint, db_session, task_ids: list[str], num_workers: int):
+    """Run the indexing tasks with a limited number of workers."""
+    workers = asyncio.Semaphore(num_workers)
+
+    async def run_task(task_id: str):
+        task: TaskEntity = TaskRepository(db_session).read(task_id)
+        assert task.endpoint == INDEX_VIDEO_PATH
+        async with workers:
+            return [output async for output in stub_endpoint.run(**task.data)]
+
+    return await asyncio.gather(*[run_task(task_id) for task_id in task_ids])
+
+
+@pytest.mark.asyncio
+async def test_index_video_batch(batch_endpoint, stub_endpoint, db_session):
+    """Queued videos are indexed by the tasks and their progress is shown."""
+    media_ids = [str(uuid.uuid4()) for _ in range(NUM_VIDEOS)]
+    output = await queue(batch_endpoint, media_ids)
+
+    assert output["media_ids"] == media_ids
+    assert len(output["task_ids"]) == NUM_VIDEOS
+    for media_id in media_ids:
+        assert await get_status(media_id) == VideoProcessingStatus.QUEUED
+
+    task_outputs = await run_tasks(
+        stub_endpoint, db_session, output["task_ids"], NUM_WORKERS
+    )
+
+    caption_repo = ExtendedVideoCaptionRepository(db_session)
+    for media_id, outputs in zip(media_ids, task_outputs, strict=True):
+        assert await get_status(media_id) == VideoProcessingStatus.COMPLETED
+        assert outputs[0]["metadata"].title == "Squirrel"
+        captions = caption_repo.get_captions(
+            model_name=settings.captioning_model_name, media_id=media_id
+        )
+        assert len(captions["captions"]) == NUM_FRAME_BATCHES * FRAME_BATCH_SIZE
+
+
+@benchmark
+@pytest.mark.asyncio
+async def test_index_video_batch_benchmark(batch_endpoint, stub_endpoint, db_session):
+    """Compares indexing queued videos in parallel and one at a time."""
+    media_ids = [str(uuid.uuid4()) for _ in range(NUM_VIDEOS)]
+    output = await queue(batch_endpoint, media_ids)
+
+    start = time.perf_counter()
+    await run_tasks(stub_endpoint, db_session, output["task_ids"], NUM_WORKERS)
+    batch_latency = time.perf_counter() - start
+
+    _, single_latency, _ = await index(stub_endpoint)
+    print(
+        f"Indexing {NUM_VIDEOS} videos: {batch_latency:.3f}s with {NUM_WORKERS} "
+        f"workers, {NUM_VIDEOS * single_latency:.3f}s one at a time"
+    )
+    assert batch_latency < NUM_VIDEOS * single_latency / 2
+
+
+@pytest.mark.asyncio
+async def test_index_video_batch_existing_media_id(batch_endpoint, stub_endpoint):
+    """Videos that exist or are queued twice are rejected."""
+    _, _, media_id = await index(stub_endpoint)
+    with pytest.raises(MediaIdAlreadyExistsException):
+        await queue(batch_endpoint, [str(uuid.uuid4()), media_id])
+
+    new_media_id = str(uuid.uuid4())
+    with pytest.raises(MediaIdAlreadyExistsException):
+        await queue(batch_endpoint, [new_media_id, new_media_id])
+
+
+@pytest.mark.asyncio
+async def test_index_video_batch_failure(
+    batch_endpoint, stub_endpoint, db_session, mocker
+):
+    """A queued video that fails before it is processed is shown as failed."""
+
+    def download_video(video_input):
+        raise RuntimeError("Download failed")  # noqa: TRY003
+
+    mocker.patch.object(index_video, "download_video", download_video)
+    media_id = str(uuid.uuid4())
+    output = await queue(batch_endpoint, [media_id])
+    with pytest.raises(RuntimeError):
+        await run_tasks(stub_endpoint, db_session, output["task_ids"], NUM_WORKERS)
+    assert await get_status(media_id) == VideoProcessingStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_index_video_batch_save_failure(batch_endpoint, db_session):
+    """Videos are not left queued without tasks if saving the tasks fails."""
+
+    def fail_task_insert(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO tasks"):
+            raise RuntimeError("Saving the tasks failed")  # noqa: TRY003
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", fail_task_insert)
+    media_ids = [str(uuid.uuid4()) for _ in range(NUM_VIDEOS)]
+    try:
+        with pytest.raises(RuntimeError):
+            await queue(batch_endpoint, media_ids)
+    finally:
+        event.remove(engine, "before_cursor_execute", fail_task_insert)
+
+    video_repo = ExtendedVideoRepository(db_session)
+    for media_id in media_ids:
+        assert not video_repo.check_media_exists(media_id)
+    assert db_session.query(TaskEntity).count() == 0
+
+    # the videos can be queued again
+    output = await queue(batch_endpoint, media_ids)
+    assert len(output["task_ids"]) == NUM_VIDEOS
+    for media_id in media_ids:
+        assert await get_status(media_id) == VideoProcessingStatus.QUEUED
+
+
+@pytest.mark.asyncio
+async def test_index_video_batch_direct_index(
+    batch_endpoint, stub_endpoint, db_session, mocker
+):
+    """A queued video indexed by its task and a direct request is only indexed once."""
+    media_id = str(uuid.uuid4())
+    output = await queue(batch_endpoint, [media_id])
+
+    # both requests check the queued status before either of them claims the video
+    checked = threading.Barrier(2, timeout=10)
+    claim = ExtendedVideoRepository.claim
+
+    def claim_after_check(self, *args, **kwargs):
+        checked.wait()
+        return claim(self, *args, **kwargs)
+
+    mocker.patch.object(ExtendedVideoRepository, "claim", claim_after_check)
+    results = await asyncio.gather(
+        run_tasks(stub_endpoint, db_session, output["task_ids"], NUM_WORKERS),
+        index(stub_endpoint, media_id),
+        return_exceptions=True,
+    )
+
+    failures = [r for r in results if isinstance(r, BaseException)]
+    assert len(failures) == 1
+    assert isinstance(failures[0], MediaIdAlreadyExistsException)
+    assert await get_status(media_id) == VideoProcessingStatus.COMPLETED
+    captions = ExtendedVideoCaptionRepository(db_session).get_captions(
+        model_name=settings.captioning_model_name, media_id=media_id
+    )
+    assert len(captions["captions"]) == NUM_FRAME_BATCHES * FRAME_BATCH_SIZE
@@ -0,0 +1,64 @@
+# ruff: noqa: S101
+# Sequential vs concurrent indexing with stubbed deployments.
+
+import pytest
+
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.storage.repository.extended_video import (
+    ExtendedVideoRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_caption import (
+    ExtendedVideoCaptionRepository,
+)
+from aana_chat_with_video.tests.utils import (
+    FRAME_BATCH_SIZE,
+    NUM_FRAME_BATCHES,
+    benchmark,
+    index,
+)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_indexing(stub_endpoint, db_session, mocker):
+    """Concurrent indexing produces the same outputs as sequential indexing."""
+    mocker.patch.object(settings, "concurrent_indexing", False)
+    sequential_outputs, _, _ = await index(stub_endpoint)
+
+    mocker.patch.object(settings, "concurrent_indexing", True)
+    concurrent_outputs, _, media_id = await index(stub_endpoint)
+
+    def partial_outputs(outputs, key):
+        return [o for o in outputs if key in o]
+
+    for key in ["transcription", "captions"]:
+        assert partial_outputs(concurrent_outputs, key) == partial_outputs(
+            sequential_outputs, key
+        )
+    assert "media_id" in concurrent_outputs[0]
+    assert "caption_ids" in concurrent_outputs[-1]
+
+    video_repo = ExtendedVideoRepository(db_session)
+    assert video_repo.get_status(media_id) == VideoProcessingStatus.COMPLETED
+    captions = ExtendedVideoCaptionRepository(db_session).get_captions(
+        model_name=settings.captioning_model_name, media_id=media_id
+    )
+    assert len(captions["captions"]) == NUM_FRAME_BATCHES * FRAME_BATCH_SIZE
+    assert captions["frame_ids"] == sorted(captions["frame_ids"])
+
+
+@benchmark
+@pytest.mark.asyncio
+async def test_concurrent_indexing_benchmark(stub_endpoint, mocker):
+    """Compares the latency of sequential and concurrent indexing."""
+    mocker.patch.object(settings, "concurrent_indexing", False)
+    _, sequential_latency, _ = await index(stub_endpoint)
+
+    mocker.patch.object(settings, "concurrent_indexing", True)
+    _, concurrent_latency, _ = await index(stub_endpoint)
+
+    print(
+        f"Indexing latency: sequential {sequential_latency:.3f}s, "
+        f"concurrent {concurrent_latency:.3f}s"
+    )
+    assert concurrent_latency < 0.75 * sequential_latency
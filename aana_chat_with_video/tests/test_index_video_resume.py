@@ -0,0 +1,123 @@
+# ruff: noqa: S101
+# Resume indexing after a failure with stubbed deployments.
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from importlib import resources
+
+import pytest
+
+from aana.core.models.video import Video
+from aana.exceptions.db import MediaIdAlreadyExistsException
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.storage.models.extended_video import VideoProcessingStatus
+from aana_chat_with_video.storage.repository.extended_video import (
+    ExtendedVideoRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_caption import (
+    ExtendedVideoCaptionRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_timeline import (
+    ExtendedVideoTimelineRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_transcript import (
+    ExtendedVideoTranscriptRepository,
+)
+from aana_chat_with_video.tests.utils import (
+    FRAME_BATCH_SIZE,
+    NUM_ASR_CHUNKS,
+    NUM_FRAME_BATCHES,
+    CountingAsrHandle,
+    FlakyCaptioningHandle,
+    index,
+)
+from aana_chat_with_video.utils.timeline import get_timeline_params
+
+FAILING_BATCH = 5
+
+
+@pytest.mark.asyncio
+async def test_resume_indexing(stub_endpoint, db_session, mocker):
+    """Failed indexing resumes from the saved transcript and captions."""
+    mocker.patch.object(settings, "concurrent_indexing", False)
+    stub_endpoint.asr_handle = CountingAsrHandle()
+    stub_endpoint.captioning_handle = FlakyCaptioningHandle(FAILING_BATCH)
+    media_id = str(uuid.uuid4())
+
+    with pytest.raises(RuntimeError):
+        await index(stub_endpoint, media_id)
+
+    video_repo = ExtendedVideoRepository(db_session)
+    assert video_repo.get_status(media_id) == VideoProcessingStatus.FAILED
+    # the transcript and the captions of the finished batches are checkpointed
+    ExtendedVideoTranscriptRepository(db_session).get_transcript(
+        model_name=settings.asr_model_name, media_id=media_id
+    )
+    captions = ExtendedVideoCaptionRepository(db_session).get_captions(
+        model_name=settings.captioning_model_name, media_id=media_id
+    )
+    assert len(captions["captions"]) == FAILING_BATCH * FRAME_BATCH_SIZE
+    assert stub_endpoint.asr_handle.num_chunks == NUM_ASR_CHUNKS
+
+    outputs, _, _ = await index(stub_endpoint, media_id)
+
+    # ASR is skipped and only the remaining batches are captioned
+    assert stub_endpoint.asr_handle.num_chunks == NUM_ASR_CHUNKS
+    assert stub_endpoint.captioning_handle.num_batches == NUM_FRAME_BATCHES
+    db_session.expire_all()
+    assert video_repo.get_status(media_id) == VideoProcessingStatus.COMPLETED
+
+    num_captions = NUM_FRAME_BATCHES * FRAME_BATCH_SIZE
+    streamed_captions = [c for o in outputs if "captions" in o for c in o["captions"]]
+    assert streamed_captions == [f"caption {i}" for i in range(num_captions)]
+    assert len(outputs[-1]["caption_ids"]) == num_captions
+    assert len(set(outputs[-1]["caption_ids"])) == num_captions
+
+    timeline = ExtendedVideoTimelineRepository(db_session).get_timeline(
+        **get_timeline_params(media_id)
+    )
+    assert "chunk 0" in timeline[0]["audio_transcript"]
+
+    # completed videos are not indexed again
+    with pytest.raises(MediaIdAlreadyExistsException):
+        await index(stub_endpoint, media_id)
+
+
+@pytest.mark.asyncio
+async def test_resume_indexing_disabled(stub_endpoint, db_session, mocker):
+    """Failed videos can't be indexed again if resuming is disabled."""
+    mocker.patch.object(settings, "resume_indexing", False)
+    stub_endpoint.captioning_handle = FlakyCaptioningHandle(0)
+    media_id = str(uuid.uuid4())
+
+    with pytest.raises(RuntimeError):
+        await index(stub_endpoint, media_id)
+    with pytest.raises(MediaIdAlreadyExistsException):
+        await index(stub_endpoint, media_id)
+
+
+@pytest.mark.asyncio
+async def test_resume_running_indexing(stub_endpoint, db_session):
+    """Only running videos that stopped updating are resumed."""
+    media_id = str(uuid.uuid4())
+    path = resources.path("aana.tests.files.videos", "squirrel.mp4")
+    video_repo = ExtendedVideoRepository(db_session)
+    video_repo.save(Video(path=path, media_id=media_id), duration=40.0)
+
+    # created and running videos are being indexed by another request
+    with pytest.raises(MediaIdAlreadyExistsException):
+        await index(stub_endpoint, media_id)
+    video_repo.update_status(media_id, VideoProcessingStatus.RUNNING)
+    with pytest.raises(MediaIdAlreadyExistsException):
+        await index(stub_endpoint, media_id)
+
+    entity = video_repo.read(media_id)
+    entity.updated_at = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.resume_running_after + 60
+    )
+    db_session.commit()
+    outputs, _, _ = await index(stub_endpoint, media_id)
+
+    db_session.expire_all()
+    assert video_repo.get_status(media_id) == VideoProcessingStatus.COMPLETED
+    assert len(outputs[-1]["caption_ids"]) == NUM_FRAME_BATCHES * FRAME_BATCH_SIZE
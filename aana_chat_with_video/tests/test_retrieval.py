@@ -0,0 +1,77 @@
+# ruff: noqa: S101
+
+from aana_chat_with_video.utils.retrieval import (
+    BM25Index,
+    TimelineIndex,
+    estimate_tokens,
+    select_timeline_chunks,
+)
+from aana_chat_with_video.utils.timeline import render_timeline
+
+
+def make_timeline(transcripts: list[str]) -> list[dict]:
+    """Creates a timeline with one chunk per transcript."""
+    return [
+        {
+            "start_time": i * 10.0,
+            "end_time": (i + 1) * 10.0,
+            "audio_transcript": transcript,
+            "visual_caption": "a person standing in a room",
+        }
+        for i, transcript in enumerate(transcripts)
+    ]
+
+
+def test_bm25_index():
+    """Tests that BM25 ranks matching documents first."""
+    index = BM25Index(
+        ["the squirrel eats a nut", "a cat sleeps", "the squirrel climbs a tree"]
+    )
+    scores = index.score("What does the squirrel eat?")
+    assert scores.argmax() == 0
+    assert scores[1] == 0
+    assert (index.score("unknown words") == 0).all()
+
+
+def test_select_timeline_chunks():
+    """Tests selecting relevant chunks within top_k and the token budget."""
+    timeline = make_timeline(
+        [
+            "welcome to the lecture",
+            "today we talk about gravity",
+            "some unrelated remarks",
+            "gravity makes apples fall",
+            "thanks for watching",
+        ]
+    )
+
+    selected = select_timeline_chunks(
+        timeline, "What is gravity?", top_k=2, token_budget=10_000
+    )
+    assert selected == [timeline[1], timeline[3]]
+
+    chunk_tokens = estimate_tokens(render_timeline([timeline[1]]))
+    selected = select_timeline_chunks(
+        timeline, "What is gravity?", top_k=5, token_budget=chunk_tokens
+    )
+    assert len(selected) == 1
+    assert "gravity" in selected[0]["audio_transcript"]
+
+    # without matches the beginning of the video is selected
+    selected = select_timeline_chunks(
+        timeline, "quantum", top_k=2, token_budget=10_000
+    )
+    assert selected == timeline[:2]
+    assert select_timeline_chunks([], "quantum", top_k=2, token_budget=100) == []
+
+
+def test_timeline_index():
+    """Tests that an index answers several questions like selecting from scratch."""
+    timeline = make_timeline(
+        ["today we talk about gravity", "apples fall from trees", "thanks"]
+    )
+    index = TimelineIndex(timeline)
+    for question in ["What is gravity?", "Why do apples fall?", "quantum"]:
+        assert index.select(question, top_k=1, token_budget=10_000) == (
+            select_timeline_chunks(timeline, question, top_k=1, token_budget=10_000)
+        )
@@ -0,0 +1,259 @@
+# ruff: noqa: S101
+import json
+import random
+from collections import defaultdict
+from math import floor
+
+import pytest
+
+from aana.core.models.asr import AsrSegment
+from aana.core.models.time import TimeInterval
+from aana_chat_with_video.core.models.transcript import TranscriptSegments
+from aana_chat_with_video.tests.utils import benchmark, measure
+from aana_chat_with_video.utils.core import (
+    collapse_captions,
+    generate_adaptive_timeline,
+    generate_combined_timeline,
+)
+
+
+def make_segments(intervals: list[tuple[float, float]]) -> list[AsrSegment]:
+    """Creates ASR segments for the given time intervals."""
+    return [
+        AsrSegment(
+            text=f"segment {i}", time_interval=TimeInterval(start=start, end=end)
+        )
+        for i, (start, end) in enumerate(intervals)
+    ]
+
+
+def test_collapse_captions():
+    """Tests collapsing runs of repeated captions."""
+    captions = [
+        "a man is talking",
+        "A man is talking.",
+        "a man is talking",
+        "a slide with text",
+        "a man is talking",
+    ]
+    timestamps = [0.0, 5.0, 12.0, 20.0, 25.0]
+
+    collapsed, collapsed_timestamps = collapse_captions(captions, timestamps)
+    assert collapsed == [
+        "a man is talking (0.0s-12.0s)",
+        "a slide with text",
+        "a man is talking",
+    ]
+    assert collapsed_timestamps == [0.0, 20.0, 25.0]
+
+    collapsed, _ = collapse_captions(
+        ["a man is talking", "a man is talking to"], [0.0, 1.0], 0.8
+    )
+    assert collapsed == ["a man is talking (0.0s-1.0s)"]
+
+
+def test_collapse_short_runs():
+    """Tests that runs are only collapsed if that makes the captions shorter."""
+    segments = make_segments([(0.0, 5.0)])
+    timeline = generate_combined_timeline(
+        segments,
+        ["x", "x", "x", "y"],
+        [0.0, 1.0, 2.0, 3.0],
+        collapse_repeated_captions=True,
+    )
+    assert timeline["timeline"][0]["visual_caption"] == "x\nx\nx\ny"
+    assert timeline["saved_characters"] == 0
+
+    captions = ["a squirrel", "a squirrel", "a squirrel", "a cat"]
+    timeline = generate_combined_timeline(
+        segments, captions, [0.0, 1.0, 2.0, 3.0], collapse_repeated_captions=True
+    )
+    visual_caption = timeline["timeline"][0]["visual_caption"]
+    assert visual_caption == "a squirrel (0.0s-2.0s)\na cat"
+    assert timeline["saved_characters"] == (
+        len("\n".join(captions)) - len(visual_caption)
+    )
+    assert timeline["saved_characters"] >= 0
+
+
+def test_generate_combined_timeline_collapse():
+    """Tests that collapsing captions shortens the timeline."""
+    segments = make_segments([(0.0, 5.0), (12.0, 18.0)])
+    captions = ["a man is talking"] * 20
+    timestamps = [float(i) for i in range(20)]
+
+    timeline = generate_combined_timeline(segments, captions, timestamps)
+    assert timeline["saved_characters"] == 0
+    assert len(timeline["timeline"]) == 2
+    assert timeline["timeline"][0]["visual_caption"].count("\n") == 9
+
+    collapsed_timeline = generate_combined_timeline(
+        segments, captions, timestamps, collapse_repeated_captions=True
+    )
+    collapsed_caption = "a man is talking (0.0s-19.0s)"
+    assert collapsed_timeline["timeline"][0]["visual_caption"] == collapsed_caption
+    assert collapsed_timeline["saved_characters"] == (
+        len("\n".join(captions)) - len(collapsed_caption)
+    )
+    assert collapsed_timeline["timeline"][1]["visual_caption"] == ""
+    assert collapsed_timeline["timeline"][1]["audio_transcript"] == "segment 1"
+
+
+def generate_combined_timeline_reference(
+    transcription_segments, captions, caption_timestamps, chunk_size=10.0
+):
+    """The scalar implementation of generate_combined_timeline (without collapsing)."""
+    timeline_dict = defaultdict(lambda: {"transcription": [], "captions": []})
+    for segment in transcription_segments:
+        chunk_index = floor(segment.time_interval.start / chunk_size)
+        timeline_dict[chunk_index]["transcription"].append(segment.text)
+    for timestamp, caption in zip(caption_timestamps, captions, strict=True):
+        chunk_index = floor(timestamp / chunk_size)
+        timeline_dict[chunk_index]["captions"].append(caption)
+
+    num_chunks = max(timeline_dict.keys(), default=-1) + 1
+    timeline = [
+        {
+            "start_time": chunk_index * chunk_size,
+            "end_time": (chunk_index + 1) * chunk_size,
+            "audio_transcript": "\n".join(timeline_dict[chunk_index]["transcription"]),
+            "visual_caption": "\n".join(timeline_dict[chunk_index]["captions"]),
+        }
+        for chunk_index in range(num_chunks)
+    ]
+    return {"timeline": timeline, "saved_characters": 0}
+
+
+def make_video(duration: float, seed: int = 0):
+    """Creates synthetic ASR segments and captions (one per second) for a video."""
+    rng = random.Random(seed)
+    intervals = []
+    start = 0.0
+    while start < duration:
+        end = start + rng.uniform(1.0, 8.0)
+        intervals.append((start, end))
+        start = end + rng.choice([0.0, 0.0, rng.uniform(0.0, 30.0)])
+    segments = make_segments(intervals)
+    # frame timestamps drift away from whole seconds like with a non-integer frame rate
+    caption_timestamps = [i * 1.001 for i in range(int(duration))]
+    captions = [f"caption {i % 17}" for i in range(len(caption_timestamps))]
+    return segments, captions, caption_timestamps
+
+
+@pytest.mark.parametrize("chunk_size", [0.1, 1.0, 7.3, 10.0, 60.0])
+def test_generate_combined_timeline_matches_reference(chunk_size):
+    """Tests that the vectorized timeline is byte-identical to the scalar one."""
+    segments, captions, caption_timestamps = make_video(600.0, seed=int(chunk_size))
+    # timestamps that are exact multiples of the chunk size are the edge cases
+    caption_timestamps[:5] = [0.3, 0.7, 1.0, 2.1, chunk_size * 3]
+
+    expected = generate_combined_timeline_reference(
+        segments, captions, caption_timestamps, chunk_size
+    )
+    timeline = generate_combined_timeline(
+        segments, captions, caption_timestamps, chunk_size
+    )
+    assert json.dumps(timeline) == json.dumps(expected)
+
+    for args in [([], [], []), (segments[:1], [], []), ([], ["a"], [25.0])]:
+        assert generate_combined_timeline(*args) == generate_combined_timeline_reference(
+            *args
+        )
+
+
+@benchmark
+def test_generate_combined_timeline_benchmark():
+    """Compares the vectorized and the scalar timeline on a 2-hour video."""
+    segments, captions, caption_timestamps = make_video(2 * 60 * 60.0)
+    args = (segments, captions, caption_timestamps)
+
+    reference_time = measure(lambda: generate_combined_timeline_reference(*args))
+    vectorized_time = measure(lambda: generate_combined_timeline(*args))
+    print(
+        f"\n{len(segments)} segments, {len(captions)} captions: "
+        f"scalar {reference_time * 1000:.1f} ms, "
+        f"vectorized {vectorized_time * 1000:.1f} ms"
+    )
+    assert vectorized_time < reference_time
+
+
+def test_generate_adaptive_timeline():
+    """Tests overlap-aware chunking with variable chunk sizes."""
+    # a long segment from 2s to 40s, silence and no captions from 60s to 300s
+    segments = make_segments([(0.0, 2.0), (2.0, 40.0), (300.0, 301.0)])
+    captions = ["a slide"] * 12 + ["a man"]
+    caption_timestamps = [float(t) for t in range(0, 60, 5)] + [305.0]
+
+    timeline = generate_adaptive_timeline(
+        segments,
+        captions,
+        caption_timestamps,
+        min_chunk_size=5.0,
+        max_chunk_size=30.0,
+        max_chunk_characters=1000,
+    )["timeline"]
+
+    assert [(chunk["start_time"], chunk["end_time"]) for chunk in timeline] == [
+        (0.0, 30.0),
+        (30.0, 55.0),
+        (300.0, 305.0),
+    ]
+    # the long segment overlaps the first chunk the most
+    assert timeline[0]["audio_transcript"] == "segment 0\nsegment 1"
+    assert timeline[1]["audio_transcript"] == ""
+    assert timeline[2]["audio_transcript"] == "segment 2"
+    assert timeline[2]["visual_caption"] == "a man"
+
+    # dense content gets shorter chunks, but not shorter than min_chunk_size
+    dense_timeline = generate_adaptive_timeline(
+        segments,
+        captions,
+        caption_timestamps,
+        min_chunk_size=10.0,
+        max_chunk_size=30.0,
+        max_chunk_characters=20,
+    )["timeline"]
+    assert len(dense_timeline) > len(timeline)
+    for chunk in dense_timeline[:-1]:
+        assert chunk["end_time"] - chunk["start_time"] >= 10.0
+
+    assert generate_adaptive_timeline([], [], [])["timeline"] == []
+
+
+def test_generate_adaptive_timeline_keeps_all_content():
+    """Tests that every segment and caption ends up in exactly one chunk."""
+    segments, captions, caption_timestamps = make_video(3600.0, seed=1)
+    timeline = generate_adaptive_timeline(segments, captions, caption_timestamps)[
+        "timeline"
+    ]
+
+    transcripts = [
+        text
+        for chunk in timeline
+        if chunk["audio_transcript"]
+        for text in chunk["audio_transcript"].split("\n")
+    ]
+    assert transcripts == [segment.text for segment in segments]
+    assert sum(
+        len(chunk["visual_caption"].split("\n"))
+        for chunk in timeline
+        if chunk["visual_caption"]
+    ) == len(captions)
+    for chunk, next_chunk in zip(timeline, timeline[1:], strict=False):
+        assert chunk["start_time"] < chunk["end_time"] <= next_chunk["start_time"]
+    assert all(chunk["audio_transcript"] or chunk["visual_caption"] for chunk in timeline)
+
+
+@pytest.mark.parametrize(
+    "generate_timeline", [generate_combined_timeline, generate_adaptive_timeline]
+)
+def test_generate_timeline_from_transcript_segments(generate_timeline):
+    """Tests that the timeline built from transcript segments matches the one from ASR segments."""
+    segments, captions, caption_timestamps = make_video(600.0)
+    transcript_segments = TranscriptSegments.from_dicts(
+        [segment.model_dump() for segment in segments]
+    )
+    assert transcript_segments == TranscriptSegments.from_asr_segments(segments)
+    assert generate_timeline(
+        transcript_segments, captions, caption_timestamps
+    ) == generate_timeline(segments, captions, caption_timestamps)
@@ -0,0 +1,106 @@
+# ruff: noqa: S101
+
+import pytest
+
+from aana_chat_with_video.core.models.timeline import TimelineChunking
+from aana_chat_with_video.endpoints import get_timeline_cache_stats, video_chat
+from aana_chat_with_video.endpoints.video_chat import VideoChatEndpoint
+from aana_chat_with_video.utils.timeline_cache import TimelineCache, TimelineCacheKey
+
+
+def make_key(media_id: str) -> TimelineCacheKey:
+    """Creates a cache key for the media ID."""
+    return TimelineCacheKey(
+        media_id=media_id,
+        asr_model_name="whisper",
+        captioning_model_name="blip2",
+        chunk_size=10.0,
+        chunking=TimelineChunking.FIXED,
+    )
+
+
+def test_timeline_cache_hits_and_misses():
+    """Tests cache lookups, versions and counters."""
+    cache = TimelineCache(max_entries=10, max_size=1000)
+
+    assert cache.get(make_key("a"), version=1) is None
+    cache.put(make_key("a"), "timeline a", version=1)
+    assert cache.get(make_key("a"), version=1) == "timeline a"
+    # the video was re-indexed, so the cached timeline is stale
+    assert cache.get(make_key("a"), version=2) is None
+
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 1, "size": 10}
+
+    cache.invalidate("a")
+    assert cache.get(make_key("a"), version=1) is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["size"] == 0
+
+
+def test_timeline_cache_eviction():
+    """Tests LRU eviction by number of entries and by size."""
+    cache = TimelineCache(max_entries=2, max_size=25)
+
+    cache.put(make_key("a"), "a" * 10)
+    cache.put(make_key("b"), "b" * 10)
+    assert cache.get(make_key("a")) == "a" * 10  # a is now most recently used
+    cache.put(make_key("c"), "c" * 10)
+    assert cache.get(make_key("b")) is None
+    assert len(cache) == 2
+
+    cache.put(make_key("d"), "d" * 20)
+    assert len(cache) == 1
+    assert cache.get(make_key("d")) == "d" * 20
+
+    # timelines larger than the cache are not cached
+    cache.put(make_key("e"), "e" * 30)
+    assert cache.get(make_key("e")) is None
+    assert cache.size == 20
+
+
+@pytest.mark.asyncio
+async def test_timeline_cache_stats_endpoint(mocker):
+    """Tests that the stats endpoint returns the statistics of the cache."""
+    cache = TimelineCache(max_entries=10, max_size=1000)
+    mocker.patch.object(get_timeline_cache_stats, "timeline_cache", cache)
+    cache.put(make_key("a"), "timeline a")
+    cache.get(make_key("a"))
+    cache.get(make_key("b"))
+
+    endpoint = get_timeline_cache_stats.GetTimelineCacheStatsEndpoint(
+        name="timeline_cache_stats", path="/timeline_cache/stats", summary=""
+    )
+    assert await endpoint.run() == {"hits": 1, "misses": 1, "entries": 1, "size": 10}
+
+
+@pytest.mark.asyncio
+async def test_timeline_index_cache(mocker):
+    """Tests that the retrieval index is built once per version of the timeline."""
+    cache = TimelineCache(max_entries=10, max_size=1000)
+    mocker.patch.object(video_chat, "timeline_index_cache", cache)
+    timeline = [
+        {
+            "start_time": 0.0,
+            "end_time": 10.0,
+            "audio_transcript": "gravity makes apples fall",
+            "visual_caption": "an apple tree",
+        }
+    ]
+    loads = []
+
+    async def run_in_session(func, media_id):
+        loads.append(media_id)
+        return timeline
+
+    mocker.patch.object(video_chat, "run_in_session", run_in_session)
+    endpoint = VideoChatEndpoint(name="video_chat", path="/video/chat", summary="")
+
+    index = await endpoint.get_timeline_index("a", version=1)
+    assert await endpoint.get_timeline_index("a", version=1) is index
+    assert loads == ["a"]
+    assert cache.size == index.size
+
+    # the video was re-indexed, so the index is rebuilt
+    assert await endpoint.get_timeline_index("a", version=2) is not index
+    assert loads == ["a", "a"]
+    assert index.select("What falls?", top_k=1, token_budget=1000) == timeline
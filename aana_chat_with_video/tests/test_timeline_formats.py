@@ -0,0 +1,109 @@
+# ruff: noqa: S101
+import json
+import random
+import re
+
+import pytest
+
+from aana_chat_with_video.core.models.timeline import TimelineFormat
+from aana_chat_with_video.utils.timeline import (
+    format_seconds,
+    measure_timeline_formats,
+    render_timeline,
+)
+
+# GPT-2 style pre-tokenization. BPE tokenizers never produce fewer tokens than
+# pre-tokens, so this is a good tokenizer-independent proxy for prompt size.
+PRE_TOKEN_PATTERN = re.compile(r"""'s|'t|'re|'ve|'m|'ll|'d| ?[^\W\d_]+| ?\d+| ?[^\s\w]+|\s+""")
+
+
+def count_tokens(text: str) -> int:
+    """Approximates the number of LLM tokens in a text."""
+    return len(PRE_TOKEN_PATTERN.findall(text))
+
+
+def make_timeline(num_chunks: int, seed: int = 0) -> list[dict]:
+    """Creates a sample timeline of a talk with slides."""
+    rng = random.Random(seed)
+    words = "the speaker explains how we train models on video data and why it matters".split()
+    captions = [
+        "a man standing in front of a screen",
+        "a slide with text on it",
+        "a close up of a person's face",
+        "a group of people sitting in a room",
+    ]
+    timeline = []
+    for i in range(num_chunks):
+        transcript = (
+            "\n".join(
+                " ".join(rng.choices(words, k=rng.randint(5, 15)))
+                for _ in range(rng.randint(1, 3))
+            )
+            if rng.random() > 0.2
+            else ""
+        )
+        timeline.append(
+            {
+                "start_time": i * 10.0,
+                "end_time": (i + 1) * 10.0,
+                "audio_transcript": transcript,
+                "visual_caption": "\n".join(rng.choices(captions, k=10)),
+            }
+        )
+    return timeline
+
+
+def test_format_seconds():
+    """Tests formatting of chunk boundaries."""
+    assert format_seconds(0.0) == "0"
+    assert format_seconds(10.0) == "10"
+    assert format_seconds(2.5) == "2.5"
+    assert format_seconds(7.125) == "7.12"
+
+
+def test_render_timeline_formats():
+    """Tests the output of each timeline format."""
+    timeline = [
+        {
+            "start_time": 0.0,
+            "end_time": 10.0,
+            "audio_transcript": "Hello there\nIt's me",
+            "visual_caption": "a man & a dog\na man",
+        },
+        {
+            "start_time": 10.0,
+            "end_time": 20.0,
+            "audio_transcript": "",
+            "visual_caption": "a slide",
+        },
+    ]
+
+    assert render_timeline(timeline) == json.dumps(
+        timeline, indent=4, separators=(",", ": ")
+    )
+    assert json.loads(render_timeline(timeline, TimelineFormat.COMPACT_JSON)) == timeline
+    assert render_timeline(timeline, TimelineFormat.LINES) == (
+        "[0-10] A: Hello there It's me V: a man & a dog; a man\n[10-20] V: a slide"
+    )
+    # the template must not HTML-escape the timeline
+    assert render_timeline(timeline, TimelineFormat.TEMPLATE) == (
+        "0-10s | audio: Hello there It's me | visual: a man & a dog; a man\n"
+        "10-20s | visual: a slide\n"
+    )
+    assert render_timeline([], TimelineFormat.LINES) == ""
+
+
+@pytest.mark.parametrize("num_chunks", [6, 60, 360])
+def test_measure_timeline_formats(num_chunks):
+    """Compares the prompt size of the timeline formats on sample timelines."""
+    timeline = make_timeline(num_chunks)
+    tokens = measure_timeline_formats(timeline, count_tokens)
+
+    print(f"\n{num_chunks} chunks:")
+    for timeline_format, num_tokens in tokens.items():
+        saved = 1 - num_tokens / tokens[TimelineFormat.JSON]
+        print(f"  {timeline_format.value:>12}: {num_tokens:>7} tokens ({saved:.0%} saved)")
+
+    assert tokens[TimelineFormat.COMPACT_JSON] < tokens[TimelineFormat.JSON]
+    assert tokens[TimelineFormat.LINES] < tokens[TimelineFormat.COMPACT_JSON]
+    assert tokens[TimelineFormat.TEMPLATE] < tokens[TimelineFormat.COMPACT_JSON]
@@ -0,0 +1,148 @@
+# ruff: noqa: S101
+# The metadata probe is tested against a local HTTP server standing in for the video host.
+
+import asyncio
+import threading
+import time
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib import resources
+
+import pytest
+
+from aana_chat_with_video.utils import video_metadata as video_metadata_module
+from aana_chat_with_video.utils.video_metadata import (
+    VideoMetadataCache,
+    get_video_metadata,
+    probe_video_metadata,
+)
+
+SLOW_RESPONSE_DELAY = 2.0  # seconds before the server answers requests to /slow
+HANG_DELAY = 30.0  # seconds before the server answers requests to /hang
+
+
+class VideoHost(ThreadingHTTPServer):
+    """Local HTTP server serving a test video and counting the requests."""
+
+    # don't wait for the hanging requests when the server is closed
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self):
+        """Constructor."""
+        super().__init__(("127.0.0.1", 0), VideoHandler)
+        with resources.path("aana.tests.files.videos", "squirrel.mp4") as path:
+            self.video = path.read_bytes()
+        self.num_requests = 0
+
+    def url(self, path: str) -> str:
+        """Get the URL of a path on the server."""
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class VideoHandler(BaseHTTPRequestHandler):
+    """Serves the test video, requests to /slow and /hang are answered with a delay."""
+
+    def do_GET(self):  # noqa: N802
+        """Handle a GET request."""
+        self.server.num_requests += 1
+        if self.path.startswith("/slow"):
+            time.sleep(SLOW_RESPONSE_DELAY)
+        elif self.path.startswith("/hang"):
+            time.sleep(HANG_DELAY)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(self.server.video)))
+            self.end_headers()
+            self.wfile.write(self.server.video)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out
+
+    def log_message(self, format, *args):
+        """Don't log the requests."""
+
+
+@pytest.fixture
+def video_host(mocker) -> Generator[VideoHost, None, None]:
+    """Starts the local video host and clears the metadata cache."""
+    mocker.patch.object(
+        video_metadata_module,
+        "video_metadata_cache",
+        VideoMetadataCache(ttl=60, max_entries=16),
+    )
+    server = VideoHost()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_probe_video_metadata_cache(video_host):
+    """Tests that the metadata of a URL is only fetched once."""
+    url = video_host.url("/squirrel.mp4")
+    metadata = await probe_video_metadata(url, timeout=30)
+    assert metadata is not None
+    num_requests = video_host.num_requests
+    assert num_requests > 0
+
+    assert await probe_video_metadata(url, timeout=30) == metadata
+    assert video_host.num_requests == num_requests
+
+
+@pytest.mark.asyncio
+async def test_probe_video_metadata_timeout(video_host):
+    """Tests that a slow host times out without blocking the event loop."""
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    start = time.perf_counter()
+    metadata = await probe_video_metadata(video_host.url("/slow.mp4"), timeout=0.5)
+    elapsed = time.perf_counter() - start
+    ticker.cancel()
+
+    assert metadata is None
+    assert elapsed < SLOW_RESPONSE_DELAY
+    # the event loop kept running while the probe was waiting for the host
+    assert ticks > 10
+    assert len(video_metadata_module.video_metadata_cache) == 0
+
+
+def test_get_video_metadata_timeout(video_host):
+    """Tests that the probe itself stops waiting for a host that doesn't answer."""
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        get_video_metadata(video_host.url("/hang.mp4"), timeout=0.5)
+    # yt-dlp may retry the request, but the thread isn't blocked until the answer
+    assert time.perf_counter() - start < HANG_DELAY / 3
+
+
+def test_video_metadata_cache():
+    """Tests the expiration and eviction of cached metadata."""
+    now = 0.0
+    cache = VideoMetadataCache(ttl=10, max_entries=2, clock=lambda: now)
+    cache.put("a", "metadata a")
+    cache.put("b", "metadata b")
+    assert cache.get("a") == "metadata a"
+
+    now = 5.0
+    cache.put("c", "metadata c")
+    # "a" was the oldest entry
+    assert cache.get("a") is None
+    assert cache.get("b") == "metadata b"
+    assert len(cache) == 2
+
+    now = 10.0
+    assert cache.get("b") is None
+    assert cache.get("c") == "metadata c"
+    now = 15.0
+    assert cache.get("c") is None
+    assert len(cache) == 0
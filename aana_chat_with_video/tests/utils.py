@@ -0,0 +1,167 @@
+"""Benchmark helpers and stubs of the deployments for the tests."""
+
+import asyncio
+import inspect
+import os
+import time
+import uuid
+from collections.abc import Callable
+from importlib import resources
+
+import pytest
+
+from aana.core.models.asr import AsrSegment, AsrTranscription, AsrTranscriptionInfo
+from aana.core.models.time import TimeInterval
+from aana.core.models.vad import VadParams
+from aana.core.models.video import VideoInput, VideoParams
+from aana.core.models.whisper import BatchedWhisperParams
+from aana_chat_with_video.endpoints.index_video import IndexVideoEndpoint
+
+# wall-clock comparisons are noisy on shared machines, so they only run on request
+benchmark = pytest.mark.skipif(
+    "RUN_BENCHMARKS" not in os.environ, reason="RUN_BENCHMARKS is not set"
+)
+
+
+def measure(
+    func: Callable[[], object],
+    repeats: int = 5,
+    setup: Callable[[], object] | None = None,
+) -> float:
+    """Measures the best wall-clock time of a function in seconds.
+
+    Args:
+        func (Callable): the function to measure
+        repeats (int): the number of runs
+        setup (Callable | None): a function that is called before every run and not measured
+
+    Returns:
+        float: the shortest time of the runs in seconds
+    """
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+NUM_ASR_CHUNKS = 10
+NUM_FRAME_BATCHES = 10
+FRAME_BATCH_SIZE = 4
+STEP_LATENCY = 0.05  # seconds per ASR chunk or captioning batch
+
+
+class StubAsrHandle:
+    """Stub for the ASR deployment that streams fixed chunks with a delay."""
+
+    async def transcribe_stream(self, audio, params):
+        """Stream transcription chunks."""
+        for i in range(NUM_ASR_CHUNKS):
+            await asyncio.sleep(STEP_LATENCY)
+            yield {
+                "transcription": AsrTranscription(text=f"chunk {i}"),
+                "segments": [
+                    AsrSegment(
+                        text=f"chunk {i}",
+                        time_interval=TimeInterval(start=i, end=i + 1),
+                    )
+                ],
+                "transcription_info": AsrTranscriptionInfo(
+                    language="en", language_confidence=0.9
+                ),
+            }
+
+
+class StubCaptioningHandle:
+    """Stub for the captioning deployment that captions a batch with a delay."""
+
+    async def generate_batch(self, images):
+        """Caption a batch of images."""
+        await asyncio.sleep(STEP_LATENCY)
+        return {"captions": [f"caption {image}" for image in images]}
+
+
+def stub_generate_frames(video, params):
+    """Generate dummy frame batches."""
+    for i in range(NUM_FRAME_BATCHES):
+        frame_ids = list(range(i * FRAME_BATCH_SIZE, (i + 1) * FRAME_BATCH_SIZE))
+        yield {
+            "frames": frame_ids,
+            "frame_ids": frame_ids,
+            "timestamps": [float(frame_id) for frame_id in frame_ids],
+            "duration": NUM_FRAME_BATCHES * FRAME_BATCH_SIZE,
+        }
+
+
+async def stub_stream_audio(video, chunk_duration, prefetch_depth):
+    """Stream a single dummy audio chunk."""
+    yield 0.0, None
+
+
+def run_local(func):
+    """Replacement for run_remote that runs the function in the current process."""
+    if inspect.isgeneratorfunction(func):
+
+        async def generator_wrapper(*args, **kwargs):
+            for item in func(*args, **kwargs):
+                yield item
+
+        return generator_wrapper
+
+    async def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+class CountingAsrHandle(StubAsrHandle):
+    """ASR stub that counts the transcribed chunks."""
+
+    def __init__(self):
+        """Constructor."""
+        self.num_chunks = 0
+
+    async def transcribe_stream(self, audio, params):
+        """Stream transcription chunks."""
+        async for output in super().transcribe_stream(audio, params):
+            self.num_chunks += 1
+            yield output
+
+
+class FlakyCaptioningHandle(StubCaptioningHandle):
+    """Captioning stub that counts the batches and fails on one of them."""
+
+    def __init__(self, failing_batch: int | None = None):
+        """Constructor."""
+        self.failing_batch = failing_batch
+        self.num_batches = 0
+
+    async def generate_batch(self, images):
+        """Caption a batch of images."""
+        if self.num_batches == self.failing_batch:
+            self.failing_batch = None
+            raise RuntimeError("Transient captioning failure")  # noqa: TRY003
+        self.num_batches += 1
+        return await super().generate_batch(images)
+
+
+async def index(
+    endpoint: IndexVideoEndpoint, media_id: str | None = None
+) -> tuple[list[dict], float, str]:
+    """Index a dummy video and return the outputs, latency and media ID."""
+    media_id = media_id or str(uuid.uuid4())
+    path = resources.path("aana.tests.files.videos", "squirrel.mp4")
+    start = time.perf_counter()
+    outputs = [
+        output
+        async for output in endpoint.run(
+            video=VideoInput(path=str(path), media_id=media_id),
+            video_params=VideoParams(),
+            whisper_params=BatchedWhisperParams(),
+            vad_params=VadParams(),
+        )
+    ]
+    return outputs, time.perf_counter() - start, media_id
@@ -0,0 +1,79 @@
+from aana.core.models.asr import (
+    AsrSegments,
+    AsrTranscription,
+    AsrTranscriptionInfo,
+)
+
+
+class AsrResultBuilder:
+    """Accumulates the partial outputs of streaming ASR.
+
+    Summing the partial outputs with `+` copies the accumulated transcript and
+    segments for every chunk, which is quadratic in the number of chunks. The builder
+    appends them in place and creates the combined output once in `build`. The result
+    is the same as summing the partial outputs in order:
+
+    ```python
+    builder = AsrResultBuilder()
+    for output in outputs:
+        builder.add(**output)
+    builder.build()
+    ```
+
+    Attributes:
+        segments (AsrSegments): the accumulated segments
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.segments: AsrSegments = []
+        self._texts: list[str] = []
+        self._language = ""
+        self._language_confidence = 0.0
+
+    def __len__(self) -> int:
+        """Number of added partial outputs."""
+        return len(self._texts)
+
+    def add(
+        self,
+        transcription: AsrTranscription,
+        segments: AsrSegments,
+        transcription_info: AsrTranscriptionInfo,
+    ):
+        """Add a partial output.
+
+        Args:
+            transcription (AsrTranscription): the partial transcription
+            segments (AsrSegments): the partial segments
+            transcription_info (AsrTranscriptionInfo): the partial transcription info
+        """
+        self._texts.append(transcription.text)
+        self.segments.extend(segments)
+        # the same as AsrTranscriptionInfo.__add__ without creating a new object
+        if self._language == transcription_info.language:
+            self._language_confidence = (
+                self._language_confidence + transcription_info.language_confidence
+            ) / 2
+        elif self._language_confidence <= transcription_info.language_confidence:
+            self._language = transcription_info.language
+            self._language_confidence = transcription_info.language_confidence
+
+    def build(self) -> dict:
+        """Combine the partial outputs.
+
+        Returns:
+            dict: the combined output with the following keys:
+                "transcription": the transcription (AsrTranscription)
+                "segments": the segments (AsrSegments)
+                "transcription_info": the transcription info (AsrTranscriptionInfo)
+        """
+        return {
+            "transcription": AsrTranscription(
+                text="\n".join(text for text in self._texts if text != "")
+            ),
+            "segments": self.segments,
+            "transcription_info": AsrTranscriptionInfo(
+                language=self._language, language_confidence=self._language_confidence
+            ),
+        }
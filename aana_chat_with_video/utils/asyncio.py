@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from collections.abc import AsyncGenerator, Iterator
+from typing import TypeVar
+
+__all__ = ["iterate_in_thread", "merge_async_generators", "prefetch_async_generator"]
+
+T = TypeVar("T")
+
+_ITEM = "item"
+_ERROR = "error"
+_DONE = "done"
+
+
+async def merge_async_generators(
+    *generators: AsyncGenerator[T, None],
+) -> AsyncGenerator[T, None]:
+    """Merge several async generators into one.
+
+    Each generator is drained in its own task, so all of them make progress
+    concurrently. Items are yielded in the order they are produced.
+
+    If any of the generators raises an exception, the remaining tasks are cancelled
+    and the exception is re-raised to the consumer.
+
+    Args:
+        *generators (AsyncGenerator): the generators to merge
+
+    Yields:
+        T: the items produced by the generators
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def drain(generator: AsyncGenerator[T, None]):
+        try:
+            async for item in generator:
+                await queue.put((_ITEM, item))
+        except Exception as e:
+            await queue.put((_ERROR, e))
+        else:
+            await queue.put((_DONE, None))
+
+    tasks = [asyncio.create_task(drain(generator)) for generator in generators]
+    remaining = len(tasks)
+    try:
+        while remaining > 0:
+            kind, value = await queue.get()
+            if kind == _DONE:
+                remaining -= 1
+            elif kind == _ERROR:
+                raise value
+            else:
+                yield value
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def prefetch_async_generator(
+    generator: AsyncGenerator[T, None], depth: int
+) -> AsyncGenerator[T, None]:
+    """Consume an async generator ahead of its consumer.
+
+    The generator is drained by a background task into a queue of size `depth`,
+    so the next items are produced while the consumer processes the current one.
+    The queue size bounds the number of items held in memory. If `depth` is 0,
+    the generator is consumed directly without prefetching.
+
+    Args:
+        generator (AsyncGenerator): the generator to prefetch from
+        depth (int): the maximum number of prefetched items
+
+    Yields:
+        T: the items produced by the generator
+    """
+    if depth <= 0:
+        async for item in generator:
+            yield item
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+
+    async def produce():
+        try:
+            async for item in generator:
+                await queue.put((_ITEM, item))
+        except Exception as e:
+            await queue.put((_ERROR, e))
+        else:
+            await queue.put((_DONE, None))
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == _DONE:
+                break
+            elif kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def iterate_in_thread(
+    iterator: Iterator[T], depth: int = 1
+) -> AsyncGenerator[T, None]:
+    """Consume a blocking iterator in a worker thread.
+
+    The iterator is advanced in a thread of the default executor, so the event loop
+    isn't blocked while the next item is produced. At most `depth` items are produced
+    ahead of the consumer, which bounds the number of items held in memory.
+
+    If the consumer stops early, the thread stops after the item it is producing
+    and the iterator is closed.
+
+    Args:
+        iterator (Iterator): the iterator to consume
+        depth (int): the maximum number of items produced ahead of the consumer
+
+    Yields:
+        T: the items produced by the iterator
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    slots = threading.Semaphore(max(depth, 1))
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            while True:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    loop.call_soon_threadsafe(queue.put_nowait, (_DONE, None))
+                    return
+                loop.call_soon_threadsafe(queue.put_nowait, (_ITEM, item))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (_ERROR, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == _DONE:
+                break
+            elif kind == _ERROR:
+                raise value
+            slots.release()
+            yield value
+    finally:
+        stopped.set()
+        slots.release()
+        await asyncio.shield(producer)
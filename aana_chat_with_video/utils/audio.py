@@ -0,0 +1,204 @@
+import io
+import wave
+from collections.abc import AsyncGenerator, Generator
+from pathlib import Path
+
+import av
+import numpy as np
+
+from aana.core.models.asr import AsrSegments
+from aana.core.models.audio import Audio
+from aana.core.models.time import TimeInterval
+from aana.core.models.video import Video
+from aana.integrations.external.av import (
+    group_frames,
+    ignore_invalid_frames,
+    resample_frames,
+)
+from aana_chat_with_video.utils.asyncio import iterate_in_thread
+
+SAMPLE_RATE = 16000
+
+
+def find_split_point(
+    audio: np.ndarray, search_samples: int, window_samples: int
+) -> int:
+    """Find the quietest point in the last `search_samples` samples of the audio.
+
+    Splitting the audio there instead of at a fixed position avoids cutting words
+    in half between two chunks.
+
+    Args:
+        audio (np.ndarray): the audio
+        search_samples (int): the number of samples at the end of the audio to search
+        window_samples (int): the number of samples the energy is averaged over
+
+    Returns:
+        int: the index of the sample to split the audio at
+    """
+    search_samples = min(search_samples, len(audio))
+    window_samples = min(max(window_samples, 1), search_samples)
+    if search_samples == 0:
+        return len(audio)
+    tail = audio[len(audio) - search_samples :]
+    energy = np.convolve(
+        np.square(tail, dtype=np.float64), np.ones(window_samples), mode="valid"
+    )
+    return len(audio) - search_samples + int(np.argmin(energy)) + window_samples // 2
+
+
+def load_audio_chunks(
+    path: Path,
+    chunk_duration: float,
+    split_search_duration: float = 2.0,
+    sample_rate: int = SAMPLE_RATE,
+) -> Generator[np.ndarray, None, None]:
+    """Decode the audio of a file as mono waveform chunks.
+
+    The audio is decoded incrementally, so only about one chunk is held in memory
+    at a time. Each chunk ends at the quietest point within the last
+    `split_search_duration` seconds before `chunk_duration`; the rest of the audio
+    is carried over to the next chunk.
+
+    Args:
+        path (Path): the audio or video file
+        chunk_duration (float): the maximum duration of a chunk in seconds
+        split_search_duration (float): the duration in seconds at the end of each chunk
+            searched for the quietest point to split at
+        sample_rate (int): the sample rate to resample the audio to
+
+    Yields:
+        np.ndarray: the float32 waveform chunks; nothing if the file has no audio
+    """
+    chunk_samples = max(int(chunk_duration * sample_rate), 1)
+    search_samples = int(split_search_duration * sample_rate)
+    window_samples = sample_rate // 10
+    resampler = av.audio.resampler.AudioResampler(
+        format="s16", layout="mono", rate=sample_rate
+    )
+
+    pending: list[np.ndarray] = []
+    num_pending = 0
+    with av.open(str(path), mode="r", metadata_errors="ignore") as container:
+        if container.streams.audio == tuple():
+            return
+
+        frames = container.decode(audio=0)
+        frames = ignore_invalid_frames(frames)
+        frames = group_frames(frames, sample_rate)
+        frames = resample_frames(frames, resampler)
+
+        for frame in frames:
+            samples = frame.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+            pending.append(samples)
+            num_pending += len(samples)
+            while num_pending >= chunk_samples:
+                audio = np.concatenate(pending)
+                split = find_split_point(
+                    audio[:chunk_samples], search_samples, window_samples
+                )
+                yield audio[:split]
+                pending = [audio[split:]]
+                num_pending = len(pending[0])
+
+    if num_pending > 0:
+        yield np.concatenate(pending)
+
+
+def create_audio_chunk(
+    video: Video, samples: np.ndarray, chunk_index: int, sample_rate: int = SAMPLE_RATE
+) -> Audio:
+    """Create an audio object for a chunk of the audio of a video.
+
+    Args:
+        video (Video): the video
+        samples (np.ndarray): the float32 waveform of the chunk
+        chunk_index (int): the index of the chunk
+        sample_rate (int): the sample rate of the waveform
+
+    Returns:
+        Audio: the audio chunk as 16-bit PCM WAV content
+    """
+    content = io.BytesIO()
+    with wave.open(content, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(
+            np.clip(samples * 32768.0, -32768, 32767).astype(np.int16).tobytes()
+        )
+    return Audio(
+        url=video.url,
+        media_id=f"audio_{video.media_id}_{chunk_index}",
+        content=content.getvalue(),
+        title=video.title,
+        description=video.description,
+    )
+
+
+async def stream_audio(
+    video: Video,
+    chunk_duration: float,
+    split_search_duration: float = 2.0,
+    prefetch_depth: int = 1,
+) -> AsyncGenerator[tuple[float, Audio], None]:
+    """Extract the audio of a video chunk by chunk without blocking the event loop.
+
+    The audio is decoded in a worker thread, at most `prefetch_depth` chunks ahead of
+    the consumer, so the first chunk can be transcribed while the rest is decoded.
+    A video without audio produces a single chunk of silence.
+
+    Args:
+        video (Video): the video
+        chunk_duration (float): the maximum duration of a chunk in seconds
+        split_search_duration (float): the duration in seconds at the end of each chunk
+            searched for the quietest point to split at
+        prefetch_depth (int): the maximum number of chunks decoded ahead of the consumer
+
+    Yields:
+        tuple[float, Audio]: the start time of the chunk in seconds and the chunk
+    """
+    start_time = 0.0
+    chunk_index = 0
+    async for samples in iterate_in_thread(
+        load_audio_chunks(video.path, chunk_duration, split_search_duration),
+        depth=prefetch_depth,
+    ):
+        yield start_time, create_audio_chunk(video, samples, chunk_index)
+        start_time += len(samples) / SAMPLE_RATE
+        chunk_index += 1
+    if chunk_index == 0:
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        yield 0.0, create_audio_chunk(video, silence, 0)
+
+
+def shift_segments(segments: AsrSegments, offset: float) -> AsrSegments:
+    """Shift the time intervals of ASR segments and their words.
+
+    Args:
+        segments (AsrSegments): the ASR segments of an audio chunk
+        offset (float): the start time of the chunk in seconds
+
+    Returns:
+        AsrSegments: the segments with the time intervals relative to the whole audio
+    """
+    if offset == 0:
+        return segments
+
+    def shift(time_interval: TimeInterval) -> TimeInterval:
+        return TimeInterval(
+            start=time_interval.start + offset, end=time_interval.end + offset
+        )
+
+    return [
+        segment.model_copy(
+            update={
+                "time_interval": shift(segment.time_interval),
+                "words": [
+                    word.model_copy(update={"time_interval": shift(word.time_interval)})
+                    for word in segment.words
+                ],
+            }
+        )
+        for segment in segments
+    ]
@@ -0,0 +1,163 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+from aana.core.models.captions import CaptionsList
+
+__all__ = ["BatchedCaptioningHandle", "DynamicBatcher"]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class DynamicBatcher(Generic[T, R]):
+    """Coalesces the items of concurrent requests into batches.
+
+    The items of all requests are queued together. A batch is processed as soon as
+    `max_batch_size` items are queued or `max_wait_time` seconds after the oldest
+    queued item arrived, whichever comes first. The results are routed back to the
+    requests in the order of their items. Several batches can be processed at the
+    same time.
+
+    The requests share the failures of their batches: if processing a batch raises,
+    every request with an item in the batch gets the exception, even if its own
+    items didn't cause it.
+
+    The batcher is local to the event loop it is used on.
+
+    Attributes:
+        max_batch_size (int): the maximum number of items in a batch
+        max_wait_time (float): the maximum time in seconds an item waits for a batch
+        num_batches (int): the number of processed batches
+        num_items (int): the number of processed items
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[T]], Awaitable[list[R]]],
+        max_batch_size: int,
+        max_wait_time: float,
+    ):
+        """Constructor.
+
+        Args:
+            process_batch (Callable[[list[T]], Awaitable[list[R]]]): the function that
+                processes a batch of items and returns a result for each item
+            max_batch_size (int): the maximum number of items in a batch
+            max_wait_time (float): the maximum time in seconds an item waits for a batch
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        self.num_batches = 0
+        self.num_items = 0
+        self._pending: list[tuple[T, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def process(self, items: list[T]) -> list[R]:
+        """Process the items in the batches shared with the concurrent requests.
+
+        Args:
+            items (list[T]): the items
+
+        Returns:
+            list[R]: the results in the order of the items
+
+        Raises:
+            Exception: the exception raised by processing any batch with the items
+        """
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in items]
+        self._pending.extend(zip(items, futures, strict=True))
+        while len(self._pending) >= self.max_batch_size:
+            self._flush()
+        if len(self._pending) > 0 and self._timer is None:
+            self._timer = loop.call_later(self.max_wait_time, self._on_timeout)
+        return list(await asyncio.gather(*futures))
+
+    def _on_timeout(self):
+        """Process the queued items that waited `max_wait_time` seconds."""
+        self._timer = None
+        while len(self._pending) > 0:
+            self._flush()
+
+    def _flush(self):
+        """Start processing a batch of the oldest queued items."""
+        batch = self._pending[: self.max_batch_size]
+        del self._pending[: self.max_batch_size]
+        if len(self._pending) == 0 and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # the items of cancelled requests are dropped
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if len(batch) == 0:
+            return
+        task = asyncio.create_task(self._process(batch))
+        # keep a reference to the task until it is done
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch: list[tuple[T, asyncio.Future]]):
+        """Process a batch and set the results of the items.
+
+        If processing the batch raises, the exception is set on all the items of the
+        batch, so all the requests with items in the batch fail.
+        """
+        self.num_batches += 1
+        self.num_items += len(batch)
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results, strict=True):
+                if not future.done():
+                    future.set_result(result)
+
+
+class BatchedCaptioningHandle:
+    """Captioning deployment handle that batches the frames of concurrent requests.
+
+    Each indexing request sends the frames of one video, which underfills the batches
+    of the deployment when several videos are indexed at once. The handle has the
+    `generate_batch` method of the deployment, but coalesces the frames of all requests
+    of the replica with a `DynamicBatcher`.
+
+    Attributes:
+        handle (Any): the handle of the captioning deployment
+        batcher (DynamicBatcher): the batcher of the frames
+    """
+
+    def __init__(self, handle: Any, max_batch_size: int, max_wait_time: float):
+        """Constructor.
+
+        Args:
+            handle (Any): the handle of the captioning deployment
+            max_batch_size (int): the maximum number of frames sent to the deployment
+            max_wait_time (float): the maximum time in seconds a frame waits for a batch
+        """
+        self.handle = handle
+        self.batcher = DynamicBatcher(
+            process_batch=self.caption_batch,
+            max_batch_size=max_batch_size,
+            max_wait_time=max_wait_time,
+        )
+
+    async def caption_batch(self, images: list) -> CaptionsList:
+        """Caption a coalesced batch of frames with the deployment."""
+        captioning_output = await self.handle.generate_batch(images=images)
+        return captioning_output["captions"]
+
+    async def generate_batch(self, images: list) -> dict:
+        """Caption the frames of a request.
+
+        Args:
+            images (list): the frames
+
+        Returns:
+            dict: the dictionary with the captions of the frames under "captions"
+        """
+        return {"captions": await self.batcher.process(images)}
@@ -0,0 +1,244 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from aana.core.models.chat import ChatDialog, ChatMessage
+from aana.core.models.media import MediaId
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.exceptions.core import ChatSessionTooLongException
+from aana_chat_with_video.utils.retrieval import estimate_tokens
+
+
+class ChatSession:
+    """Conversation about a video.
+
+    The first exchange (the system prompt, the user prompt with the timeline and the
+    first question, and the answer) is pinned: it is never trimmed, so the prompts of
+    all turns share it as a prefix. Follow-up turns are appended after it.
+
+    Attributes:
+        session_id (str): the session ID
+        media_id (MediaId): the media ID of the video
+        version (Any): the version of the video the session was started with
+        messages (list[ChatMessage]): the messages of the conversation
+        last_access (float): the time of the last access to the session
+        lock (asyncio.Lock): lock that serializes the turns of the session
+    """
+
+    num_pinned_messages = 3
+
+    def __init__(
+        self,
+        session_id: str,
+        media_id: MediaId,
+        version: Any,
+        messages: list[ChatMessage],
+        last_access: float,
+    ):
+        """Constructor.
+
+        Args:
+            session_id (str): the session ID
+            media_id (MediaId): the media ID of the video
+            version (Any): the version of the video the session was started with
+            messages (list[ChatMessage]): the messages of the conversation
+            last_access (float): the time of the last access to the session
+        """
+        self.session_id = session_id
+        self.media_id = media_id
+        self.version = version
+        self.messages = messages
+        self.last_access = last_access
+        self.lock = asyncio.Lock()
+
+    def get_dialog(self, question: str) -> ChatDialog:
+        """Get the dialog for a follow-up question.
+
+        Args:
+            question (str): the follow-up question
+
+        Returns:
+            ChatDialog: the conversation followed by the question
+        """
+        return ChatDialog(
+            messages=[*self.messages, ChatMessage(content=question, role="user")]
+        )
+
+    def add_answer(self, answer: str):
+        """Add the answer to the first question of the conversation.
+
+        Args:
+            answer (str): the answer
+        """
+        self.messages.append(ChatMessage(content=answer, role="assistant"))
+
+    def add_turn(self, question: str, answer: str):
+        """Add a follow-up question and its answer to the conversation.
+
+        Args:
+            question (str): the question
+            answer (str): the answer
+        """
+        self.messages.append(ChatMessage(content=question, role="user"))
+        self.messages.append(ChatMessage(content=answer, role="assistant"))
+
+    def trim(
+        self, max_tokens: int, reserved_tokens: int = 0, chars_per_token: float = 4.0
+    ):
+        """Remove the oldest follow-up turns until the conversation fits the limit.
+
+        The pinned first exchange is always kept. If it doesn't fit the limit with the
+        reserved tokens, nothing is trimmed and the next question is rejected.
+
+        Args:
+            max_tokens (int): the maximum number of (estimated) tokens of the
+                conversation
+            reserved_tokens (int): the number of tokens reserved for the next question
+            chars_per_token (float): the average number of characters per token
+
+        Raises:
+            ChatSessionTooLongException: if the first exchange and the reserved tokens
+                exceed the limit
+        """
+        start = self.num_pinned_messages
+        pinned_tokens = reserved_tokens + sum(
+            estimate_tokens(message.content, chars_per_token)
+            for message in self.messages[:start]
+        )
+        if pinned_tokens > max_tokens:
+            raise ChatSessionTooLongException(
+                session_id=self.session_id,
+                num_tokens=pinned_tokens,
+                max_tokens=max_tokens,
+            )
+        num_tokens = pinned_tokens + sum(
+            estimate_tokens(message.content, chars_per_token)
+            for message in self.messages[start:]
+        )
+        while num_tokens > max_tokens and len(self.messages) > start:
+            for message in self.messages[start : start + 2]:
+                num_tokens -= estimate_tokens(message.content, chars_per_token)
+            del self.messages[start : start + 2]
+
+
+class ChatSessionStore:
+    """In-memory store of chat sessions.
+
+    Sessions expire `ttl` seconds after their last access. When the store holds
+    more than `max_sessions` sessions, the least recently used ones are evicted.
+
+    The store is local to the process; call `invalidate` whenever a video is deleted.
+
+    Attributes:
+        ttl (float): the time to live of a session in seconds
+        max_sessions (int): the maximum number of sessions
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_sessions: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Constructor.
+
+        Args:
+            ttl (float): the time to live of a session in seconds
+            max_sessions (int): the maximum number of sessions
+            clock (Callable[[], float]): the function returning the current time in seconds
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of sessions."""
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> ChatSession | None:
+        """Get a session and refresh its expiration time.
+
+        Args:
+            session_id (str): the session ID
+
+        Returns:
+            ChatSession | None: the session or None if it doesn't exist or has expired
+        """
+        self.evict_expired()
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        session.last_access = self.clock()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def create(
+        self,
+        session_id: str,
+        media_id: MediaId,
+        version: Any,
+        messages: list[ChatMessage],
+    ) -> ChatSession:
+        """Create a new session.
+
+        Args:
+            session_id (str): the session ID
+            media_id (MediaId): the media ID of the video
+            version (Any): the version of the video
+            messages (list[ChatMessage]): the first exchange of the conversation
+
+        Returns:
+            ChatSession: the new session
+        """
+        self.evict_expired()
+        session = ChatSession(
+            session_id=session_id,
+            media_id=media_id,
+            version=version,
+            messages=messages,
+            last_access=self.clock(),
+        )
+        self._sessions[session.session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def delete(self, session_id: str):
+        """Delete a session.
+
+        Args:
+            session_id (str): the session ID
+        """
+        self._sessions.pop(session_id, None)
+
+    def invalidate(self, media_id: MediaId):
+        """Delete all sessions about a video.
+
+        Args:
+            media_id (MediaId): the media ID of the video
+        """
+        for session_id in [
+            session_id
+            for session_id, session in self._sessions.items()
+            if session.media_id == media_id
+        ]:
+            del self._sessions[session_id]
+
+    def evict_expired(self):
+        """Delete the sessions that have not been accessed for `ttl` seconds."""
+        now = self.clock()
+        # sessions are ordered by last access, so the expired ones come first
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access < self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+
+chat_session_store = ChatSessionStore(
+    ttl=settings.chat_session.ttl,
+    max_sessions=settings.chat_session.max_sessions,
+)
@@ -0,0 +1,54 @@
+import hashlib
+import json
+from pathlib import Path
+
+from aana.core.models.video import VideoParams
+from aana.core.models.whisper import BatchedWhisperParams
+from aana_chat_with_video.configs.settings import settings
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 hash of a file.
+
+    Args:
+        path (Path): the path to the file
+        chunk_size (int): the number of bytes read at a time
+
+    Returns:
+        str: the hex digest of the file content
+    """
+    file_hash = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        while chunk := f.read(chunk_size):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_content_hash(
+    source: str, video_params: VideoParams, whisper_params: BatchedWhisperParams
+) -> str:
+    """Compute the hash identifying the outputs of indexing a video.
+
+    Two videos with the same hash have the same transcript and captions: they come
+    from the same source and are indexed with the same models and parameters.
+
+    Args:
+        source (str): the source of the video, e.g. `url:<URL>` or `sha256:<file hash>`
+        video_params (VideoParams): the parameters of the frame extraction
+        whisper_params (BatchedWhisperParams): the parameters of the transcription
+
+    Returns:
+        str: the hex digest of the hash
+    """
+    key = {
+        "source": source,
+        "asr_model_name": settings.asr_model_name,
+        "captioning_model_name": settings.captioning_model_name,
+        "video_params": video_params.model_dump(mode="json"),
+        "whisper_params": whisper_params.model_dump(mode="json"),
+        # the captioned frames depend on the frame sampling
+        "frame_sampling": settings.frame_sampling.model_dump(mode="json")
+        if settings.frame_sampling.enabled
+        else None,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
@@ -1,15 +1,48 @@
-from collections import defaultdict
-from math import floor
+from difflib import SequenceMatcher
+
+import numpy as np
 
 from aana.core.models.asr import AsrSegments
 from aana.core.models.chat import ChatDialog, ChatMessage, Question
 from aana.core.models.video import VideoMetadata
+from aana_chat_with_video.core.models.prompt import PromptLayout
+from aana_chat_with_video.core.models.timeline import TimelineFormat
+from aana_chat_with_video.core.models.transcript import TranscriptSegments
+
+
+JSON_SCRIPT_DESCRIPTION = """in json format for a video containing information from visual captions and audio transcripts. Each entry in the script follows the format:
+
+    {{
+    "start_time":"start_time_in_seconds",
+    "end_time": "end_time_in_seconds",
+    "audio_transcript": "the_transcript_from_automatic_speech_recognition_system",
+    "visual_caption": "the_caption_of_the_visuals_using_computer_vision_system"
+    }}
+    Note that the audio_transcript can sometimes be empty.
+"""
+
+SCRIPT_DESCRIPTIONS = {
+    TimelineFormat.JSON: JSON_SCRIPT_DESCRIPTION,
+    TimelineFormat.COMPACT_JSON: JSON_SCRIPT_DESCRIPTION,
+    TimelineFormat.LINES: """for a video containing information from visual captions and audio transcripts. Each line of the script follows the format:
+
+    [start_time_in_seconds-end_time_in_seconds] A: the_transcript_from_automatic_speech_recognition_system V: the_captions_of_the_visuals_using_computer_vision_system
+    Note that the audio transcript (A:) or the visual captions (V:) can sometimes be missing.
+""",
+    TimelineFormat.TEMPLATE: """for a video containing information from visual captions and audio transcripts. Each line of the script follows the format:
+
+    start_time_in_seconds-end_time_in_seconds s | audio: the_transcript_from_automatic_speech_recognition_system | visual: the_captions_of_the_visuals_using_computer_vision_system
+    Note that the audio or the visual part can sometimes be missing.
+""",
+}
 
 
 def generate_dialog(
     metadata: VideoMetadata,
     timeline: str,
     question: Question,
+    timeline_format: TimelineFormat = TimelineFormat.JSON,
+    prompt_layout: PromptLayout = PromptLayout.TIMELINE_FIRST,
 ) -> ChatDialog:
     """Generates a dialog from the metadata and timeline of a video.
 
@@ -17,27 +50,32 @@ def generate_dialog(
         metadata (VideoMetadata): the metadata of the video
         timeline (str): the timeline of the video
         question (Question): the question to ask
+        timeline_format (TimelineFormat): the format the timeline is rendered in. Defaults to JSON.
+        prompt_layout (PromptLayout): the layout of the prompt. TIMELINE_FIRST shares
+            the prompt prefix between questions about the same video. Defaults to
+            TIMELINE_FIRST, the default of `settings.prompt_layout`.
 
     Returns:
         ChatDialog: the generated dialog
     """
-    system_prompt_preamble = """You are a helpful, respectful, and honest assistant. Always answer as helpfully as possible, while ensuring safety. You will be provided with a script in json format for a video containing information from visual captions and audio transcripts. Each entry in the script follows the format:
-
-    {{
-    "start_time":"start_time_in_seconds",
-    "end_time": "end_time_in_seconds",
-    "audio_transcript": "the_transcript_from_automatic_speech_recognition_system",
-    "visual_caption": "the_caption_of_the_visuals_using_computer_vision_system"
-    }}
-    Note that the audio_transcript can sometimes be empty.
-
+    system_prompt_preamble = (
+        "You are a helpful, respectful, and honest assistant. Always answer as helpfully as possible, "
+        "while ensuring safety. You will be provided with a script "
+        + SCRIPT_DESCRIPTIONS[timeline_format]
+        + """
     Ensure you do not introduce any new named entities in your output and maintain the utmost factual accuracy in your responses.
 
     In the addition you will be provided with title of video extracted.
     """
+    )
+    script_format = (
+        " in JSON format"
+        if timeline_format in (TimelineFormat.JSON, TimelineFormat.COMPACT_JSON)
+        else ""
+    )
     instruction = (
         "Provide a short and concise answer to the following user's question. "
-        "Avoid mentioning any details about the script in JSON format. "
+        f"Avoid mentioning any details about the script{script_format}. "
         "For example, a good response would be: 'Based on the analysis, "
         "here are the most relevant/useful/aesthetic moments.' "
         "A less effective response would be: "
@@ -45,15 +83,27 @@ def generate_dialog(
         "here are the most relevant/useful/aesthetic moments. The user question is "
     )
 
-    user_prompt_template = (
-        "{instruction}"
-        "Given the timeline of audio and visual activities in the video below "
-        "I want to find out the following: {question}"
-        "The timeline is: "
-        "{timeline}"
-        "\n"
-        "The title of the video is {video_title}"
-    )
+    if prompt_layout == PromptLayout.TIMELINE_FIRST:
+        # everything before the question only depends on the video
+        user_prompt_template = (
+            "The title of the video is {video_title}"
+            "\n"
+            "The timeline of audio and visual activities in the video is: "
+            "{timeline}"
+            "\n"
+            "{instruction}"
+            "{question}"
+        )
+    else:
+        user_prompt_template = (
+            "{instruction}"
+            "Given the timeline of audio and visual activities in the video below "
+            "I want to find out the following: {question}"
+            "The timeline is: "
+            "{timeline}"
+            "\n"
+            "The title of the video is {video_title}"
+        )
 
     messages = []
     messages.append(ChatMessage(content=system_prompt_preamble, role="system"))
@@ -73,56 +123,388 @@ def generate_dialog(
     return dialog
 
 
+def normalize_caption(caption: str) -> str:
+    """Normalizes a caption for comparison (case, whitespace and trailing punctuation).
+
+    Args:
+        caption (str): the caption
+
+    Returns:
+        str: the normalized caption
+    """
+    return " ".join(caption.lower().split()).strip(" .,;!")
+
+
+def collapse_captions(
+    captions: list[str],
+    caption_timestamps: list[float],
+    similarity_threshold: float = 1.0,
+) -> tuple[list[str], list[float]]:
+    """Collapses runs of identical or near-identical consecutive captions.
+
+    Each run is replaced by its first caption annotated with the time span of the run,
+    e.g. "a man is talking (12.0s-40.0s)". A run is only collapsed if the annotated
+    caption is shorter than the captions of the run joined with newlines, so collapsing
+    never makes the timeline longer. Captions that are not repeated are kept as is.
+
+    Args:
+        captions (list[str]): the captions
+        caption_timestamps (list[float]): the timestamps for the captions
+        similarity_threshold (float, optional): the minimum similarity ratio between two
+            normalized captions to be considered the same. Defaults to 1.0 (exact match).
+
+    Returns:
+        tuple[list[str], list[float]]: the collapsed captions and their start timestamps
+    """
+    collapsed_captions: list[str] = []
+    collapsed_timestamps: list[float] = []
+
+    def add_run(run_captions: list[str], run_timestamps: list[float]):
+        if len(run_captions) > 1:
+            start, end = run_timestamps[0], run_timestamps[-1]
+            caption = f"{run_captions[0]} ({start:.1f}s-{end:.1f}s)"
+            if len(caption) < len("\n".join(run_captions)):
+                collapsed_captions.append(caption)
+                collapsed_timestamps.append(start)
+                return
+        collapsed_captions.extend(run_captions)
+        collapsed_timestamps.extend(run_timestamps)
+
+    run_key = None
+    run_captions: list[str] = []
+    run_timestamps: list[float] = []
+    for caption, timestamp in zip(captions, caption_timestamps, strict=True):
+        key = normalize_caption(caption)
+        if run_key is not None and (
+            key == run_key
+            or (
+                similarity_threshold < 1.0
+                and SequenceMatcher(None, key, run_key).ratio() >= similarity_threshold
+            )
+        ):
+            run_captions.append(caption)
+            run_timestamps.append(timestamp)
+            continue
+        add_run(run_captions, run_timestamps)
+        run_key, run_captions, run_timestamps = key, [caption], [timestamp]
+    add_run(run_captions, run_timestamps)
+
+    return collapsed_captions, collapsed_timestamps
+
+
+def collapse_timeline_captions(
+    captions: list[str],
+    caption_timestamps: list[float],
+    similarity_threshold: float = 1.0,
+) -> tuple[list[str], list[float], int]:
+    """Collapses repeated captions and counts the saved characters.
+
+    The saved characters are counted on the captions joined with newlines, the way
+    they are joined in the timeline.
+
+    Args:
+        captions (list[str]): the captions
+        caption_timestamps (list[float]): the timestamps for the captions
+        similarity_threshold (float, optional): the minimum similarity ratio of captions
+            to be merged. Defaults to 1.0 (exact match).
+
+    Returns:
+        tuple[list[str], list[float], int]: the collapsed captions, their start timestamps
+            and the number of characters removed
+    """
+    original_characters = len("\n".join(captions))
+    captions, caption_timestamps = collapse_captions(
+        captions, caption_timestamps, similarity_threshold
+    )
+    saved_characters = original_characters - len("\n".join(captions))
+    return captions, caption_timestamps, saved_characters
+
+
+def get_chunk_indices(timestamps: list[float], chunk_size: float) -> np.ndarray:
+    """Computes the index of the timeline chunk of each timestamp.
+
+    Uses floor(timestamp / chunk_size) like `math.floor` (not floor division, which
+    rounds differently for some floats) so chunk boundaries match the scalar computation.
+
+    Args:
+        timestamps (list[float]): the timestamps in seconds
+        chunk_size (float): the chunk size in seconds
+
+    Returns:
+        np.ndarray: the chunk indices
+    """
+    return np.floor(np.asarray(timestamps, dtype=np.float64) / chunk_size).astype(
+        np.int64
+    )
+
+
+def group_by_chunk(
+    texts: list[str], chunk_indices: np.ndarray, num_chunks: int
+) -> list[str]:
+    """Joins the texts of each chunk with newlines, keeping their order within a chunk.
+
+    Args:
+        texts (list[str]): the texts
+        chunk_indices (np.ndarray): the chunk index of each text
+        num_chunks (int): the number of chunks; texts outside [0, num_chunks) are dropped
+
+    Returns:
+        list[str]: the joined texts of each chunk
+    """
+    order = np.argsort(chunk_indices, kind="stable")
+    boundaries = np.searchsorted(
+        chunk_indices[order], np.arange(num_chunks + 1)
+    ).tolist()
+    sorted_texts = [texts[i] for i in order.tolist()]
+    return [
+        "\n".join(sorted_texts[boundaries[i] : boundaries[i + 1]])
+        for i in range(num_chunks)
+    ]
+
+
 def generate_combined_timeline(
-    transcription_segments: AsrSegments,
+    transcription_segments: AsrSegments | TranscriptSegments,
     captions: list[str],
     caption_timestamps: list[float],
     chunk_size: float = 10.0,
+    collapse_repeated_captions: bool = False,
+    caption_similarity_threshold: float = 1.0,
 ):
     """Generates a combined timeline from the ASR segments and the captions.
 
     Args:
-        transcription_segments (AsrSegments): the ASR segments
+        transcription_segments (AsrSegments | TranscriptSegments): the ASR segments
         captions (list[str]): the captions
         caption_timestamps (list[float]): the timestamps for the captions
         chunk_size (float, optional): the chunk size for the combined timeline in seconds. Defaults to 10.0.
+        collapse_repeated_captions (bool, optional): whether to merge runs of (near-)identical consecutive
+            captions into one entry with a time span. Defaults to False.
+        caption_similarity_threshold (float, optional): the minimum similarity for captions to be merged
+            when collapse_repeated_captions is enabled. Defaults to 1.0 (exact match after normalization).
 
     Returns:
-        dict: dictionary containing one key, "timeline", which is a list of dictionaries with the following keys:
-            "start_time": the start time of the chunk in seconds
-            "end_time": the end time of the chunk in seconds
-            "audio_transcript": the audio transcript for the chunk
-            "visual_caption": the visual caption for the chunk
+        dict: dictionary containing the following keys:
+            "timeline": a list of dictionaries with the following keys:
+                "start_time": the start time of the chunk in seconds
+                "end_time": the end time of the chunk in seconds
+                "audio_transcript": the audio transcript for the chunk
+                "visual_caption": the visual caption for the chunk
+            "saved_characters": the number of characters removed from the visual captions
+                by collapsing repeated captions (0 if collapsing is disabled)
     """
-    timeline_dict: defaultdict[int, dict[str, list[str]]] = defaultdict(
-        lambda: {"transcription": [], "captions": []}
-    )
-    for segment in transcription_segments:
-        segment_start = segment.time_interval.start
-        chunk_index = floor(segment_start / chunk_size)
-        timeline_dict[chunk_index]["transcription"].append(segment.text)
-
     if len(captions) != len(caption_timestamps):
         raise ValueError(  # noqa: TRY003
             f"Length of captions ({len(captions)}) and timestamps ({len(caption_timestamps)}) do not match"
         )
 
-    for timestamp, caption in zip(caption_timestamps, captions, strict=True):
-        chunk_index = floor(timestamp / chunk_size)
-        timeline_dict[chunk_index]["captions"].append(caption)
+    saved_characters = 0
+    if collapse_repeated_captions:
+        captions, caption_timestamps, saved_characters = collapse_timeline_captions(
+            captions, caption_timestamps, caption_similarity_threshold
+        )
 
-    num_chunks = max(timeline_dict.keys()) + 1
+    if not isinstance(transcription_segments, TranscriptSegments):
+        transcription_segments = TranscriptSegments.from_asr_segments(
+            transcription_segments
+        )
+
+    transcription_chunks = get_chunk_indices(transcription_segments.starts, chunk_size)
+    caption_chunks = get_chunk_indices(caption_timestamps, chunk_size)
+    num_chunks = (
+        int(max(transcription_chunks.max(initial=-1), caption_chunks.max(initial=-1)))
+        + 1
+    )
+    transcriptions = group_by_chunk(
+        transcription_segments.texts, transcription_chunks, num_chunks
+    )
+    chunk_captions = group_by_chunk(captions, caption_chunks, num_chunks)
 
     timeline = [
         {
             "start_time": chunk_index * chunk_size,
             "end_time": (chunk_index + 1) * chunk_size,
-            "audio_transcript": "\n".join(timeline_dict[chunk_index]["transcription"]),
-            "visual_caption": "\n".join(timeline_dict[chunk_index]["captions"]),
+            "audio_transcript": transcriptions[chunk_index],
+            "visual_caption": chunk_captions[chunk_index],
+        }
+        for chunk_index in range(num_chunks)
+    ]
+
+    return {
+        "timeline": timeline,
+        "saved_characters": saved_characters,
+    }
+
+
+def plan_adaptive_chunks(
+    times: np.ndarray,
+    weights: np.ndarray,
+    min_chunk_size: float,
+    max_chunk_size: float,
+    max_chunk_characters: int,
+) -> np.ndarray:
+    """Splits a timeline into chunks of variable size based on the density of its content.
+
+    A chunk starts at the first item after the previous chunk and is closed when the next
+    item is `max_chunk_size` seconds after its start or when the chunk spans at least
+    `min_chunk_size` seconds and the next item would exceed `max_chunk_characters`. Dense
+    stretches get short chunks, sparse stretches long ones and empty stretches none.
+
+    Args:
+        times (np.ndarray): the start times of the items (segments and captions)
+        weights (np.ndarray): the number of characters of each item
+        min_chunk_size (float): the minimum chunk size in seconds
+        max_chunk_size (float): the maximum chunk size in seconds
+        max_chunk_characters (int): the number of characters after which a chunk is closed
+
+    Returns:
+        np.ndarray: the sorted start times of the chunks
+    """
+    order = np.argsort(times, kind="stable")
+    chunk_starts: list[float] = []
+    chunk_characters = 0
+    for time, weight in zip(times[order].tolist(), weights[order].tolist(), strict=True):
+        if (
+            not chunk_starts
+            or time - chunk_starts[-1] >= max_chunk_size
+            or (
+                chunk_characters + weight > max_chunk_characters
+                and time - chunk_starts[-1] >= min_chunk_size
+            )
+        ):
+            chunk_starts.append(time)
+            chunk_characters = 0
+        chunk_characters += weight
+    return np.asarray(chunk_starts, dtype=np.float64)
+
+
+def assign_segments_by_overlap(
+    starts: np.ndarray, ends: np.ndarray, chunk_starts: np.ndarray
+) -> np.ndarray:
+    """Assigns each segment to the chunk it overlaps the most.
+
+    Chunk i spans [chunk_starts[i], chunk_starts[i + 1]) and the last chunk is open-ended.
+    The chunks overlapping a segment are found by binary search over the chunk starts,
+    so the assignment takes O(n log m) plus the number of spanned chunks.
+
+    Args:
+        starts (np.ndarray): the start times of the segments
+        ends (np.ndarray): the end times of the segments
+        chunk_starts (np.ndarray): the sorted start times of the chunks
+
+    Returns:
+        np.ndarray: the chunk index of each segment
+    """
+    first_chunks = np.searchsorted(chunk_starts, starts, side="right") - 1
+    last_chunks = np.maximum(
+        np.searchsorted(chunk_starts, ends, side="left") - 1, first_chunks
+    )
+    chunk_indices = first_chunks.copy()
+    for i in np.flatnonzero(last_chunks > first_chunks).tolist():
+        first, last = first_chunks[i], last_chunks[i]
+        bounds = chunk_starts[first : last + 2].copy()
+        bounds[0] = starts[i]
+        if len(bounds) < last - first + 2:
+            bounds = np.append(bounds, ends[i])
+        else:
+            bounds[-1] = min(bounds[-1], ends[i])
+        chunk_indices[i] = first + int(np.argmax(np.diff(bounds)))
+    return chunk_indices
+
+
+def generate_adaptive_timeline(
+    transcription_segments: AsrSegments | TranscriptSegments,
+    captions: list[str],
+    caption_timestamps: list[float],
+    min_chunk_size: float = 5.0,
+    max_chunk_size: float = 30.0,
+    max_chunk_characters: int = 1000,
+    collapse_repeated_captions: bool = False,
+    caption_similarity_threshold: float = 1.0,
+):
+    """Generates a combined timeline with chunks of variable size from the ASR segments and the captions.
+
+    Unlike `generate_combined_timeline`, the chunk boundaries follow the content (see
+    `plan_adaptive_chunks`), each segment belongs to the chunk it overlaps the most
+    instead of the chunk it starts in, and empty chunks are omitted.
+
+    Args:
+        transcription_segments (AsrSegments | TranscriptSegments): the ASR segments
+        captions (list[str]): the captions
+        caption_timestamps (list[float]): the timestamps for the captions
+        min_chunk_size (float, optional): the minimum chunk size in seconds. Defaults to 5.0.
+        max_chunk_size (float, optional): the maximum chunk size in seconds. Defaults to 30.0.
+        max_chunk_characters (int, optional): the number of characters after which a chunk
+            is closed. Defaults to 1000.
+        collapse_repeated_captions (bool, optional): whether to merge runs of (near-)identical consecutive
+            captions into one entry with a time span. Defaults to False.
+        caption_similarity_threshold (float, optional): the minimum similarity for captions to be merged
+            when collapse_repeated_captions is enabled. Defaults to 1.0 (exact match after normalization).
+
+    Returns:
+        dict: dictionary with the same keys as the output of `generate_combined_timeline`
+    """
+    if len(captions) != len(caption_timestamps):
+        raise ValueError(  # noqa: TRY003
+            f"Length of captions ({len(captions)}) and timestamps ({len(caption_timestamps)}) do not match"
+        )
+
+    saved_characters = 0
+    if collapse_repeated_captions:
+        captions, caption_timestamps, saved_characters = collapse_timeline_captions(
+            captions, caption_timestamps, caption_similarity_threshold
+        )
+
+    if not isinstance(transcription_segments, TranscriptSegments):
+        transcription_segments = TranscriptSegments.from_asr_segments(
+            transcription_segments
+        )
+
+    segment_texts = transcription_segments.texts
+    segment_starts = np.asarray(transcription_segments.starts, dtype=np.float64)
+    segment_ends = np.maximum(
+        np.asarray(transcription_segments.ends, dtype=np.float64), segment_starts
+    )
+    caption_times = np.asarray(caption_timestamps, dtype=np.float64)
+
+    chunk_starts = plan_adaptive_chunks(
+        times=np.concatenate([segment_starts, caption_times]),
+        weights=np.asarray(
+            [len(text) + 1 for text in segment_texts]
+            + [len(caption) + 1 for caption in captions],
+            dtype=np.int64,
+        ),
+        min_chunk_size=min_chunk_size,
+        max_chunk_size=max_chunk_size,
+        max_chunk_characters=max_chunk_characters,
+    )
+    num_chunks = len(chunk_starts)
+
+    segment_chunks = assign_segments_by_overlap(
+        segment_starts, segment_ends, chunk_starts
+    )
+    caption_chunks = np.searchsorted(chunk_starts, caption_times, side="right") - 1
+    transcriptions = group_by_chunk(segment_texts, segment_chunks, num_chunks)
+    chunk_captions = group_by_chunk(captions, caption_chunks, num_chunks)
+
+    # a chunk ends with its content, but not before min_chunk_size or after the next chunk starts
+    content_ends = np.full(num_chunks, -np.inf)
+    np.maximum.at(content_ends, segment_chunks, segment_ends)
+    np.maximum.at(content_ends, caption_chunks, caption_times)
+    chunk_ends = np.maximum(content_ends, chunk_starts + min_chunk_size)
+    chunk_ends[:-1] = np.minimum(chunk_ends[:-1], chunk_starts[1:])
+
+    timeline = [
+        {
+            "start_time": round(float(chunk_starts[chunk_index]), 2),
+            "end_time": round(float(chunk_ends[chunk_index]), 2),
+            "audio_transcript": transcriptions[chunk_index],
+            "visual_caption": chunk_captions[chunk_index],
         }
         for chunk_index in range(num_chunks)
+        if transcriptions[chunk_index] or chunk_captions[chunk_index]
     ]
 
     return {
         "timeline": timeline,
+        "saved_characters": saved_characters,
     }
@@ -0,0 +1,98 @@
+import numpy as np
+
+from aana.core.models.image import Image
+
+
+class FrameSampler:
+    """Adaptive frame sampler that drops near-duplicate frames before captioning.
+
+    Each frame is reduced to a small grayscale thumbnail and compared to the last
+    kept frame with the mean absolute difference of pixel intensities (in [0, 1]).
+    A frame is kept if the difference exceeds the threshold or if no frame has been
+    kept for `max_interval` seconds.
+
+    The sampler is stateful: feed it the batches of a single video in order.
+
+    Attributes:
+        threshold (float): minimum mean absolute difference to keep a frame
+        max_interval (float): maximum time between two kept frames in seconds
+        thumbnail_size (int): size of the thumbnails used for comparison
+    """
+
+    def __init__(
+        self, threshold: float, max_interval: float, thumbnail_size: int = 32
+    ):
+        """Constructor.
+
+        Args:
+            threshold (float): minimum mean absolute difference to keep a frame
+            max_interval (float): maximum time between two kept frames in seconds
+            thumbnail_size (int): size of the thumbnails used for comparison
+        """
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.thumbnail_size = thumbnail_size
+        self.last_thumbnail: np.ndarray | None = None
+        self.last_timestamp: float | None = None
+
+    def get_thumbnails(self, frames: list[np.ndarray]) -> np.ndarray:
+        """Downscale frames to grayscale thumbnails.
+
+        Args:
+            frames (list[np.ndarray]): the frames (H x W x C, uint8)
+
+        Returns:
+            np.ndarray: the thumbnails (N x thumbnail_size x thumbnail_size) in [0, 1]
+        """
+        batch = np.stack(frames)
+        height, width = batch.shape[1:3]
+        step_h = max(1, height // self.thumbnail_size)
+        step_w = max(1, width // self.thumbnail_size)
+        thumbnails = batch[
+            :,
+            : step_h * self.thumbnail_size : step_h,
+            : step_w * self.thumbnail_size : step_w,
+        ]
+        if thumbnails.ndim == 4:
+            thumbnails = thumbnails.mean(axis=3)
+        return thumbnails.astype(np.float32) / 255.0
+
+    def select(self, frames: list[Image], timestamps: list[float]) -> list[int]:
+        """Select the frames of a batch that should be captioned.
+
+        Args:
+            frames (list[Image]): the frames of the batch
+            timestamps (list[float]): the timestamps of the frames in seconds
+
+        Returns:
+            list[int]: the indices of the selected frames
+        """
+        if len(frames) == 0:
+            return []
+
+        thumbnails = self.get_thumbnails([frame.get_numpy() for frame in frames])
+        timestamps_array = np.asarray(timestamps, dtype=np.float64)
+
+        selected = []
+        start = 0
+        if self.last_thumbnail is None:
+            selected.append(0)
+            self.last_thumbnail = thumbnails[0]
+            self.last_timestamp = timestamps_array[0]
+            start = 1
+
+        while start < len(frames):
+            diffs = np.abs(thumbnails[start:] - self.last_thumbnail).mean(axis=(1, 2))
+            elapsed = timestamps_array[start:] - self.last_timestamp
+            candidates = np.flatnonzero(
+                (diffs > self.threshold) | (elapsed >= self.max_interval)
+            )
+            if len(candidates) == 0:
+                break
+            index = start + int(candidates[0])
+            selected.append(index)
+            self.last_thumbnail = thumbnails[index]
+            self.last_timestamp = timestamps_array[index]
+            start = index + 1
+
+        return selected
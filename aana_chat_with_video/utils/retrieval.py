@@ -0,0 +1,191 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from aana_chat_with_video.core.models.timeline import TimelineFormat
+from aana_chat_with_video.utils.timeline import render_timeline
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits a text into lowercase word tokens.
+
+    Args:
+        text (str): the text
+
+    Returns:
+        list[str]: the tokens
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """Estimates the number of LLM tokens in a text.
+
+    Args:
+        text (str): the text
+        chars_per_token (float): the average number of characters per token
+
+    Returns:
+        int: the estimated number of tokens
+    """
+    return math.ceil(len(text) / chars_per_token)
+
+
+class BM25Index:
+    """Okapi BM25 index over a list of documents.
+
+    Attributes:
+        k1 (float): term frequency saturation parameter
+        b (float): document length normalization parameter
+    """
+
+    def __init__(self, documents: list[str], k1: float = 1.5, b: float = 0.75):
+        """Constructor.
+
+        Args:
+            documents (list[str]): the documents to index
+            k1 (float): term frequency saturation parameter
+            b (float): document length normalization parameter
+        """
+        self.k1 = k1
+        self.b = b
+        self.term_frequencies = [Counter(tokenize(document)) for document in documents]
+        self.document_lengths = np.array(
+            [sum(tf.values()) for tf in self.term_frequencies], dtype=np.float64
+        )
+        self.average_length = (
+            float(self.document_lengths.mean()) if len(documents) > 0 else 0.0
+        ) or 1.0
+        self.document_frequencies = Counter(
+            term for tf in self.term_frequencies for term in tf
+        )
+
+    def score(self, query: str) -> np.ndarray:
+        """Scores all documents against a query.
+
+        Args:
+            query (str): the query
+
+        Returns:
+            np.ndarray: the BM25 score of each document
+        """
+        num_documents = len(self.term_frequencies)
+        scores = np.zeros(num_documents, dtype=np.float64)
+        length_norm = self.k1 * (
+            1 - self.b + self.b * self.document_lengths / self.average_length
+        )
+        for term in set(tokenize(query)):
+            df = self.document_frequencies.get(term, 0)
+            if df == 0:
+                continue
+            idf = math.log(1 + (num_documents - df + 0.5) / (df + 0.5))
+            tf = np.array(
+                [tf.get(term, 0) for tf in self.term_frequencies], dtype=np.float64
+            )
+            scores += idf * tf * (self.k1 + 1) / (tf + length_norm)
+        return scores
+
+
+class TimelineIndex:
+    """BM25 index of the chunks of a timeline for selecting the chunks of a question.
+
+    The index and the prompt size of each chunk only depend on the timeline, so they
+    are computed once per timeline and reused by the chat requests about the video.
+
+    Attributes:
+        timeline (list[dict]): the combined timeline
+        chunk_tokens (list[int]): the estimated number of tokens of each rendered chunk
+        size (int): the total size of the indexed chunks in characters
+    """
+
+    def __init__(
+        self,
+        timeline: list[dict],
+        chars_per_token: float = 4.0,
+        timeline_format: TimelineFormat = TimelineFormat.JSON,
+    ):
+        """Constructor.
+
+        Args:
+            timeline (list[dict]): the combined timeline
+            chars_per_token (float): the average number of characters per token
+            timeline_format (TimelineFormat): the format the chunks are rendered in for
+                the prompt
+        """
+        self.timeline = timeline
+        documents = [
+            f"{chunk['audio_transcript']} {chunk['visual_caption']}"
+            for chunk in timeline
+        ]
+        self.bm25 = BM25Index(documents)
+        self.chunk_tokens = [
+            estimate_tokens(render_timeline([chunk], timeline_format), chars_per_token)
+            for chunk in timeline
+        ]
+        self.size = sum(len(document) for document in documents)
+
+    def select(self, question: str, top_k: int, token_budget: int) -> list[dict]:
+        """Selects the chunks most relevant to a question within a token budget.
+
+        Args:
+            question (str): the question
+            top_k (int): the maximum number of chunks to select
+            token_budget (int): the maximum number of tokens of the selected chunks
+
+        Returns:
+            list[dict]: the selected chunks in chronological order
+        """
+        scores = self.bm25.score(question)
+        ranking = np.argsort(-scores, kind="stable")
+
+        selected = []
+        used_tokens = 0
+        for chunk_index in ranking:
+            if len(selected) >= top_k:
+                break
+            chunk_tokens = self.chunk_tokens[chunk_index]
+            if used_tokens + chunk_tokens > token_budget:
+                continue
+            selected.append(int(chunk_index))
+            used_tokens += chunk_tokens
+
+        return [self.timeline[chunk_index] for chunk_index in sorted(selected)]
+
+
+def select_timeline_chunks(
+    timeline: list[dict],
+    question: str,
+    top_k: int,
+    token_budget: int,
+    chars_per_token: float = 4.0,
+    timeline_format: TimelineFormat = TimelineFormat.JSON,
+) -> list[dict]:
+    """Selects the chunks most relevant to a question within a token budget.
+
+    Chunks are ranked with BM25 over their transcript and captions. The best chunks
+    are added until `top_k` chunks are selected or the token budget is exhausted.
+    Chunks that don't match the question keep their chronological order, so if
+    nothing matches, the beginning of the video is selected.
+
+    The timeline is indexed on every call, use a `TimelineIndex` to select the chunks
+    of several questions about the same timeline.
+
+    Args:
+        timeline (list[dict]): the combined timeline
+        question (str): the question
+        top_k (int): the maximum number of chunks to select
+        token_budget (int): the maximum number of tokens of the selected chunks
+        chars_per_token (float): the average number of characters per token
+        timeline_format (TimelineFormat): the format the chunks are rendered in for the prompt
+
+    Returns:
+        list[dict]: the selected chunks in chronological order
+    """
+    index = TimelineIndex(
+        timeline, chars_per_token=chars_per_token, timeline_format=timeline_format
+    )
+    return index.select(question, top_k=top_k, token_budget=token_budget)
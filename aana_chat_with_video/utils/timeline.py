@@ -0,0 +1,212 @@
+import hashlib
+import json
+from collections.abc import Callable
+
+from sqlalchemy.orm import Session
+
+from aana.core.models.asr import AsrSegments
+from aana.core.models.media import MediaId
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.core.models.timeline import TimelineChunking, TimelineFormat
+from aana_chat_with_video.core.models.transcript import TranscriptSegments
+from aana_chat_with_video.core.prompts.loader import get_prompt_template
+from aana_chat_with_video.storage.repository.extended_video_caption import (
+    ExtendedVideoCaptionRepository,
+)
+from aana_chat_with_video.storage.repository.extended_video_transcript import (
+    ExtendedVideoTranscriptRepository,
+)
+from aana_chat_with_video.utils.core import (
+    generate_adaptive_timeline,
+    generate_combined_timeline,
+)
+
+
+def get_timeline_settings_hash() -> str:
+    """Get a fingerprint of the timeline settings of the app.
+
+    The chunking, caption collapsing and chunk size limits all change the stored timeline,
+    so timelines built with different settings are stored separately. The format only
+    changes how the timeline is rendered in prompts and is left out.
+
+    Returns:
+        str: the fingerprint of the timeline settings
+    """
+    timeline_settings = settings.timeline.model_dump(mode="json", exclude={"format"})
+    return hashlib.sha256(
+        json.dumps(timeline_settings, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def get_timeline_params(media_id: MediaId) -> dict:
+    """Get the parameters that identify the stored timeline of a video with the app settings.
+
+    Args:
+        media_id (MediaId): the media ID of the video
+
+    Returns:
+        dict: the keyword arguments for `ExtendedVideoTimelineRepository`
+    """
+    return {
+        "media_id": media_id,
+        "asr_model_name": settings.asr_model_name,
+        "captioning_model_name": settings.captioning_model_name,
+        "chunk_size": settings.timeline.chunk_size,
+        "chunking": settings.timeline.chunking,
+        "settings_hash": get_timeline_settings_hash(),
+    }
+
+
+def combine_timeline(
+    segments: AsrSegments | TranscriptSegments,
+    captions: list[str],
+    caption_timestamps: list[float],
+) -> dict:
+    """Build the combined timeline with the timeline settings of the app.
+
+    Args:
+        segments (AsrSegments | TranscriptSegments): the ASR segments
+        captions (list[str]): the captions
+        caption_timestamps (list[float]): the timestamps for the captions
+
+    Returns:
+        dict: a dictionary with the keys:
+            "timeline": the combined timeline
+            "saved_characters": the number of characters removed from the visual captions
+                by collapsing repeated captions
+    """
+    if settings.timeline.chunking == TimelineChunking.ADAPTIVE:
+        timeline_output = generate_adaptive_timeline(
+            transcription_segments=segments,
+            captions=captions,
+            caption_timestamps=caption_timestamps,
+            min_chunk_size=settings.timeline.min_chunk_size,
+            max_chunk_size=settings.timeline.max_chunk_size,
+            max_chunk_characters=settings.timeline.max_chunk_characters,
+            collapse_repeated_captions=settings.timeline.collapse_repeated_captions,
+            caption_similarity_threshold=settings.timeline.caption_similarity_threshold,
+        )
+    else:
+        timeline_output = generate_combined_timeline(
+            transcription_segments=segments,
+            captions=captions,
+            caption_timestamps=caption_timestamps,
+            chunk_size=settings.timeline.chunk_size,
+            collapse_repeated_captions=settings.timeline.collapse_repeated_captions,
+            caption_similarity_threshold=settings.timeline.caption_similarity_threshold,
+        )
+    return timeline_output
+
+
+def build_timeline(session: Session, media_id: MediaId) -> list[dict]:
+    """Load the transcript and captions of a video and build the combined timeline.
+
+    Args:
+        session (Session): the database session
+        media_id (MediaId): the media ID of the video
+
+    Returns:
+        list[dict]: the combined timeline
+    """
+    segments = ExtendedVideoTranscriptRepository(session).get_transcript_segments(
+        model_name=settings.asr_model_name, media_id=media_id
+    )
+
+    captions_output = ExtendedVideoCaptionRepository(session).get_captions(
+        model_name=settings.captioning_model_name, media_id=media_id
+    )
+
+    return combine_timeline(
+        segments=segments,
+        captions=captions_output["captions"],
+        caption_timestamps=captions_output["timestamps"],
+    )["timeline"]
+
+
+def format_seconds(seconds: float) -> str:
+    """Format a time in seconds without trailing zeros, e.g. 10.0 -> "10", 2.50 -> "2.5".
+
+    Args:
+        seconds (float): the time in seconds
+
+    Returns:
+        str: the formatted time
+    """
+    return f"{seconds:.2f}".rstrip("0").rstrip(".")
+
+
+def render_timeline_lines(timeline: list[dict]) -> str:
+    """Render the combined timeline with one line per chunk.
+
+    Each line has the form "[start-end] A: transcript V: captions". Empty
+    transcripts and captions are omitted.
+
+    Args:
+        timeline (list[dict]): the combined timeline
+
+    Returns:
+        str: the rendered timeline
+    """
+    lines = []
+    for chunk in timeline:
+        line = f"[{format_seconds(chunk['start_time'])}-{format_seconds(chunk['end_time'])}]"
+        if chunk["audio_transcript"]:
+            line += " A: " + chunk["audio_transcript"].replace("\n", " ")
+        if chunk["visual_caption"]:
+            line += " V: " + chunk["visual_caption"].replace("\n", "; ")
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def render_timeline(
+    timeline: list[dict], timeline_format: TimelineFormat = TimelineFormat.JSON
+) -> str:
+    """Render the combined timeline for the LLM prompt.
+
+    Args:
+        timeline (list[dict]): the combined timeline
+        timeline_format (TimelineFormat): the serialization format. Defaults to JSON.
+
+    Returns:
+        str: the rendered timeline
+    """
+    if timeline_format == TimelineFormat.JSON:
+        return json.dumps(timeline, indent=4, separators=(",", ": "))
+    elif timeline_format == TimelineFormat.COMPACT_JSON:
+        return json.dumps(timeline, separators=(",", ":"), ensure_ascii=False)
+    elif timeline_format == TimelineFormat.LINES:
+        return render_timeline_lines(timeline)
+    elif timeline_format == TimelineFormat.TEMPLATE:
+        return get_prompt_template("timeline").render(
+            timeline=timeline, format_seconds=format_seconds
+        )
+    raise ValueError(f"Unsupported timeline format: {timeline_format}")  # noqa: TRY003
+
+
+def measure_timeline_formats(
+    timeline: list[dict], count_tokens: Callable[[str], int]
+) -> dict[TimelineFormat, int]:
+    """Count the tokens of the timeline rendered in each format.
+
+    Use it to compare the prompt size of the formats with the tokenizer of the LLM:
+
+    ```python
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(
+        "internlm/internlm2_5-7b-chat", trust_remote_code=True
+    )
+    measure_timeline_formats(timeline, lambda text: len(tokenizer.encode(text)))
+    ```
+
+    Args:
+        timeline (list[dict]): the combined timeline
+        count_tokens (Callable[[str], int]): the function that counts the tokens of a text
+
+    Returns:
+        dict[TimelineFormat, int]: the number of tokens for each format
+    """
+    return {
+        timeline_format: count_tokens(render_timeline(timeline, timeline_format))
+        for timeline_format in TimelineFormat
+    }
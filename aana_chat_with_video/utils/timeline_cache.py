@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from aana.core.models.media import MediaId
+from aana_chat_with_video.configs.settings import settings
+from aana_chat_with_video.core.models.timeline import TimelineChunking
+
+
+class TimelineCacheKey(NamedTuple):
+    """Key of a rendered timeline in the timeline cache."""
+
+    media_id: MediaId
+    asr_model_name: str
+    captioning_model_name: str
+    chunk_size: float
+    chunking: TimelineChunking
+
+
+class TimelineCache:
+    """LRU cache for rendered video timelines.
+
+    The timeline of a video is immutable once the video is indexed, so it can be
+    rendered once and reused by all chat requests about the video. The cache can
+    also hold other data computed from the timelines, e.g. their retrieval indexes,
+    with the size of each entry given explicitly. Entries are
+    evicted in least-recently-used order when the cache holds more than `max_entries`
+    timelines or more than `max_size` characters in total.
+
+    Each entry stores a version (e.g. the content hash of the stored timeline) so
+    that a stale timeline of a re-indexed video is never served.
+
+    The cache is local to the process; call `invalidate` whenever a video is
+    deleted or re-indexed. The statistics are served by the timeline cache stats
+    endpoint.
+
+    Attributes:
+        max_entries (int): maximum number of cached timelines
+        max_size (int): maximum total size of cached timelines in characters
+        hits (int): number of cache hits
+        misses (int): number of cache misses
+    """
+
+    def __init__(self, max_entries: int, max_size: int):
+        """Constructor.
+
+        Args:
+            max_entries (int): maximum number of cached timelines
+            max_size (int): maximum total size of cached timelines in characters
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries: OrderedDict[TimelineCacheKey, tuple[Any, Any, int]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        """Number of cached timelines."""
+        return len(self._entries)
+
+    def get(self, key: TimelineCacheKey, version: Any = None) -> Any | None:
+        """Get a rendered timeline from the cache.
+
+        Args:
+            key (TimelineCacheKey): the cache key
+            version (Any): the expected version of the entry
+
+        Returns:
+            Any | None: the rendered timeline or None if it is not cached
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(
+        self,
+        key: TimelineCacheKey,
+        timeline: Any,
+        version: Any = None,
+        size: int | None = None,
+    ):
+        """Add a rendered timeline to the cache.
+
+        Timelines larger than `max_size` are not cached.
+
+        Args:
+            key (TimelineCacheKey): the cache key
+            timeline (Any): the rendered timeline
+            version (Any): the version of the entry
+            size (int | None): the size of the entry in characters, the length of the
+                timeline by default
+        """
+        self._remove(key)
+        if size is None:
+            size = len(timeline)
+        if size > self.max_size or self.max_entries <= 0:
+            return
+        self._entries[key] = (version, timeline, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_size:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def invalidate(self, media_id: MediaId):
+        """Remove all cached timelines of a video.
+
+        Args:
+            media_id (MediaId): the media ID of the video
+        """
+        for key in [key for key in self._entries if key.media_id == media_id]:
+            self._remove(key)
+
+    def clear(self):
+        """Remove all cached timelines and reset the counters."""
+        self._entries.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Get the cache statistics.
+
+        Returns:
+            dict: the number of hits, misses, entries and the total size in characters
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "size": self.size,
+        }
+
+    def _remove(self, key: TimelineCacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+timeline_cache = TimelineCache(
+    max_entries=settings.timeline_cache.max_entries,
+    max_size=settings.timeline_cache.max_size,
+)
+
+# the retrieval indexes of the timelines, with the same limits
+timeline_index_cache = TimelineCache(
+    max_entries=settings.timeline_cache.max_entries,
+    max_size=settings.timeline_cache.max_size,
+)
@@ -0,0 +1,187 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+from yt_dlp.utils import DownloadError
+
+from aana.core.models.video import VideoMetadata
+from aana.exceptions.io import DownloadException
+from aana_chat_with_video.configs.settings import settings
+
+
+class VideoMetadataCache:
+    """In-memory cache of the metadata of video URLs.
+
+    Entries expire `ttl` seconds after they are added, so changes of the remote video
+    are picked up eventually. When the cache holds more than `max_entries` entries,
+    the oldest ones are evicted.
+
+    Attributes:
+        ttl (float): the time to live of an entry in seconds
+        max_entries (int): the maximum number of entries
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Constructor.
+
+        Args:
+            ttl (float): the time to live of an entry in seconds
+            max_entries (int): the maximum number of entries
+            clock (Callable[[], float]): the function returning the current time in
+                seconds
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, VideoMetadata]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of cached entries."""
+        return len(self._entries)
+
+    def get(self, url: str) -> VideoMetadata | None:
+        """Get the metadata of a video URL.
+
+        Args:
+            url (str): the URL of the video
+
+        Returns:
+            VideoMetadata | None: the metadata or None if it isn't cached or has expired
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        added_at, metadata = entry
+        if self.clock() - added_at >= self.ttl:
+            del self._entries[url]
+            return None
+        return metadata
+
+    def put(self, url: str, metadata: VideoMetadata):
+        """Add the metadata of a video URL.
+
+        Args:
+            url (str): the URL of the video
+            metadata (VideoMetadata): the metadata of the video
+        """
+        self._entries.pop(url, None)
+        self._entries[url] = (self.clock(), metadata)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+video_metadata_cache = VideoMetadataCache(
+    ttl=settings.metadata_probe.cache_ttl,
+    max_entries=settings.metadata_probe.max_cache_entries,
+)
+
+metadata_probe_executor = ThreadPoolExecutor(
+    max_workers=settings.metadata_probe.max_workers,
+    thread_name_prefix="metadata_probe",
+)
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Check if an error was caused by a network timeout.
+
+    Args:
+        error (BaseException): the error
+
+    Returns:
+        bool: True if a TimeoutError is in the chain of causes of the error
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, TimeoutError):
+            return True
+        seen.add(id(error))
+        if isinstance(error, DownloadError) and error.exc_info is not None:
+            error = error.exc_info[1]
+        else:
+            error = error.__cause__ or error.__context__
+    return False
+
+
+def get_video_metadata(video_url: str, timeout: float) -> VideoMetadata:
+    """Fetch the metadata of a video URL.
+
+    Same as `aana.integrations.external.yt_dlp.get_video_metadata`, but the network
+    operations of yt-dlp time out, so the probe thread doesn't hang on a host
+    that doesn't respond.
+
+    Args:
+        video_url (str): the URL of the video
+        timeout (float): the timeout of the network operations in seconds
+
+    Returns:
+        VideoMetadata: the metadata of the video
+
+    Raises:
+        TimeoutError: if the remote host doesn't respond in time
+        DownloadException: if the metadata can't be fetched
+    """
+    ydl_options = {
+        "extract_flat": True,
+        "hls_prefer_native": True,
+        "extractor_args": {"youtube": {"skip": ["hls", "dash"]}},
+        "socket_timeout": timeout,
+    }
+    try:
+        with yt_dlp.YoutubeDL(ydl_options) as ydl:
+            info = ydl.extract_info(video_url, download=False)
+    except DownloadError as e:
+        if is_timeout(e):
+            raise TimeoutError(video_url) from e
+        error_message = e.msg.split(";")[0]
+        raise DownloadException(url=video_url, msg=error_message) from e
+    return VideoMetadata(
+        title=info.get("title", ""),
+        description=info.get("description", ""),
+        duration=info.get("duration"),
+    )
+
+
+async def probe_video_metadata(url: str, timeout: float) -> VideoMetadata | None:
+    """Get the metadata of a video URL without blocking the event loop.
+
+    The metadata is taken from the cache if possible. Otherwise, it is fetched with
+    yt-dlp in the metadata probe thread pool and cached. The network operations of
+    the probe time out as well, so the thread is freed soon after a timeout.
+
+    Args:
+        url (str): the URL of the video
+        timeout (float): the maximum time in seconds to wait for the remote host
+
+    Returns:
+        VideoMetadata | None: the metadata or None if the probe timed out
+
+    Raises:
+        DownloadException: if the metadata can't be fetched
+    """
+    metadata = video_metadata_cache.get(url)
+    if metadata is not None:
+        return metadata
+
+    loop = asyncio.get_running_loop()
+    try:
+        metadata = await asyncio.wait_for(
+            loop.run_in_executor(
+                metadata_probe_executor, get_video_metadata, url, timeout
+            ),
+            timeout=timeout,
+        )
+    # asyncio.TimeoutError is not an alias of TimeoutError before Python 3.11
+    except (asyncio.TimeoutError, TimeoutError):  # noqa: UP041
+        # after a timeout of the whole probe, the thread finishes in the background
+        # and the result is discarded
+        return None
+    video_metadata_cache.put(url, metadata)
+    return metadata